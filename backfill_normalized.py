@@ -0,0 +1,49 @@
+import argparse
+import os
+import time
+from dotenv import load_dotenv
+
+from services.blob_store import BlobStore
+from services.conversation_store import get_conversation_store
+from services.search_index import SearchIndex
+from services.sqlite_store import SqliteConversationStore
+from utils.normalize import cache_stats
+
+load_dotenv()
+
+def main(batch_size: int):
+    print("=" * 60)
+    print("🔢 BACKFILLING NORMALIZED PROPERTY DETAILS")
+    print("=" * 60)
+    
+    store = get_conversation_store()
+    if not isinstance(store, SqliteConversationStore):
+        print("\n❌ Backfill needs the SQLite store (CONVERSATION_STORE=sqlite)")
+        print("   JSONL segments are append-only; new calls are normalized as they arrive.")
+        return
+    
+    started = time.perf_counter()
+    updated = store.backfill_normalized(batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    
+    print(f"\n✅ Normalized {updated} call(s) in {elapsed:.2f}s")
+    for field, stats in cache_stats().items():
+        print(f"   {field}: {stats['misses']} distinct phrasing(s)")
+    
+    # The search index filters on the market; re-index so it sees the new values
+    if updated:
+        reindexed = SearchIndex(store, BlobStore()).reindex()
+        print(f"🔎 Re-indexed {reindexed} call(s) for search")
+    
+    # Analytics rollups were built from the old records; rebuild them on next start
+    snapshot = os.getenv("ANALYTICS_SNAPSHOT", "data/analytics.json")
+    if updated and os.path.exists(snapshot):
+        os.remove(snapshot)
+        print(f"🗑️  Removed {snapshot}; analytics will be rebuilt on next start")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add numeric ranges and canonical locations to stored calls")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Records updated per transaction")
+    args = parser.parse_args()
+    main(args.batch_size)
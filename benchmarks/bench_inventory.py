@@ -0,0 +1,101 @@
+"""Latency benchmark for in-call inventory search.
+
+Writes a synthetic listings CSV, times the index build, then runs a mix
+of spoken-style queries through the tool handler and reports latency
+percentiles against the ~100 ms voice budget, next to a linear scan.
+
+    python -m benchmarks.bench_inventory [listings] [queries]
+"""
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from services.inventory import InventoryIndex
+
+ASSETS = ["Office", "Retail", "Industrial", "Multifamily", "Land", "Warehouse", "Flex"]
+LOCATIONS = [
+    "Midtown NYC", "Brooklyn", "Newark, NJ", "Jersey City, NJ", "Austin, TX", "Dallas, TX", "Houston, TX",
+    "Chicago, IL", "Miami, FL", "Atlanta, GA", "Denver, CO", "Phoenix, AZ", "Seattle, WA", "Boston, MA",
+    "Boise, Idaho", "Los Angeles, CA", "San Francisco, CA", "Nashville, TN", "Charlotte, NC", "Columbus, OH",
+]
+QUERIES = [
+    {"asset_type": "industrial", "location": "Newark", "square_feet": "about 10k sq ft"},
+    {"asset_type": "warehouse", "location": "New Jersey", "square_feet": "at least 50,000 sf"},
+    {"asset_type": "office", "location": "Midtown Manhattan", "square_feet": "5,000-8,000 SF"},
+    {"asset_type": "retail", "location": "Austin, TX"},
+    {"location": "Texas", "square_feet": "2 acres"},
+    {"asset_type": "multifamily", "location": "Chicago", "listing_type": "sale"},
+    {"asset_type": "office", "square_feet": "10-15k"},
+    {"asset_type": "land", "location": "Phoenix"},
+]
+
+
+def write_listings(path: str, n: int):
+    rng = random.Random(11)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "address", "asset_type", "location", "square_feet", "price", "listing_type", "status"])
+        for i in range(n):
+            size = int(rng.lognormvariate(9.5, 1.0))
+            square_feet = f"{size:,}-{int(size * 1.5):,} SF" if rng.random() < 0.2 else str(size)
+            writer.writerow([
+                f"L{i}", f"{rng.randint(1, 9999)} Main St", rng.choice(ASSETS), rng.choice(LOCATIONS), square_feet,
+                f"${rng.randint(10, 90)}/sf/yr", rng.choice(["lease", "sale"]),
+                "available" if rng.random() < 0.9 else "leased",
+            ])
+
+
+def linear_scan(index: InventoryIndex, query: dict):
+    """What a search costs without the posting lists"""
+    listings = index._snapshot.listings
+    asset = query.get("asset_type", "").lower()
+    return [l for l in listings if not asset or (l.get("asset_type") or "").lower() == asset][:5]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return f"p50 {pick(0.5):7.3f} ms   p99 {pick(0.99):7.3f} ms   max {samples[-1] * 1000:7.3f} ms"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5_000
+    path = os.path.join(tempfile.mkdtemp(prefix="realflow-inventory-"), "listings.csv")
+    write_listings(path, n)
+
+    print("=" * 60)
+    print(f" INVENTORY SEARCH BENCHMARK ({n:,} listings)")
+    print("=" * 60)
+    index = InventoryIndex(path, check_interval=3600)
+    started = time.perf_counter()
+    index.reload()
+    print(f"  index build: {time.perf_counter() - started:.2f}s, {index.stats()['keys']} keys")
+
+    for label, fn in (("indexed (tool handler)", index.search_tool), ("linear scan", lambda q: linear_scan(index, q))):
+        count = rounds if fn is index.search_tool else max(1, rounds // 50)
+        samples = []
+        for i in range(count):
+            query = QUERIES[i % len(QUERIES)]
+            started = time.perf_counter()
+            fn(query)
+            samples.append(time.perf_counter() - started)
+        print(f"  {label:<24}{percentiles(samples)}")
+
+    print("\n  per query (indexed):")
+    for query in QUERIES:
+        samples = []
+        for _ in range(200):
+            started = time.perf_counter()
+            answer = index.search_tool(query)
+            samples.append(time.perf_counter() - started)
+        print(f"    {statistics.median(samples) * 1000:7.3f} ms  {answer.splitlines()[0]:<30} {query}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
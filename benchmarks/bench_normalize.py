@@ -0,0 +1,87 @@
+"""Throughput benchmark for deal size / square footage / location normalization.
+
+Builds a synthetic corpus where phrasings repeat the way they do in
+real calls, then compares uncached parsing, the LRU-cached path used by
+the webhook, and the batch path used for backfills.
+
+    python -m benchmarks.bench_normalize [records]
+"""
+import random
+import sys
+import time
+
+from utils import normalize
+
+DEALS = [
+    "$2-3M", "$2M to $3M", "around $1.5 million", "under $5M", "over 10M", "$500k", "1,500,000",
+    "between 1 and 2 million", "$3.5mm", "10 to 15 million dollars", "$750,000", "not sure yet",
+]
+AREAS = [
+    "about 10k sq ft", "10,000-15,000 SF", "2 acres", "5000 square feet", "10-15k", "at least 20,000 sf",
+    "roughly 50,000 square feet", "800 sqm", "3,500 sf", "25k",
+]
+LOCATIONS = [
+    "Midtown NYC", "Austin, TX", "Downtown Chicago", "Brooklyn", "Boise, Idaho", "Buckhead area of Atlanta",
+    "Newark, New Jersey", "Washington D.C.", "SoHo, New York", "north Dallas", "Miami", "somewhere in Texas",
+]
+
+
+def corpus(n: int, distinct: int = 400):
+    rng = random.Random(7)
+    # A few hundred distinct phrasings, each repeated many times
+    variants = []
+    for _ in range(distinct):
+        deal = rng.choice(DEALS)
+        if rng.random() < 0.5:
+            deal = deal.replace("2", str(rng.randint(1, 9)))
+        variants.append({
+            "deal_size": deal,
+            "square_footage": rng.choice(AREAS).replace("10", str(rng.randint(5, 60))),
+            "location": rng.choice(LOCATIONS),
+        })
+    return [rng.choice(variants) for _ in range(n)]
+
+
+def timed(label: str, n: int, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<28}{n / elapsed:>14,.0f} records/s{elapsed / n * 1e6:>10.2f} µs/record")
+
+
+def clear_caches():
+    for func in (normalize._money, normalize._area, normalize._location,
+                 normalize.parse_money, normalize.parse_square_feet, normalize._canonical_location):
+        func.cache_clear()
+
+
+def uncached(records):
+    for details in records:
+        clear_caches()
+        normalize.normalize_property(details)
+
+
+def cached(records):
+    for details in records:
+        normalize.normalize_property(details)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    records = corpus(n)
+
+    print("=" * 60)
+    print(f" NORMALIZATION BENCHMARK ({n:,} records)")
+    print("=" * 60)
+    sample = records[: max(1, n // 20)]
+    timed("uncached (per record)", len(sample), lambda: uncached(sample))
+    clear_caches()
+    timed("LRU cached (webhook path)", n, lambda: cached(records))
+    clear_caches()
+    timed("batch (backfill path)", n, lambda: normalize.normalize_batch(records))
+    print(f"\n  cache: {normalize.cache_stats()}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
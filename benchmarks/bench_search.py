@@ -0,0 +1,120 @@
+"""Query latency for full-text call search.
+
+Stores synthetic calls (summary, property details and a short
+transcript) in a temporary SQLite conversation store, indexes them with
+``SearchIndex.sync`` and times a mix of broker-style queries, then
+times indexing one more call the way the webhook does. Target: p99
+under 50 ms at a million calls.
+
+    python -m benchmarks.bench_search [calls] [queries]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from services.search_index import SearchIndex
+from services.sqlite_store import SqliteConversationStore
+
+ASSETS = ["Office", "Retail", "Industrial", "Multifamily", "Land", "Warehouse", "Flex"]
+MARKETS = ["Newark, NJ", "New York, NY", "Austin, TX", "Dallas, TX", "Chicago, IL", "Miami, FL", "Seattle, WA"]
+PHRASES = [
+    "cold storage", "loading docks", "near the port", "clear height", "rail spur", "Class A", "ground floor",
+    "drive-in doors", "parking ratio", "sublease", "triple net", "value-add", "1031 exchange", "freezer space",
+    "last mile", "medical office", "anchor tenant", "mixed use", "build to suit", "outdoor storage",
+]
+FILLER = (
+    "the caller is looking for space and wants to move quickly with a budget around market rate they asked about "
+    "timing availability pricing terms location access highway tenants landlord broker tour next week follow up "
+    "email call back square feet lease buy sell invest portfolio property building site zoning permits"
+).split()
+# Word frequencies in speech fall off roughly as 1/rank
+FILLER_WEIGHTS = [1 / rank for rank in range(1, len(FILLER) + 1)]
+QUERIES = [
+    ("cold storage port", {}),
+    ('"loading docks"', {}),
+    ("summary:warehouse Newark", {}),
+    ("freez*", {}),
+    ('"clear height" -sublease', {}),
+    ("anchor OR tenant", {"market": "Austin, TX"}),
+    ("rail spur", {"asset_type": "industrial"}),
+    ('transcript:"1031 exchange"', {}),
+]
+
+
+def make_record(i: int, rng: random.Random) -> dict:
+    def sentence(n):
+        words = rng.choices(FILLER, weights=FILLER_WEIGHTS, k=n)
+        # Each phrase turns up in roughly one call in twenty
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(n), rng.choice(PHRASES))
+        return " ".join(words)
+
+    asset, market = rng.choice(ASSETS), rng.choice(MARKETS)
+    return {
+        "call_id": f"call-{i}",
+        "timestamp": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}T10:00:00",
+        "property_details": {"asset_type": asset, "location": market, "additional_details": sentence(8)},
+        "normalized": {"market": market},
+        "conversation_summary": f"{asset} inquiry in {market}: {sentence(20)}",
+        # Inline turns, as records written before transcripts moved to the blob store had them
+        "transcript": [{"role": rng.choice(["user", "assistant"]), "text": sentence(12)} for _ in range(8)],
+    }
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    return pick(0.5), pick(0.95), pick(0.99)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    data = tempfile.mkdtemp(prefix="realflow-search-")
+    try:
+        store = SqliteConversationStore(os.path.join(data, "conversations.db"))
+        rng = random.Random(7)
+        for start in range(0, calls, 10_000):
+            store.append_many([make_record(i, rng) for i in range(start, min(calls, start + 10_000))])
+
+        index = SearchIndex(store, path=os.path.join(data, "search.db"))
+        started = time.perf_counter()
+        index.sync(batch_size=5000)
+        build = time.perf_counter() - started
+
+        print("=" * 60)
+        print(f" FULL-TEXT SEARCH ({calls:,} calls, indexed in {build:.1f}s)")
+        print("=" * 60)
+        everything = []
+        for text, filters in QUERIES:
+            samples = []
+            for _ in range(max(1, queries // len(QUERIES))):
+                started = time.perf_counter()
+                hits, _ = index.search(text, limit=20, filters=filters)
+                samples.append(time.perf_counter() - started)
+            everything += samples
+            p50, _, p99 = percentiles(samples)
+            print(f"  {text[:32]:<32} {len(hits):>3} hits  p50 {p50:6.1f} ms  p99 {p99:6.1f} ms")
+
+        p50, p95, p99 = percentiles(everything)
+        print(f"\n  all queries   p50 {p50:.1f} ms   p95 {p95:.1f} ms   p99 {p99:.1f} ms  {'✅' if p99 < 50 else '❌'} (50 ms)")
+
+        samples = []
+        for i in range(calls, calls + 50):
+            store.append(make_record(i, rng))
+            started = time.perf_counter()
+            index.sync()
+            samples.append(time.perf_counter() - started)
+        p50, _, p99 = percentiles(samples)
+        print(f"  index one new call   p50 {p50:.1f} ms   p99 {p99:.1f} ms")
+        print("=" * 60)
+        store.close()
+    finally:
+        shutil.rmtree(data, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
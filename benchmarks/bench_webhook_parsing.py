@@ -0,0 +1,154 @@
+"""Microbenchmark for webhook parsing and dispatch.
+
+Compares the old path (body read for the HMAC, then request.json()
+decoding the same bytes again, every type through the generic dict
+path) with the current single-pass path, per message type.
+
+    python -m benchmarks.bench_webhook_parsing [requests_per_type]
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+TMP = tempfile.mkdtemp(prefix="realflow-bench-")
+os.environ.setdefault("CONVERSATION_STORE_DIR", os.path.join(TMP, "conversations"))
+os.environ.setdefault("CONVERSATION_DB_PATH", os.path.join(TMP, "conversations.db"))
+os.environ.setdefault("SHEETS_OUTBOX_DIR", os.path.join(TMP, "outbox"))
+os.environ.setdefault("DEDUP_LOG_FILE", os.path.join(TMP, "seen_calls.log"))
+os.environ.setdefault("CALLER_INDEX_FILE", os.path.join(TMP, "callers.log"))
+os.environ.setdefault("GOOGLE_CREDENTIALS_FILE", os.path.join(TMP, "missing.json"))
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+
+import main
+from models.schemas import WebhookResponse
+from routes import webhook
+from utils import fastjson
+
+logging.disable(logging.INFO)
+
+CALL = {
+    "id": "call-id",
+    "orgId": "org-123",
+    "type": "inboundPhoneCall",
+    "status": "in-progress",
+    "phoneNumberId": "pn-456",
+    "customer": {"number": "+13135550100"},
+    "assistantId": "asst-789",
+}
+
+
+def make_payload(message_type: str) -> dict:
+    message = {"type": message_type, "timestamp": time.time(), "call": dict(CALL, id=str(uuid.uuid4()))}
+    if message_type == "status-update":
+        message["status"] = "in-progress"
+    elif message_type == "speech-update":
+        message.update(status="started", role="assistant", turn=3)
+    elif message_type == "transcript":
+        message.update(role="user", transcriptType="partial", transcript="I'm looking for about ten thousand square feet of")
+    elif message_type == "conversation-update":
+        message["messages"] = [{"role": "user", "message": "Hello, I need office space"} for _ in range(20)]
+    elif message_type == "end-of-call-report":
+        message.update(
+            transcript="AI: Hello! ...\nUser: I'm looking for warehouse space in Newark." * 20,
+            recordingUrl="https://storage.vapi.ai/recording.wav",
+            analysis={
+                "summary": "Caller is looking for 10k sq ft of industrial space in Newark.",
+                "structuredData": {
+                    "callerName": "Jane Doe",
+                    "callerPhone": "+13135550100",
+                    "callerEmail": "jane@example.com",
+                    "callerRole": "tenant",
+                    "company": "Acme Logistics",
+                    "inquiryType": "leasing",
+                    "assetType": "industrial",
+                    "location": "Newark, NJ",
+                    "dealSize": "$2-3M",
+                    "squareFootage": "10,000 sq ft",
+                    "urgency": "3 months",
+                },
+            },
+        )
+    return {"message": message}
+
+
+MESSAGE_TYPES = ["status-update", "speech-update", "transcript", "conversation-update", "end-of-call-report"]
+
+
+def legacy_app() -> FastAPI:
+    """The old handler shape for types without a handler: decode twice, generic path"""
+    app = FastAPI()
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+
+    @app.post("/api/vapi/webhook", response_model=WebhookResponse)
+    async def handler(request: Request, x_vapi_signature: str = Header(None)):
+        body = await request.body()
+        if x_vapi_signature and not webhook.verify_webhook_signature(body, x_vapi_signature):
+            raise HTTPException(status_code=401, detail="Invalid signature")
+        webhook_data = await request.json()
+        message = webhook_data.get("message", {})
+        logging.getLogger("bench").info(f"Received webhook: {message.get('type')}")
+        return WebhookResponse(status="success", message="Webhook received")
+
+    return app
+
+
+def bench_decode(n: int):
+    print("\nDecode cost per message (µs)")
+    print(f"  {'type':<22}{'before':>10}{'after':>10}")
+    for message_type in MESSAGE_TYPES:
+        body = json.dumps(make_payload(message_type)).encode()
+
+        start = time.perf_counter()
+        for _ in range(n):
+            json.loads(body)
+            json.loads(body)
+        before = (time.perf_counter() - start) / n * 1e6
+
+        start = time.perf_counter()
+        for _ in range(n):
+            if not webhook.is_ignorable(body):
+                fastjson.loads(body)
+        after = (time.perf_counter() - start) / n * 1e6
+        print(f"  {message_type:<22}{before:>10.2f}{after:>10.2f}")
+
+
+async def requests_per_second(app, message_type: str, n: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        bodies = [json.dumps(make_payload(message_type)).encode() for _ in range(n)]
+        headers = {"content-type": "application/json"}
+        for body in bodies[:50]:
+            await client.post("/api/vapi/webhook", content=body, headers=headers)
+        start = time.perf_counter()
+        for body in bodies:
+            response = await client.post("/api/vapi/webhook", content=body, headers=headers)
+            response.raise_for_status()
+        return n / (time.perf_counter() - start)
+
+
+async def bench_end_to_end(n: int):
+    print("\nEnd-to-end requests/sec (in-process ASGI)")
+    print(f"  {'type':<22}{'before':>10}{'after':>10}")
+    old = legacy_app()
+    for message_type in MESSAGE_TYPES:
+        before = await requests_per_second(old, message_type, n) if message_type != "end-of-call-report" else float("nan")
+        after = await requests_per_second(main.app, message_type, n)
+        print(f"  {message_type:<22}{before:>10.0f}{after:>10.0f}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print("=" * 60)
+    print(f" WEBHOOK PARSING BENCHMARK (json backend: {fastjson.BACKEND})")
+    print("=" * 60)
+    bench_decode(n * 5)
+    asyncio.run(bench_end_to_end(n))
+    print("=" * 60)
@@ -0,0 +1,159 @@
+"""Throughput of the webhook with 1, 2, 4... uvicorn workers.
+
+Starts ``python main.py`` with ``WEB_CONCURRENCY`` set for each worker
+count against a fresh data directory, replays end-of-call reports from
+concurrent clients, and reports requests/s and latency. Every tenth
+request is a retry of an earlier call, which must be recognised by
+whichever worker receives it; the stored row count is checked against
+the unique calls sent, so lost or duplicated writes fail the run.
+
+    python -m benchmarks.load_workers [--workers 1 2 4] [--requests 4000] [--concurrency 64]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def report(call_id: str, i: int) -> bytes:
+    return json.dumps({"message": {
+        "type": "end-of-call-report",
+        "call": {"id": call_id, "duration": 60 + i % 300, "customer": {"number": f"+1512555{i % 10000:04d}"}},
+        "recordingUrl": "https://storage.vapi.ai/recording.wav",
+        "analysis": {
+            "summary": "Caller is looking for industrial space.",
+            "structuredData": {
+                "callerName": f"Caller {i}",
+                "callerPhone": f"+1512555{i % 10000:04d}",
+                "inquiryType": ["buying", "leasing", "selling"][i % 3],
+                "assetType": ["industrial", "office", "retail"][i % 3],
+                "location": ["Newark, NJ", "Austin, TX", "Midtown NYC"][i % 3],
+                "dealSize": "$2-3M",
+                "squareFootage": "10,000 sq ft",
+            },
+        },
+    }}).encode()
+
+
+def data_environment(data: str) -> dict:
+    """Environment pointing every store, log and lock at the directory ``data``"""
+    return dict(
+        os.environ,
+        ENVIRONMENT="production",
+        CONVERSATION_DB_PATH=os.path.join(data, "conversations.db"),
+        CONVERSATION_STORE_DIR=os.path.join(data, "conversations"),
+        SHEETS_OUTBOX_DIR=os.path.join(data, "outbox"),
+        DEDUP_LOG_FILE=os.path.join(data, "seen_calls.log"),
+        CALLER_INDEX_FILE=os.path.join(data, "callers.log"),
+        BLOB_STORE_DIR=os.path.join(data, "blobs"),
+        SEARCH_DB_PATH=os.path.join(data, "search.db"),
+        ANALYTICS_SNAPSHOT=os.path.join(data, "analytics.json"),
+        INVENTORY_FILE=os.path.join(data, "listings.csv"),
+        LOG_FILE=os.path.join(data, "app.log"),
+        LOG_LEVEL="WARNING",
+        GOOGLE_CREDENTIALS_FILE=os.path.join(data, "missing.json"),
+    )
+
+
+def start_server(workers: int, port: int, data: str, app: Optional[str] = None, env: Optional[dict] = None) -> subprocess.Popen:
+    """Run ``main.py``, or uvicorn on the ``app`` import string, with ``workers`` workers on ``port``"""
+    env = {**data_environment(data), "PORT": str(port), "WEB_CONCURRENCY": str(workers), **(env or {})}
+    command = [sys.executable, "main.py"]
+    if app:
+        command = [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--workers", str(workers)]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def run_load(client: httpx.AsyncClient, requests: int, concurrency: int):
+    call_ids = [str(uuid.uuid4()) for _ in range(requests)]
+    # Every tenth request retries an earlier call
+    plan = [(call_ids[i - 5] if i % 10 == 9 else call_ids[i], i) for i in range(requests)]
+    unique = len({call_id for call_id, _ in plan})
+    latencies, statuses = [], {}
+    position = 0
+
+    async def client_loop():
+        nonlocal position
+        while position < len(plan):
+            call_id, i = plan[position]
+            position += 1
+            started = time.perf_counter()
+            response = await client.post("/api/vapi/webhook", content=report(call_id, i),
+                                         headers={"Content-Type": "application/json"})
+            latencies.append(time.perf_counter() - started)
+            key = response.status_code if response.status_code != 200 else response.json()["message"]
+            statuses[key] = statuses.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return time.perf_counter() - started, sorted(latencies), statuses, unique
+
+
+async def measure(workers: int, args) -> float:
+    data = tempfile.mkdtemp(prefix=f"realflow-load-{workers}w-")
+    port = args.port + workers
+    server = start_server(workers, port, data)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_ready(client)
+            await run_load(client, min(200, args.requests), args.concurrency)  # warm-up
+            before = (await client.get("/api/conversations", params={"limit": 1})).json()["total"]
+            elapsed, latencies, statuses, unique = await run_load(client, args.requests, args.concurrency)
+            stored = (await client.get("/api/conversations", params={"limit": 1})).json()["total"] - before
+
+        pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        throughput = args.requests / elapsed
+        print(f"  {workers:>2} worker(s) {throughput:>9,.0f} req/s   p50 {pick(0.5):6.1f} ms   p99 {pick(0.99):6.1f} ms")
+        print(f"             {statuses}")
+        ok = stored == unique
+        print(f"             stored {stored} of {unique} unique calls {'✅' if ok else '❌'}")
+        return throughput
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        shutil.rmtree(data, ignore_errors=True)
+
+
+async def main(args):
+    print("=" * 60)
+    print(f" MULTI-WORKER LOAD TEST ({args.requests:,} reports, {args.concurrency} clients, {os.cpu_count()} CPUs)")
+    print("=" * 60)
+    baseline = None
+    for workers in args.workers:
+        throughput = await measure(workers, args)
+        baseline = baseline or throughput
+        print(f"             scaling {throughput / baseline:.2f}x vs {args.workers[0]} worker(s)\n")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Webhook throughput across uvicorn worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=18000)
+    asyncio.run(main(parser.parse_args()))
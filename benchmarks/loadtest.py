@@ -0,0 +1,529 @@
+"""Capacity test: replay Vapi webhook streams and flag regressions against a baseline.
+
+Builds a stream of webhook events, either synthetic (a pool of live
+calls, each sending status, speech, transcript, conversation and tool
+events and finally an end-of-call report) or replayed from a JSONL
+recording, and sends it to the app at a target rate on an open-loop
+schedule. Latency is measured from each event's scheduled send time, so
+time spent waiting for a free connection on an overloaded server counts
+against it.
+
+Targets:
+
+- ``inprocess``: the app runs in this process over the ASGI transport.
+- ``spawn``: ``benchmarks.stand_in_app`` runs under uvicorn with
+  ``--workers`` processes on a temporary data directory.
+- ``http://host:port``: a server that is already running.
+
+Google Sheets is replaced by ``FakeWorksheet`` and recording URLs point
+at a local ``RecordingServer``, both with adjustable latency (see
+``benchmarks.stand_ins``). Reports throughput, p50/p95/p99 per message
+type and event loop stalls. ``--save-baseline`` stores the results in
+``--baselines``; later runs of the same scenario and target are compared
+against them, and regressions make the exit status non-zero.
+
+    python -m benchmarks.loadtest [--scenario steady] [--target inprocess] [--rate 200] [--duration 20]
+    python -m benchmarks.loadtest --scenario spike --target spawn --workers 4 --save-baseline
+    python -m benchmarks.loadtest --record stream.jsonl       # save the synthetic stream
+    python -m benchmarks.loadtest --replay stream.jsonl --speed 2
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.load_workers import ROOT, data_environment, start_server, wait_ready
+from benchmarks.stand_ins import LoopMonitor, RecordingServer, allow_recordings, install_sheets
+
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines.json")
+WEBHOOK_PATH = "/api/vapi/webhook"
+
+# Share of events by type on a typical call: mostly speech and transcript noise
+DEFAULT_MIX = {
+    "speech-update": 35,
+    "transcript": 35,
+    "conversation-update": 12,
+    "status-update": 8,
+    "tool-calls": 3,
+    "end-of-call-report": 2,
+}
+SCENARIOS = {
+    "steady": {"rate": 200, "duration": 20, "mix": DEFAULT_MIX},
+    # Monday morning: the rate climbs to five times normal and back down
+    "spike": {"rate": 150, "duration": 30, "mix": DEFAULT_MIX, "profile": [1, 1, 3, 5, 5, 3, 1]},
+    "reports": {"rate": 40, "duration": 20, "mix": {"end-of-call-report": 1}},
+    "slow-sheets": {"rate": 200, "duration": 20, "mix": DEFAULT_MIX, "sheets_latency": 2.0, "sheets_error_rate": 0.2},
+}
+
+FIRST = ["Dana", "Luis", "Priya", "Tom", "Aisha", "Wei", "Maria", "Sam", "Grace", "Omar"]
+LAST = ["Whitfield", "Ortega", "Raman", "Becker", "Okafor", "Chen", "Silva", "Park", "Hughes", "Nasser"]
+ASSETS = ["industrial", "office", "retail", "multifamily"]
+LOCATIONS = ["Newark, NJ", "Austin, TX", "Midtown NYC", "Downtown Chicago", "Miami"]
+UTTERANCES = [
+    "I'm looking for about ten thousand square feet of warehouse space",
+    "Somewhere near the port if possible, with loading docks",
+    "Our budget is around two to three million",
+    "We'd need to move in within three months",
+    "Can you send me a few options by email?",
+    "Great, let me check what we have available in that area.",
+    "Do you need any rail access or outdoor storage?",
+    "I'll have a broker follow up with you this afternoon.",
+]
+
+
+class SyntheticCalls:
+    """Webhook payloads for a pool of ``calls`` concurrent calls.
+
+    Each event goes to a random live call. An end-of-call report retires
+    its call and a new one takes its place; ``retry_rate`` of reports are
+    sent again, the way Vapi retries a slow webhook.
+    """
+
+    def __init__(self, calls: int = 50, recordings: Optional[RecordingServer] = None, retry_rate: float = 0.05, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.recordings = recordings
+        self.retry_rate = retry_rate
+        self.live = [self._new_call(i) for i in range(calls)]
+        self.started = calls
+        self.reports: List[bytes] = []
+
+    def _new_call(self, i: int) -> Dict[str, Any]:
+        return {
+            "id": str(uuid.UUID(int=self.rng.getrandbits(128))),
+            "customer": {"number": f"+1512555{i % 10000:04d}"},
+            "turns": [],
+            "n": i,
+        }
+
+    def event(self, message_type: str) -> bytes:
+        if message_type == "end-of-call-report" and self.reports and self.rng.random() < self.retry_rate:
+            return self.rng.choice(self.reports[-50:])
+        slot = self.rng.randrange(len(self.live))
+        call = self.live[slot]
+        message = {
+            "type": message_type,
+            "timestamp": time.time() * 1000,
+            "call": {"id": call["id"], "type": "inboundPhoneCall", "customer": call["customer"]},
+        }
+        build = getattr(self, "_" + message_type.replace("-", "_"), None)
+        if build is not None:
+            build(call, message)
+        body = json.dumps({"message": message}).encode()
+        if message_type == "end-of-call-report":
+            self.reports.append(body)
+            self.live[slot] = self._new_call(self.started)
+            self.started += 1
+        return body
+
+    def _status_update(self, call, message):
+        message["status"] = "in-progress" if call["turns"] else "ringing"
+
+    def _speech_update(self, call, message):
+        message.update(status=self.rng.choice(["started", "stopped"]), role=self.rng.choice(["user", "assistant"]), turn=len(call["turns"]))
+
+    def _transcript(self, call, message):
+        role = "user" if len(call["turns"]) % 2 == 0 else "assistant"
+        text = self.rng.choice(UTTERANCES)
+        final = self.rng.random() < 0.3
+        message.update(role=role, transcriptType="final" if final else "partial", transcript=text)
+        if final:
+            call["turns"].append({"role": role, "message": text})
+
+    def _conversation_update(self, call, message):
+        message["messages"] = call["turns"][-20:]
+
+    def _tool_calls(self, call, message):
+        arguments = {"asset_type": self.rng.choice(ASSETS), "location": self.rng.choice(LOCATIONS), "square_feet": "10,000 sq ft"}
+        message["toolCallList"] = [{
+            "id": f"tool-{self.rng.getrandbits(32):08x}",
+            "type": "function",
+            "function": {"name": "search_inventory", "arguments": arguments},
+        }]
+
+    def _end_of_call_report(self, call, message):
+        n, rng = call["n"], self.rng
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        message["call"]["duration"] = rng.randint(45, 600)
+        message.update(
+            endedReason="customer-ended-call",
+            recordingUrl=self.recordings.url(call["id"]) if self.recordings else None,
+            artifact={"messages": call["turns"]},
+            analysis={
+                "summary": f"{first} is looking for {rng.choice(ASSETS)} space in {rng.choice(LOCATIONS)}.",
+                "structuredData": {
+                    "callerName": f"{first} {last}",
+                    "callerPhone": call["customer"]["number"],
+                    "callerEmail": f"{first}.{last}{n % 500}@example.com".lower(),
+                    "company": f"{last} Holdings",
+                    "inquiryType": rng.choice(["buying", "leasing", "selling"]),
+                    "assetType": rng.choice(ASSETS),
+                    "location": rng.choice(LOCATIONS),
+                    "dealSize": rng.choice(["$2-3M", "under $5M", "around $750k"]),
+                    "squareFootage": rng.choice(["10,000 sq ft", "5-8k SF", "2 acres"]),
+                    "urgency": rng.choice(["ASAP", "3 months", "this year"]),
+                },
+            },
+        )
+
+
+def synthetic_plan(rate: float, duration: float, mix: Dict[str, float], calls: SyntheticCalls,
+                   profile: Optional[List[float]] = None, seed: int = 11) -> List[Tuple[float, str, bytes]]:
+    """(send offset, message type, body) with Poisson arrivals at ``rate`` scaled by ``profile``"""
+    rng = random.Random(seed)
+    types, weights = list(mix), list(mix.values())
+    profile = profile or [1.0]
+    plan, t = [], 0.0
+    while True:
+        step = profile[min(len(profile) - 1, int(t / duration * len(profile)))]
+        t += rng.expovariate(rate * step)
+        if t >= duration:
+            return plan
+        message_type = rng.choices(types, weights)[0]
+        plan.append((t, message_type, calls.event(message_type)))
+
+
+def load_recording(path: str, rate: float, speed: float, recordings: RecordingServer) -> List[Tuple[float, str, bytes]]:
+    """Read a stream saved by ``--record``, or bare webhook bodies one per line.
+
+    Lines with a ``t`` offset keep their timing (divided by ``speed``);
+    bare bodies are paced evenly at ``rate``. Recording URLs are pointed
+    at the stand-in, so captured traffic never downloads real recordings.
+    """
+    plan = []
+    with open(path) as f:
+        for i, line in enumerate(f):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = entry.get("body", entry)
+            message = body.get("message") or {}
+            call_id = (message.get("call") or {}).get("id") or str(i)
+            for holder in (message, message.get("artifact") or {}):
+                for field in ("recordingUrl", "stereoRecordingUrl"):
+                    if holder.get(field):
+                        holder[field] = recordings.url(call_id)
+            t = entry["t"] / speed if "t" in entry else i / rate
+            plan.append((t, message.get("type") or "unknown", json.dumps(body).encode()))
+    plan.sort(key=lambda item: item[0])
+    return plan
+
+
+def save_recording(path: str, plan: List[Tuple[float, str, bytes]]):
+    with open(path, "w") as f:
+        for t, _, body in plan:
+            f.write(json.dumps({"t": round(t, 4), "body": json.loads(body)}) + "\n")
+
+
+async def drive(client: httpx.AsyncClient, plan, concurrency: int) -> Tuple[List[Tuple[str, Any, float]], float]:
+    """Send the plan on schedule; returns (type, status, latency) per event and elapsed time"""
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    results, tasks = [], []
+    headers = {"Content-Type": "application/json"}
+    start = loop.time() + 0.05
+
+    async def send(t: float, message_type: str, body: bytes):
+        async with slots:
+            try:
+                response = await client.post(WEBHOOK_PATH, content=body, headers=headers)
+                status = response.status_code
+            except httpx.TimeoutException:
+                status = "timeout"
+            except httpx.TransportError:
+                status = "error"
+        results.append((message_type, status, loop.time() - (start + t)))
+
+    for t, message_type, body in plan:
+        delay = start + t - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(t, message_type, body)))
+    await asyncio.gather(*tasks)
+    return results, loop.time() - start
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(q * len(samples)))] * 1000 if samples else 0.0
+
+
+def summarize(results, elapsed: float, loop_stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for message_type, status, latency in results:
+        row = by_type.setdefault(message_type, {"latencies": [], "statuses": {}})
+        row["latencies"].append(latency)
+        row["statuses"][str(status)] = row["statuses"].get(str(status), 0) + 1
+
+    def stats(latencies, statuses):
+        latencies.sort()
+        return {
+            "sent": len(latencies),
+            "statuses": statuses,
+            "p50": round(percentile(latencies, 0.5), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+        }
+
+    everything, statuses = [], {}
+    for row in by_type.values():
+        everything += row["latencies"]
+        for status, count in row["statuses"].items():
+            statuses[status] = statuses.get(status, 0) + count
+    overall = stats(everything, statuses)
+    failed = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        **overall,
+        "throughput": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(failed / len(results), 4) if results else 0.0,
+        "types": {t: stats(row["latencies"], row["statuses"]) for t, row in sorted(by_type.items())},
+        "loop": loop_stats,
+    }
+
+
+def print_report(summary: Dict[str, Any]):
+    print(f"  {'type':<22}{'sent':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  statuses")
+    for message_type, row in summary["types"].items():
+        print(f"  {message_type:<22}{row['sent']:>7}{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}  {row['statuses']}")
+    print(f"  {'all':<22}{summary['sent']:>7}{summary['p50']:>9.1f}{summary['p95']:>9.1f}{summary['p99']:>9.1f}")
+    print(f"\n  throughput {summary['throughput']:,.0f} req/s   errors {summary['error_rate']:.2%}")
+    loop = summary["loop"]
+    if loop:
+        print(f"  event loop stalls {loop['stalls']} ({loop['stalled_ms']:.0f} ms total, longest {loop['max_stall_ms']:.0f} ms)")
+
+
+# Metric -> (higher is worse, absolute slack below which a change is noise)
+CHECKS = {
+    "p50": (True, 1.0),
+    "p95": (True, 2.0),
+    "p99": (True, 5.0),
+    "throughput": (False, 1.0),
+    "error_rate": (True, 0.001),
+    "stalled_ms": (True, 50.0),
+}
+
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Print each metric against the baseline; False if any regressed past ``tolerance``"""
+    ok = True
+    current = dict(summary, stalled_ms=(summary.get("loop") or {}).get("stalled_ms"))
+    previous = dict(baseline, stalled_ms=(baseline.get("loop") or {}).get("stalled_ms"))
+    print(f"\n  vs baseline from {baseline.get('recorded', '?')} ({baseline.get('host', '?')}), tolerance {tolerance:.0%}")
+    for metric, (higher_is_worse, slack) in CHECKS.items():
+        now, then = current.get(metric), previous.get(metric)
+        if now is None or then is None:
+            continue
+        change = (now - then) if higher_is_worse else (then - now)
+        regressed = change > max(slack, abs(then) * tolerance)
+        ok = ok and not regressed
+        delta = f"{(now - then) / then:+.0%}" if then else "  n/a"
+        print(f"    {metric:<12}{then:>10.4g} -> {now:<10.4g}{delta:>7}  {'❌ regression' if regressed else '✅'}")
+    return ok
+
+
+async def run_inprocess(plan, warmup, args, recordings: RecordingServer, data: str):
+    """Serve the app on this event loop; stores and logs go to ``data``"""
+    os.environ.update(data_environment(data))
+    os.environ["INVENTORY_FILE"] = os.path.join(ROOT, "config", "listings.example.csv")
+    import main
+    from routes import webhook
+    import logging
+    logging.disable(logging.WARNING)
+
+    sheet = install_sheets(webhook.sheets_logger, args.sheets_latency, error_rate=args.sheets_error_rate)
+    allow_recordings(webhook.recording_archiver)
+    monitor = LoopMonitor()
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            await drive(client, warmup, args.concurrency)
+            monitor.start()
+            results, elapsed = await drive(client, plan, args.concurrency)
+            await monitor.stop()
+    return results, elapsed, monitor.stats(), sheet.stats()
+
+
+async def run_http(plan, warmup, args, base_url: str):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await wait_ready(client)
+        await drive(client, warmup, args.concurrency)
+        return await drive(client, plan, args.concurrency)
+
+
+def read_loop_stats(stats_dir: str) -> Optional[Dict[str, Any]]:
+    """Event loop stalls summed over every worker's stats file"""
+    totals = None
+    for path in glob.glob(os.path.join(stats_dir, "loop-*.json")):
+        with open(path) as f:
+            stats = json.load(f)
+        if totals is None:
+            totals = stats
+        else:
+            totals = {
+                "stalls": totals["stalls"] + stats["stalls"],
+                "stalled_ms": round(totals["stalled_ms"] + stats["stalled_ms"], 1),
+                "max_stall_ms": max(totals["max_stall_ms"], stats["max_stall_ms"]),
+                "samples": totals["samples"] + stats["samples"],
+            }
+    return totals
+
+
+def loop_delta(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not before or not after:
+        return after
+    return {
+        "stalls": after["stalls"] - before["stalls"],
+        "stalled_ms": round(after["stalled_ms"] - before["stalled_ms"], 1),
+        # The longest stall can't be split by time window; this one may include warm-up
+        "max_stall_ms": after["max_stall_ms"],
+        "samples": after["samples"] - before["samples"],
+    }
+
+
+async def run_spawned(plan, warmup, args, data: str):
+    stats_dir = os.path.join(data, "stand-in-stats")
+    os.makedirs(stats_dir)
+    env = {
+        "INVENTORY_FILE": os.path.join(ROOT, "config", "listings.example.csv"),
+        "STANDIN_SHEETS_LATENCY": str(args.sheets_latency),
+        "STANDIN_SHEETS_ERROR_RATE": str(args.sheets_error_rate),
+        "STANDIN_STATS_DIR": stats_dir,
+    }
+    server = start_server(args.workers, args.port, data, app="benchmarks.stand_in_app:app", env=env)
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=args.timeout) as client:
+            await wait_ready(client)
+            await drive(client, warmup, args.concurrency)
+            await asyncio.sleep(1.1)
+            before = read_loop_stats(stats_dir)
+            results, elapsed = await drive(client, plan, args.concurrency)
+            await asyncio.sleep(1.1)
+            after = read_loop_stats(stats_dir)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return results, elapsed, loop_delta(before, after)
+
+
+def baseline_key(args) -> str:
+    target = args.target if args.target in ("inprocess", "spawn") else "http"
+    if target == "spawn":
+        target += f"-{args.workers}w"
+    source = f"replay:{os.path.basename(args.replay)}" if args.replay else args.scenario
+    return f"{source}/{target}"
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, key: str, summary: Dict[str, Any]):
+    baselines = load_baselines(path)
+    baselines[key] = dict(
+        summary,
+        recorded=datetime.now().isoformat(timespec="seconds"),
+        host=f"{platform.node()} ({os.cpu_count()} CPUs, Python {platform.python_version()})",
+    )
+    with open(path + ".tmp", "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+async def main(args) -> int:
+    scenario = SCENARIOS[args.scenario]
+    args.rate = args.rate or scenario["rate"]
+    args.duration = args.duration or scenario["duration"]
+    if args.sheets_latency is None:
+        args.sheets_latency = scenario.get("sheets_latency", 0.2)
+    if args.sheets_error_rate is None:
+        args.sheets_error_rate = scenario.get("sheets_error_rate", 0.0)
+
+    recordings = RecordingServer(latency=args.recording_latency).start()
+    data = tempfile.mkdtemp(prefix="realflow-loadtest-")
+    try:
+        calls = SyntheticCalls(args.calls, recordings)
+        warmup = synthetic_plan(args.rate, args.warmup, scenario["mix"], SyntheticCalls(args.calls, recordings, seed=1), seed=1)
+        if args.replay:
+            plan = load_recording(args.replay, args.rate, args.speed, recordings)
+        else:
+            plan = synthetic_plan(args.rate, args.duration, scenario["mix"], calls, scenario.get("profile"))
+        if args.record:
+            save_recording(args.record, plan)
+            print(f"Saved {len(plan):,} events to {args.record}")
+
+        label = args.target if args.target != "spawn" else f"spawn, {args.workers} worker(s)"
+        print("=" * 60)
+        print(f" LOAD TEST: {args.replay or args.scenario} ({label})")
+        print(f" {len(plan):,} events over {plan[-1][0] if plan else 0:.0f}s, {args.concurrency} connections, "
+              f"Sheets {args.sheets_latency * 1000:.0f} ms, recordings {args.recording_latency * 1000:.0f} ms")
+        print("=" * 60)
+
+        sheet_stats = None
+        if args.target == "inprocess":
+            results, elapsed, loop_stats, sheet_stats = await run_inprocess(plan, warmup, args, recordings, data)
+        elif args.target == "spawn":
+            results, elapsed, loop_stats = await run_spawned(plan, warmup, args, data)
+        else:
+            results, elapsed = await run_http(plan, warmup, args, args.target)
+            loop_stats = None
+
+        summary = summarize(results, elapsed, loop_stats)
+        print_report(summary)
+        if sheet_stats:
+            print(f"  Sheets stand-in {sheet_stats['requests']} appends, {sheet_stats['rows']} rows; "
+                  f"recording downloads {recordings.requests}")
+
+        key = baseline_key(args)
+        baselines = load_baselines(args.baselines)
+        ok = True
+        if key in baselines:
+            ok = compare(summary, baselines[key], args.tolerance)
+        else:
+            print(f"\n  no baseline for {key} in {os.path.relpath(args.baselines)}")
+        if args.save_baseline:
+            save_baseline(args.baselines, key, summary)
+            print(f"  saved as the baseline for {key}")
+        print("=" * 60)
+        return 0 if ok else 1
+    finally:
+        recordings.stop()
+        shutil.rmtree(data, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay webhook streams against the app and flag regressions")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="steady")
+    parser.add_argument("--target", default="inprocess", help="inprocess, spawn, or the base URL of a running server")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers for --target spawn")
+    parser.add_argument("--port", type=int, default=18100)
+    parser.add_argument("--rate", type=float, help="events per second (default: the scenario's)")
+    parser.add_argument("--duration", type=float, help="seconds (default: the scenario's)")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of traffic sent before measuring")
+    parser.add_argument("--concurrency", type=int, default=64, help="open connections, like Vapi's concurrent calls")
+    parser.add_argument("--calls", type=int, default=50, help="live calls in the synthetic stream")
+    parser.add_argument("--timeout", type=float, default=20.0, help="client timeout; Vapi gives up on a webhook at about 20s")
+    parser.add_argument("--sheets-latency", type=float, help="seconds per Sheets append (stand-in)")
+    parser.add_argument("--sheets-error-rate", type=float, help="fraction of Sheets appends that fail (stand-in)")
+    parser.add_argument("--recording-latency", type=float, default=0.3, help="seconds per recording download (stand-in)")
+    parser.add_argument("--replay", help="JSONL stream to replay instead of the synthetic one")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay faster (>1) or slower than recorded")
+    parser.add_argument("--record", help="save the stream that is sent to this JSONL file")
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change allowed before a regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,41 @@
+"""The app with Google Sheets replaced by a local stand-in, for out-of-process load tests.
+
+Recordings may be downloaded from the loopback ``RecordingServer``.
+
+Takes the same environment as ``main.py`` plus:
+
+- ``STANDIN_SHEETS_LATENCY`` / ``STANDIN_SHEETS_ERROR_RATE``: the fake
+  append round trip in seconds, and the fraction of appends that fail
+- ``STANDIN_STATS_DIR``: each worker writes its event loop stalls to
+  ``loop-<pid>.json`` here
+
+    uvicorn benchmarks.stand_in_app:app --workers 4
+"""
+import os
+from contextlib import asynccontextmanager
+
+import main
+from benchmarks.stand_ins import LoopMonitor, allow_recordings, install_sheets
+from routes import webhook
+
+sheet = install_sheets(
+    webhook.sheets_logger,
+    latency=float(os.getenv("STANDIN_SHEETS_LATENCY", 0.2)),
+    error_rate=float(os.getenv("STANDIN_SHEETS_ERROR_RATE", 0.0)),
+)
+allow_recordings(webhook.recording_archiver)
+stats_dir = os.getenv("STANDIN_STATS_DIR")
+monitor = LoopMonitor(path=os.path.join(stats_dir, f"loop-{os.getpid()}.json") if stats_dir else None)
+app_lifespan = main.app.router.lifespan_context
+
+
+@asynccontextmanager
+async def lifespan(app):
+    monitor.start()
+    async with app_lifespan(app):
+        yield
+    await monitor.stop()
+
+
+main.app.router.lifespan_context = lifespan
+app = main.app
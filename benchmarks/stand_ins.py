@@ -0,0 +1,196 @@
+"""Local stand-ins for Google Sheets and Vapi's recording storage.
+
+Load tests must not touch the real Google API or download real
+recordings, but the work they cause (the outbox worker's append
+requests, the archiver's downloads) should still take time. Each
+stand-in sleeps for a configurable latency with jitter and can fail a
+fraction of requests, so slow or flaky dependencies can be simulated.
+
+``LoopMonitor`` measures how long the event loop was blocked: a task
+that asks to sleep for ``interval`` and records how late it wakes up.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+def _delay(latency: float, jitter: float) -> float:
+    return max(0.0, random.gauss(latency, latency * jitter)) if latency else 0.0
+
+
+class APIError(Exception):
+    """Carries a response status the way gspread's ``APIError`` does"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code} from the Sheets stand-in")
+        self.response = type("Response", (), {"status_code": status_code, "headers": {"Retry-After": "1"}})()
+
+
+class FakeWorksheet:
+    """Accepts ``append_rows`` like a gspread worksheet, after a simulated round trip.
+
+    ``error_rate`` of requests fail: half as 429 quota errors, half as 503s.
+    """
+
+    def __init__(self, latency: float = 0.2, jitter: float = 0.25, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def append_rows(self, rows: List[List[Any]], **kwargs):
+        time.sleep(_delay(self.latency, self.jitter))
+        with self._lock:
+            self.requests += 1
+            if random.random() < self.error_rate:
+                self.errors += 1
+                raise APIError(random.choice([429, 503]))
+            self.rows += len(rows)
+
+    def row_values(self, row: int) -> List[str]:
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": self.requests, "rows": self.rows, "errors": self.errors}
+
+
+def install_sheets(sheets_logger, latency: float = 0.2, jitter: float = 0.25, error_rate: float = 0.0) -> FakeWorksheet:
+    """Point a ``GoogleSheetsLogger`` at a ``FakeWorksheet``, which also marks it configured"""
+    sheet = FakeWorksheet(latency, jitter, error_rate)
+    sheets_logger.sheet = sheet
+    return sheet
+
+
+class _Recordings(BaseHTTPRequestHandler):
+    server: "RecordingServer"
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(_delay(server.latency, server.jitter))
+        server.requests += 1
+        if random.random() < server.error_rate:
+            self.send_error(503)
+            return
+        body = b"RIFF" + os.urandom(64) + b"\0" * server.size
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The archiver was stopped mid-download
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def allow_recordings(archiver):
+    """Let a ``RecordingArchiver`` fetch from ``RecordingServer``, which is plain http on loopback"""
+    archiver.allowed_hosts.add("127.0.0.1")
+    archiver.require_https = False
+    archiver.allow_private = True
+
+
+class RecordingServer(ThreadingHTTPServer):
+    """Serves fake WAV recordings on 127.0.0.1 in a background thread.
+
+    Every path returns ``size`` bytes after the simulated latency; point
+    an end-of-call report's ``recordingUrl`` at ``url(call_id)``.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.3, jitter: float = 0.25, error_rate: float = 0.0, size: int = 256 * 1024, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Recordings)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.size = size
+        self.requests = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def url(self, call_id: str) -> str:
+        return f"{self.base_url}/recordings/{call_id}.wav"
+
+    def start(self) -> "RecordingServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class LoopMonitor:
+    """Records event loop stalls: how late a ``interval``-second sleep wakes up.
+
+    Lag under ``threshold`` is scheduling noise; anything above counts as
+    a stall. With ``path`` set, stats are written there every second so
+    a load test can read them from a server process.
+    """
+
+    def __init__(self, interval: float = 0.01, threshold: float = 0.005, path: Optional[str] = None):
+        self.interval = interval
+        self.threshold = threshold
+        self.path = path
+        self.stalls = 0
+        self.stalled_seconds = 0.0
+        self.max_stall = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._write()
+
+    async def _run(self):
+        written = time.monotonic()
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - started - self.interval
+            self.samples += 1
+            if lag > self.threshold:
+                self.stalls += 1
+                self.stalled_seconds += lag
+                self.max_stall = max(self.max_stall, lag)
+            if self.path and time.monotonic() - written >= 1.0:
+                written = time.monotonic()
+                self._write()
+
+    def _write(self):
+        if self.path:
+            with open(self.path + ".tmp", "w") as f:
+                json.dump(self.stats(), f)
+            os.replace(self.path + ".tmp", self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stalls": self.stalls,
+            "stalled_ms": round(self.stalled_seconds * 1000, 1),
+            "max_stall_ms": round(self.max_stall * 1000, 1),
+            "samples": self.samples,
+        }
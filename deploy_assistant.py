@@ -1,39 +1,56 @@
+import argparse
 import asyncio
 import os
 import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv, set_key
 from services.vapi_service import VapiService
+from utils.config_template import TemplateError, load_template
 
 load_dotenv()
 
-async def deploy_assistant():
+TEMPLATE_FILE = "config/vapi_assistant.json"
+STATE_FILE = "data/deploy_state.json"
+
+DEFAULT_VOICE_ID = "a0e99841-438c-4a64-b679-ae501e7d6091"
+DEFAULT_MODEL = "gpt-4"
+
+def default_webhook_url() -> str:
+    """Use ngrok URL if available, otherwise base URL"""
+    ngrok_url = os.getenv("NGROK_URL", "").strip()
+    return ngrok_url if ngrok_url else os.getenv("BASE_URL", "http://localhost:8000")
+
+def template_variables(
+    brokerage_name: str,
+    webhook_url: str,
+    webhook_secret: Optional[str],
+    voice_id: Optional[str] = None,
+    model: Optional[str] = None
+) -> Dict[str, Any]:
+    """Values for the placeholders in config/vapi_assistant.json"""
+    return {
+        "BROKERAGE_NAME": brokerage_name,
+        "WEBHOOK_URL": webhook_url,
+        "WEBHOOK_SECRET": webhook_secret,
+        "VOICE_ID": voice_id or os.getenv("VAPI_VOICE_ID", DEFAULT_VOICE_ID),
+        "MODEL": model or os.getenv("VAPI_MODEL", DEFAULT_MODEL)
+    }
+
+async def deploy_assistant(debug_config: bool = False):
     """Deploy or update Vapi assistant"""
-    vapi = VapiService()
-    
-    # Load configuration
-    with open("config/vapi_assistant.json", 'r') as f:
-        config = json.load(f)
-    
-    # Replace placeholders
+    async with VapiService() as vapi:
+        return await _deploy(vapi, debug_config)
+
+async def _deploy(vapi: VapiService, debug_config: bool = False):
+    # Load configuration and fill in placeholders
     brokerage_name = os.getenv("BROKERAGE_NAME").strip()
-    base_url = os.getenv("BASE_URL", "http://localhost:8000")
-    ngrok_url = os.getenv("NGROK_URL", "").strip()
-    webhook_secret = os.getenv("WEBHOOK_SECRET")
-    
-    # Use ngrok URL if available, otherwise base URL
-    webhook_url = ngrok_url if ngrok_url else base_url
-    
-    # Replace brokerage name in the config
-    config_str = json.dumps(config)
-    config_str = config_str.replace("[BROKERAGE_NAME]", brokerage_name)
-    config = json.loads(config_str)
-    
-    # Set webhook configuration
-    config["serverUrl"] = f"{webhook_url}/api/vapi/webhook"
-    config["serverUrlSecret"] = webhook_secret
-    
-    # Update first message
-    config["firstMessage"] = f"Hello! This is Realflow for {brokerage_name}. How can I help you today?"
+    config = load_template(TEMPLATE_FILE).render(template_variables(
+        brokerage_name,
+        default_webhook_url(),
+        os.getenv("WEBHOOK_SECRET")
+    ))
     
     print("=" * 60)
     print(" DEPLOYING VAPI ASSISTANT")
@@ -45,9 +62,10 @@ async def deploy_assistant():
     print(f"   Model: {config['model']['model']}")
     
     # Save config for debugging
-    with open("debug_config.json", 'w') as f:
-        json.dump(config, f, indent=2)
-    print(f"\n Full config saved to: debug_config.json")
+    if debug_config:
+        with open("debug_config.json", 'w') as f:
+            json.dump(config, f, indent=2)
+        print(f"\n Full config saved to: debug_config.json")
     
     try:
         # Check if assistant already exists
@@ -90,11 +108,118 @@ async def deploy_assistant():
                 print(f"\n Response Text: {e.response.text if hasattr(e.response, 'text') else 'N/A'}")
 
         print(f"\nDebug steps:")
-        print(f"   1. Check debug_config.json for the full configuration")
+        print(f"   1. Re-run with --debug-config and check debug_config.json")
         print(f"   2. Verify your API key is correct")
         print(f"   3. Check Vapi docs: https://docs.vapi.ai/api-reference/assistants/create-assistant")
         
         raise
 
+def load_state(path: str = STATE_FILE) -> Dict[str, Any]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_state(state: Dict[str, Any], path: str = STATE_FILE):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+async def deploy_tenants(
+    manifest_path: str,
+    state_path: str = STATE_FILE,
+    force: bool = False,
+    dry_run: bool = False
+) -> Dict[str, List[str]]:
+    """Deploy one assistant per tenant in the manifest.
+    
+    Each tenant is fingerprinted from the compiled template and its
+    placeholder values; assistants whose fingerprint matches the last
+    deployed version are skipped without rendering or any API call.
+    State is saved after every successful deploy, so an interrupted run
+    never creates the same assistant twice when it is re-run.
+    """
+    with open(manifest_path, 'r') as f:
+        tenants = json.load(f)
+    
+    template = load_template(TEMPLATE_FILE)
+    state = load_state(state_path)
+    webhook_url = default_webhook_url()
+    webhook_secret = os.getenv("WEBHOOK_SECRET")
+    summary = {"created": [], "updated": [], "unchanged": [], "failed": []}
+    
+    print("=" * 60)
+    print(f" BULK DEPLOYING {len(tenants)} VAPI ASSISTANTS")
+    print("=" * 60)
+    
+    async def deploy_one(vapi: VapiService, tenant: Dict[str, Any]):
+        tenant_id = tenant["id"]
+        previous = state.get(tenant_id, {})
+        variables = template_variables(
+            tenant["brokerage_name"],
+            tenant.get("webhook_url", webhook_url),
+            tenant.get("webhook_secret", webhook_secret),
+            tenant.get("voice_id"),
+            tenant.get("model")
+        )
+        try:
+            template.validate(variables)
+        except TemplateError as e:
+            print(f" {tenant_id}: {str(e)}")
+            summary["failed"].append(tenant_id)
+            return
+        digest = template.fingerprint(variables)
+        assistant_id = tenant.get("assistant_id") or previous.get("assistant_id")
+        
+        if assistant_id and previous.get("config_hash") == digest and not force:
+            summary["unchanged"].append(tenant_id)
+            return
+        if dry_run:
+            summary["updated" if assistant_id else "created"].append(tenant_id)
+            return
+        
+        try:
+            config = template.render(variables)
+            if assistant_id:
+                await vapi.update_assistant(assistant_id, config)
+                summary["updated"].append(tenant_id)
+            else:
+                result = await vapi.create_assistant(config)
+                assistant_id = result.get('id')
+                summary["created"].append(tenant_id)
+        except Exception as e:
+            print(f" {tenant_id}: {str(e)}")
+            summary["failed"].append(tenant_id)
+            return
+        
+        state[tenant_id] = {
+            "assistant_id": assistant_id,
+            "config_hash": digest,
+            "deployed_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        save_state(state, state_path)
+    
+    async with VapiService() as vapi:
+        await vapi.bulk(deploy_one(vapi, tenant) for tenant in tenants)
+    
+    for outcome, tenant_ids in summary.items():
+        print(f"   {outcome.capitalize()}: {len(tenant_ids)}")
+    print("=" * 60)
+    return summary
+
 if __name__ == "__main__":
-    asyncio.run(deploy_assistant())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Deploy Realflow Vapi assistants")
+    parser.add_argument("--manifest", help="JSON list of tenants for bulk deploy")
+    parser.add_argument("--state", default=STATE_FILE, help="Where deployed config hashes are kept")
+    parser.add_argument("--force", action="store_true", help="Redeploy even if the config is unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without calling Vapi")
+    parser.add_argument("--debug-config", action="store_true", help="Write the rendered config to debug_config.json")
+    args = parser.parse_args()
+    
+    if args.manifest:
+        asyncio.run(deploy_tenants(args.manifest, args.state, args.force, args.dry_run))
+    else:
+        asyncio.run(deploy_assistant(args.debug_config))
\ No newline at end of file
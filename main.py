@@ -1,6 +1,11 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from routes import webhook
+from utils.logger import shutdown_logger
+from utils.metrics import REGISTRY
 from dotenv import load_dotenv
 import os
 from pathlib import Path
@@ -12,10 +17,41 @@ load_dotenv()
 Path("logs").mkdir(exist_ok=True)
 Path("data").mkdir(exist_ok=True)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Deliver queued Google Sheets rows in the background; with several workers only one delivers
+    webhook.sheets_outbox.start()
+    # Connect to Google Sheets off the startup path; the port binds without waiting on Google.
+    # Standby workers never write to Sheets, and connect lazily if they take over.
+    sheets_connect = None
+    if webhook.sheets_outbox.is_leader:
+        sheets_connect = asyncio.create_task(asyncio.to_thread(webhook.sheets_logger.connect))
+    # Replay calls stored since the last analytics snapshot
+    analytics_catch_up = asyncio.create_task(asyncio.to_thread(webhook.analytics.sync))
+    # Build the in-call listings index before the first tool call needs it
+    inventory_load = asyncio.create_task(asyncio.to_thread(webhook.inventory.reload))
+    # Index calls stored while the search index was offline (or all of them, on first run)
+    search_catch_up = asyncio.create_task(asyncio.to_thread(webhook.search_index.sync))
+    # Download recordings into the blob store, resuming any a previous run left pending
+    webhook.recording_archiver.start()
+    yield
+    if sheets_connect is not None:
+        sheets_connect.cancel()
+    analytics_catch_up.cancel()
+    inventory_load.cancel()
+    search_catch_up.cancel()
+    await webhook.sheets_outbox.stop()
+    await webhook.recording_archiver.stop()
+    webhook.blob_store.close()
+    webhook.analytics.save()
+    webhook.conversation_store.flush()
+    shutdown_logger()
+
 app = FastAPI(
     title="Realflow Voice Agent API",
     description="Inbound Commercial Real Estate AI Agent with Vapi",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -40,8 +76,37 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    checks = await asyncio.to_thread(webhook.readiness)
+    return JSONResponse(checks, status_code=503 if checks["status"] == "unhealthy" else 200)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics"""
+    return PlainTextResponse(await asyncio.to_thread(REGISTRY.render), media_type="text/plain; version=0.0.4")
+
+def server_options() -> dict:
+    """uvicorn settings from the environment.
+
+    ``WEB_CONCURRENCY`` worker processes share the conversation store,
+    Sheets outbox, dedup log, caller index and blob store through file locks,
+    and the search index through SQLite.
+    ``LIMIT_CONCURRENCY`` caps open connections per worker (uvicorn
+    answers 503 past it). Auto-reload is only for ``ENVIRONMENT=development``
+    and always runs a single process.
+    """
+    reload = os.getenv("ENVIRONMENT", "production").lower() == "development"
+    limit = int(os.getenv("LIMIT_CONCURRENCY", 0))
+    return {
+        "host": os.getenv("HOST", "0.0.0.0"),
+        "port": int(os.getenv("PORT", 8000)),
+        "workers": 1 if reload else max(1, int(os.getenv("WEB_CONCURRENCY", 1))),
+        "reload": reload,
+        "limit_concurrency": limit or None,
+        "backlog": int(os.getenv("BACKLOG", 2048)),
+        "timeout_keep_alive": int(os.getenv("TIMEOUT_KEEP_ALIVE", 5)),
+        "proxy_headers": True,
+    }
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("main:app", **server_options())
\ No newline at end of file
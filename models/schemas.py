@@ -1,36 +1,108 @@
-from pydantic import BaseModel, EmailStr
+import logging
+from functools import lru_cache
+
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+from pydantic.networks import validate_email
+from pydantic_core import PydanticCustomError
 from typing import Optional, Dict, Any
 from datetime import datetime
 
-class CallerInfo(BaseModel):
-    name: Optional[str] = None
-    phone: Optional[str] = None
-    email: Optional[EmailStr] = None
-    role: Optional[str] = None
+logger = logging.getLogger(__name__)
+
+EMAIL_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=EMAIL_CACHE_SIZE)
+def valid_email(value: str) -> Optional[str]:
+    """The address as ``EmailStr`` would store it, or None if it isn't one.
+
+    Cached because domain checks dominate validation cost and repeat
+    callers send the same address.
+    """
+    try:
+        return validate_email(value)[1]
+    except PydanticCustomError:
+        return None
+
+
+def alias(name: str, camel: str):
+    """Accept the field name or the camelCase key Vapi's structuredData uses"""
+    return Field(None, validation_alias=AliasChoices(camel, name))
+
+
+class LenientModel(BaseModel):
+    """Drops fields that fail validation instead of rejecting the whole model.
+
+    A caller's malformed answer shouldn't lose the call; required fields
+    still fail on the retry.
+    """
+    # Vapi sends numeric answers (phone, deal size) as JSON numbers
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def _drop_invalid(cls, data: Any, handler):
+        try:
+            return handler(data)
+        except ValidationError as e:
+            if not isinstance(data, dict):
+                raise
+            invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+            logger.warning(f"{cls.__name__}: dropped invalid {', '.join(map(str, sorted(invalid, key=str)))}")
+            return handler({key: value for key, value in data.items() if key not in invalid})
+
+
+class CallerInfo(LenientModel):
+    name: Optional[str] = alias("name", "callerName")
+    phone: Optional[str] = alias("phone", "callerPhone")
+    email: Optional[str] = alias("email", "callerEmail")
+    role: Optional[str] = alias("role", "callerRole")
     company: Optional[str] = None
 
-class PropertyDetails(BaseModel):
-    asset_type: Optional[str] = None
+    @field_validator("email", mode="before")
+    @classmethod
+    def _email(cls, value: Any) -> Optional[str]:
+        if isinstance(value, str) and value.strip():
+            return valid_email(value.strip())
+        return None
+
+class PropertyDetails(LenientModel):
+    asset_type: Optional[str] = alias("asset_type", "assetType")
     location: Optional[str] = None
-    deal_size: Optional[str] = None
-    square_footage: Optional[str] = None
+    deal_size: Optional[str] = alias("deal_size", "dealSize")
+    square_footage: Optional[str] = alias("square_footage", "squareFootage")
     urgency: Optional[str] = None
-    additional_details: Optional[str] = None
+    additional_details: Optional[str] = alias("additional_details", "additionalDetails")
 
-class ConversationData(BaseModel):
+class NormalizedProperty(BaseModel):
+    """Numeric ranges and canonical location parsed from PropertyDetails"""
+    deal_size_min: Optional[float] = None
+    deal_size_max: Optional[float] = None
+    square_feet_min: Optional[float] = None
+    square_feet_max: Optional[float] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    neighborhood: Optional[str] = None
+    market: Optional[str] = None
+
+class ConversationData(LenientModel):
     call_id: str
     timestamp: datetime
     caller_info: CallerInfo
     property_details: PropertyDetails
+    normalized: Optional[NormalizedProperty] = None
+    caller_id: Optional[str] = None
+    prior_calls: int = 0
     inquiry_type: Optional[str] = None
     conversation_summary: Optional[str] = None
     duration: Optional[int] = None
     recording_url: Optional[str] = None
+    ended_reason: Optional[str] = None
 
 class VapiWebhook(BaseModel):
     message: Dict[str, Any]
-    
+
 class WebhookResponse(BaseModel):
     status: str
     message: str
-    call_id: Optional[str] = None
\ No newline at end of file
+    call_id: Optional[str] = None
@@ -0,0 +1,62 @@
+import argparse
+import time
+from dotenv import load_dotenv
+
+from services.caller_index import CallerIndex
+from services.conversation_index import record_timestamp
+from services.blob_store import BlobStore
+from services.conversation_store import get_conversation_store
+from services.search_index import SearchIndex
+from services.sqlite_store import SqliteConversationStore
+
+load_dotenv()
+
+def main(batch_size: int):
+    print("=" * 60)
+    print("👥 RE-INDEXING CALLERS")
+    print("=" * 60)
+    
+    store = get_conversation_store()
+    index = CallerIndex()
+    index.reset()
+    started = time.perf_counter()
+    
+    def assign(records):
+        resolved = index.resolve_many(
+            (r.get("caller_info") or {}, record_timestamp(r), r.get("call_id")) for r in records
+        )
+        changed = []
+        for record, (caller_id, prior_calls) in zip(records, resolved):
+            changed.append(record.get("caller_id") != caller_id or record.get("prior_calls", 0) != prior_calls)
+            record["caller_id"] = caller_id
+            record["prior_calls"] = prior_calls
+        return changed
+    
+    if isinstance(store, SqliteConversationStore):
+        updated = store.rewrite(assign, batch_size=batch_size)
+        print(f"\n✅ Updated caller_id on {updated} stored call(s)")
+        if updated:
+            # The search index filters on caller_id; re-index so it sees the new values
+            reindexed = SearchIndex(store, BlobStore()).reindex()
+            print(f"🔎 Re-indexed {reindexed} call(s) for search")
+    else:
+        # JSONL segments are append-only: rebuild the index, leave the records as they are
+        batch = []
+        for record in store.iter_records():
+            batch.append(record)
+            if len(batch) == batch_size:
+                assign(batch)
+                batch = []
+        assign(batch)
+        print("\n✅ Rebuilt the caller index (JSONL records are not rewritten)")
+    
+    stats = index.stats()
+    print(f"   {stats['callers']} caller(s), {stats['phones']} phone(s), {stats['emails']} email(s)")
+    print(f"   {time.perf_counter() - started:.2f}s")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the caller identity index from stored calls")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Records processed per batch")
+    args = parser.parse_args()
+    main(args.batch_size)
@@ -1,15 +1,131 @@
-from fastapi import APIRouter, HTTPException, Request, Header
-from models.schemas import VapiWebhook, WebhookResponse, ConversationData, CallerInfo, PropertyDetails
-from utils.logger import setup_logger, log_conversation
+from fastapi import APIRouter, HTTPException, Request, Header, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from models.schemas import VapiWebhook, WebhookResponse, ConversationData, NormalizedProperty
+from utils.logger import setup_logger, call_id_var, logging_stats
+from utils import fastjson
+from utils.normalize import normalize_property
+from utils.metrics import REGISTRY, STAGE_LATENCY, WEBHOOK_ERRORS, WEBHOOK_LATENCY, WEBHOOK_REQUESTS, timed
+from utils.admission import CRITICAL, NORMAL, LOW, AdmissionController, Overloaded, Shed
 from services.gspread_service import GoogleSheetsLogger
+from services.conversation_store import get_conversation_store
+from services.conversation_export import iter_export
+from services.analytics import LeadAnalytics
+from services.sheets_outbox import SheetsOutbox
+from services.sheets_batcher import BatchingSheetsSink
+from services.call_dedup import DUPLICATE, IN_PROGRESS, CallDeduplicator
+from services.caller_index import CallerIndex
+from services.inventory import InventoryIndex
+from services.call_sessions import CallSessionTable
+from services.blob_store import BlobStore
+from services.archiver import RecordingArchiver
+from services.search_index import SearchIndex
 from datetime import datetime
+from typing import Optional
 import os
 import hmac
 import hashlib
+import asyncio
+import re
+import time
 
 router = APIRouter()
 logger = setup_logger()
 sheets_logger = GoogleSheetsLogger()
+conversation_store = get_conversation_store()
+sheets_outbox = SheetsOutbox(BatchingSheetsSink(sheets_logger))
+call_dedup = CallDeduplicator()
+caller_index = CallerIndex()
+analytics = LeadAnalytics(conversation_store)
+inventory = InventoryIndex()
+call_sessions = CallSessionTable()
+blob_store = BlobStore()
+recording_archiver = RecordingArchiver(blob_store)
+search_index = SearchIndex(conversation_store, blob_store)
+
+# Message type -> (priority, in-flight limit, seconds a critical event may queue for a slot).
+# Reports and tool calls are bounded only by their own limit: they queue and are answered
+# 429 only if the wait runs out. Live events are shed with a 202 once over their limit or
+# once the worker's ADMISSION_CAPACITY is filling up (critical work counts towards it),
+# since the end-of-call report carries the full conversation anyway.
+ADMISSION_LANES = {
+    "end-of-call-report": (CRITICAL, 32, 5.0),
+    "tool-calls": (CRITICAL, 64, 2.0),
+    "function-call": (CRITICAL, 64, 2.0),
+    "status-update": (NORMAL, 64, 0.0),
+    "conversation-update": (LOW, 32, 0.0),
+    "transcript": (LOW, 64, 0.0),
+}
+admission = AdmissionController(ADMISSION_LANES)
+ADMISSION_WAIT = REGISTRY.histogram(
+    "realflow_admission_wait_seconds", "Time webhook events queued for an in-flight slot, by message type", ["type"]
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "realflow_admission_rejected_total", "Webhook events turned away under load, by message type and status", ["type", "status"]
+)
+
+REGISTRY.gauge("realflow_sheets_outbox_depth", "Records waiting for Google Sheets delivery", sheets_outbox.depth)
+REGISTRY.gauge("realflow_sheets_outbox_lag_seconds", "Age of the oldest undelivered Sheets record", sheets_outbox.lag_seconds)
+REGISTRY.counter_func("realflow_sheets_delivered_total", "Records delivered to Google Sheets", lambda: sheets_outbox.delivered)
+REGISTRY.counter_func("realflow_sheets_failed_attempts_total", "Failed Google Sheets delivery attempts", lambda: sheets_outbox.failed_attempts)
+REGISTRY.gauge("realflow_conversations_stored", "Records in the conversation store", conversation_store.count)
+REGISTRY.counter_func("realflow_webhook_duplicates_total", "Webhook retries short-circuited by call_id dedup", lambda: call_dedup.duplicates)
+REGISTRY.counter_func("realflow_webhook_in_progress_total", "Webhook retries answered 409 while another attempt held the call", lambda: call_dedup.conflicts)
+REGISTRY.gauge("realflow_inventory_listings", "Listings loaded for in-call inventory search", lambda: inventory.stats()["listings"])
+REGISTRY.gauge("realflow_call_sessions", "Calls with in-memory live state on this worker", lambda: len(call_sessions))
+REGISTRY.counter_func("realflow_call_sessions_evicted_total", "Call sessions evicted by TTL or the session cap", lambda: call_sessions.evicted)
+REGISTRY.gauge("realflow_live_subscribers", "Open live call event streams", call_sessions.subscriber_count)
+REGISTRY.gauge("realflow_archive_queue_depth", "Recordings waiting to be downloaded into the blob store", recording_archiver.depth)
+REGISTRY.counter_func("realflow_archive_downloads_total", "Recordings archived into the blob store", lambda: recording_archiver.archived)
+REGISTRY.counter_func("realflow_archive_failures_total", "Recordings that could not be archived", lambda: recording_archiver.failed)
+REGISTRY.gauge("realflow_blob_store_bytes", "Compressed bytes held in blob store packs", lambda: blob_store.stored_bytes)
+REGISTRY.gauge("realflow_search_indexed", "Calls indexed for full-text search", lambda: search_index.indexed)
+REGISTRY.gauge("realflow_admission_in_flight", "Webhook events being handled on this worker", lambda: admission.in_flight)
+REGISTRY.counter_func("realflow_log_records_dropped_total", "Log records dropped because the log queue was full", lambda: logging_stats()["queue_dropped"])
+
+MESSAGE_TYPE_PATTERN = re.compile(rb'"type"\s*:\s*"([^"]{1,64})"')
+WEBHOOK_RECEIVED = WebhookResponse(status="success", message="Webhook received")
+WEBHOOK_SHED = {"status": "accepted", "message": "Webhook received, not processed: server busy", "call_id": None}
+SSE_KEEPALIVE_SECONDS = 15
+# Archived artifact -> end-of-call report field holding its source URL (transcript has none)
+ARTIFACTS = {"transcript": None, "recording": "recordingUrl", "stereo-recording": "stereoRecordingUrl"}
+
+def readiness() -> dict:
+    """Check that the storage and Sheets sinks can actually take writes.
+
+    Touches the disk and the store's lock; call it from a worker thread.
+    """
+    storage_ok = os.access(conversation_store.directory, os.W_OK)
+    storage = {
+        "status": "ok" if storage_ok else "unwritable",
+        "records": conversation_store.count()
+    }
+    
+    if not sheets_logger.configured:
+        sheets = {"status": "not_configured"}
+    else:
+        outbox = sheets_outbox.stats()
+        max_lag = float(os.getenv("SHEETS_MAX_HEALTHY_LAG", 300))
+        healthy = (
+            outbox["running"]
+            and outbox["lag_seconds"] <= max_lag
+            and sheets_logger.breaker.state == "closed"
+        )
+        sheets = {
+            "status": "ok" if healthy else "degraded",
+            "connected": sheets_logger.sheet is not None,
+            "circuit": sheets_logger.breaker.state,
+            "backlog": outbox["depth"],
+            "lag_seconds": outbox["lag_seconds"],
+            "last_error": outbox["last_error"]
+        }
+    
+    if not storage_ok:
+        status = "unhealthy"
+    elif sheets["status"] == "degraded":
+        status = "degraded"
+    else:
+        status = "healthy"
+    return {"status": status, "storage": storage, "sheets": sheets}
 
 def verify_webhook_signature(payload: bytes, signature: str) -> bool:
     """Verify Vapi webhook signature"""
@@ -17,91 +133,205 @@ def verify_webhook_signature(payload: bytes, signature: str) -> bool:
     expected_signature = hmac.new(secret, payload, hashlib.sha256).hexdigest()
     return hmac.compare_digest(signature, expected_signature)
 
+def sniff_message_type(body: bytes) -> Optional[str]:
+    """Read message.type from the raw body without decoding the whole payload.
+
+    None when there is no plain string to read, including one with JSON
+    escapes (``"end-of-call-rep\\u006frt"``), so the body gets a full parse.
+    """
+    match = MESSAGE_TYPE_PATTERN.search(body)
+    if match is None or b"\\" in match.group(1):
+        return None
+    return match.group(1).decode("ascii", "replace")
+
+def is_ignorable(body: bytes, message_type: Optional[str] = None) -> bool:
+    """True when the payload is an event type we have no handler for.
+
+    The sniffed type is only trusted when none of the handled type names
+    appear anywhere in the body, so a nested "type" key can never cause
+    a real report to be skipped.
+    """
+    if message_type is None:
+        message_type = sniff_message_type(body)
+    if message_type is None or message_type in MESSAGE_HANDLERS:
+        return False
+    return not any(marker in body for marker in HANDLED_TYPE_MARKERS)
+
 @router.post("/vapi/webhook", response_model=WebhookResponse)
 async def handle_vapi_webhook(
     request: Request,
     x_vapi_signature: str = Header(None)
 ):
     """Handle Vapi webhook events"""
+    started = time.perf_counter()
+    message_type = "unknown"
     try:
-        body = await request.body()
+        with timed(STAGE_LATENCY, stage="read_body"):
+            body = await request.body()
         
-        # Verify signature (optional but recommended)
-        # if x_vapi_signature and not verify_webhook_signature(body, x_vapi_signature):
-        #     raise HTTPException(status_code=401, detail="Invalid signature")
-        if x_vapi_signature and not verify_webhook_signature(body, x_vapi_signature):
+        # Verify signature over the raw bytes we already hold
+        with timed(STAGE_LATENCY, stage="verify_signature"):
+            valid = not x_vapi_signature or verify_webhook_signature(body, x_vapi_signature)
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid signature")
         
-        webhook_data = await request.json()
+        # High-frequency events we don't handle are acknowledged without parsing
+        sniffed_type = sniff_message_type(body)
+        if is_ignorable(body, sniffed_type):
+            message_type = sniffed_type
+            # Sampled by the logging pipeline, so noisy types can't flood the log
+            logger.info("Received webhook: %s", sniffed_type, extra={"webhook_type": sniffed_type})
+            return WEBHOOK_RECEIVED
+        
+        # Decode the body exactly once
+        with timed(STAGE_LATENCY, stage="parse"):
+            webhook_data = fastjson.loads(body)
         message = webhook_data.get("message", {})
+        # transcript[transcriptType="final"] and similar variants are handled, logged and counted as their base type
+        message_type = (message.get("type") or "unknown").split("[", 1)[0]
+        call_id_var.set(message.get("call", {}).get("id"))
         
-        logger.info(f"Received webhook: {message.get('type')}")
+        logger.info("Received webhook: %s", message_type, extra={"webhook_type": message_type})
         
-        # Handle different webhook types
-        if message.get("type") == "end-of-call-report":
-            return await handle_end_of_call(message)
+        handler = MESSAGE_HANDLERS.get(message_type)
+        if handler is None:
+            return WEBHOOK_RECEIVED
         
-        return WebhookResponse(
-            status="success",
-            message="Webhook received"
-        )
+        # Bounded in-flight work per type, so overload gets a fast answer instead of a pile-up
+        try:
+            async with admission.admit(message_type) as waited:
+                ADMISSION_WAIT.observe(waited, type=message_type)
+                return await handler(message)
+        except Shed:
+            # Only live views miss the event; the report's own messages replace the session's turns
+            ADMISSION_REJECTED.inc(type=message_type, status="202")
+            return JSONResponse(WEBHOOK_SHED, status_code=202)
+        except Overloaded as e:
+            ADMISSION_REJECTED.inc(type=message_type, status="429")
+            logger.warning(f"Webhook overloaded: {str(e)}")
+            return JSONResponse(
+                {"detail": str(e)}, status_code=429, headers={"Retry-After": str(int(e.retry_after))}
+            )
     
+    except HTTPException:
+        WEBHOOK_ERRORS.inc(type=metric_type(message_type))
+        raise
     except Exception as e:
+        WEBHOOK_ERRORS.inc(type=metric_type(message_type))
         logger.error(f"Webhook error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        label = metric_type(message_type)
+        WEBHOOK_REQUESTS.inc(type=label)
+        WEBHOOK_LATENCY.observe(time.perf_counter() - started, type=label)
 
 async def handle_end_of_call(message: dict) -> WebhookResponse:
     """Process end-of-call report"""
+    call_id = message.get("call", {}).get("id", "")
+    
+    # Vapi retries webhooks; a retry this worker already handled is turned away before any I/O,
+    # anything else is claimed under the cross-process lock in a worker thread
+    with timed(STAGE_LATENCY, stage="dedup"):
+        claim = DUPLICATE if call_dedup.seen(call_id) else await asyncio.to_thread(call_dedup.claim, call_id)
+    if claim == DUPLICATE:
+        logger.info(f"Duplicate end-of-call report for {call_id} ignored")
+        return WebhookResponse(
+            status="success",
+            message="Duplicate call ignored",
+            call_id=call_id
+        )
+    if claim == IN_PROGRESS:
+        # Another attempt is still working on it; if that one fails, this retry must not be lost
+        raise HTTPException(status_code=409, detail="Call is already being processed", headers={"Retry-After": "5"})
+    committed = False
+    
     try:
+        # Turns, timing and end reason come from the live events already ingested for this call;
+        # inside the try, so a malformed report still releases the claim
+        artifact = message.get("artifact")
+        messages = message.get("messages") or (artifact.get("messages") if isinstance(artifact, dict) else None)
+        session = call_sessions.finish(call_id, messages)
+        
         # Extract conversation data
-        call_id = message.get("call", {}).get("id", "")
-        transcript = message.get("transcript", "")
-        analysis = message.get("analysis", {})
-        
-        # Parse structured data from analysis
-        structured_data = analysis.get("structuredData", {})
-        
-        caller_info = CallerInfo(
-            name=structured_data.get("callerName"),
-            phone=structured_data.get("callerPhone"),
-            email=structured_data.get("callerEmail"),
-            role=structured_data.get("callerRole"),
-            company=structured_data.get("company")
-        )
+        analysis = message.get("analysis")
+        analysis = analysis if isinstance(analysis, dict) else {}
+        call = message.get("call", {})
         
-        property_details = PropertyDetails(
-            asset_type=structured_data.get("assetType"),
-            location=structured_data.get("location"),
-            deal_size=structured_data.get("dealSize"),
-            square_footage=structured_data.get("squareFootage"),
-            urgency=structured_data.get("urgency"),
-            additional_details=structured_data.get("additionalDetails")
-        )
+        # Parse structured data from analysis; anything but an object is treated as missing
+        structured_data = analysis.get("structuredData")
+        structured_data = structured_data if isinstance(structured_data, dict) else {}
+        phone = structured_data.get("callerPhone") or session.customer_number or call.get("customer", {}).get("number")
         
-        conversation_data = ConversationData(
-            call_id=call_id,
-            timestamp=datetime.now(),
-            caller_info=caller_info,
-            property_details=property_details,
-            inquiry_type=structured_data.get("inquiryType"),
-            conversation_summary=analysis.get("summary"),
-            duration=message.get("call", {}).get("duration"),
-            recording_url=message.get("recordingUrl")
-        )
+        # One validation pass: the nested models read structuredData by its camelCase keys,
+        # and fields that fail (a malformed email, say) are dropped rather than failing the call
+        with timed(STAGE_LATENCY, stage="validate"):
+            conversation_data = ConversationData.model_validate({
+                "call_id": call_id,
+                "timestamp": datetime.now(),
+                "caller_info": dict(structured_data, callerPhone=phone),
+                "property_details": structured_data,
+                "inquiry_type": structured_data.get("inquiryType"),
+                "conversation_summary": analysis.get("summary"),
+                "duration": call.get("duration") or session.duration,
+                "recording_url": message.get("recordingUrl") or (message.get("artifact") or {}).get("recordingUrl"),
+                "ended_reason": message.get("endedReason") or session.ended_reason
+            })
+            caller_info = conversation_data.caller_info
+            property_details = conversation_data.property_details
+            
+        # Numeric ranges and canonical location from the free-text fields
+        with timed(STAGE_LATENCY, stage="normalize"):
+            conversation_data.normalized = NormalizedProperty(**normalize_property(dict(property_details)))
+        
+        # Link repeat callers by phone, email or name within the same company; keyed on the
+        # call, so a retry after a failed write gets the same answer without counting twice
+        with timed(STAGE_LATENCY, stage="caller_index"):
+            caller_id, prior_calls = await asyncio.to_thread(caller_index.resolve, dict(caller_info), None, call_id)
+            conversation_data.caller_id, conversation_data.prior_calls = caller_id, prior_calls
         
-        # Convert to dict for logging
-        conversation_dict = conversation_data.model_dump()
+        # Serialized once, to the JSON types the stores and outbox write (ISO timestamp)
+        with timed(STAGE_LATENCY, stage="serialize"):
+            conversation_dict = conversation_data.model_dump(mode="json")
         
-        # Log to JSON file
-        log_conversation(conversation_dict)
+        # Queue for Google Sheets; the outbox worker delivers it off the request path. Queued before
+        # the call is committed, so if this fails the retry is processed again rather than dropped;
+        # keyed on the call, so a retry after a later failure doesn't add a second row
+        if sheets_logger.configured:
+            with timed(STAGE_LATENCY, stage="sheets_enqueue"):
+                await asyncio.to_thread(sheets_outbox.enqueue, conversation_dict, call_id)
         
-        # Log to Google Sheets
-        sheets_logger.log_call(conversation_dict)
-        # Log to JSON file
-        log_conversation(conversation_data.model_dump())
+        # Persist to the conversation store; the write runs off the event loop
+        with timed(STAGE_LATENCY, stage="store_write"):
+            await conversation_store.append_async(conversation_dict)
+        # Stored, so from here on a retry is a duplicate even if a later step fails
+        await asyncio.to_thread(call_dedup.commit, call_id)
+        committed = True
+        
+        # Fold the new call into the dashboard rollups; the call is already stored, so never fail on this
+        with timed(STAGE_LATENCY, stage="analytics"):
+            try:
+                await asyncio.to_thread(analytics.sync)
+            except Exception as e:
+                logger.warning(f"Analytics update failed: {str(e)}")
+        
+        # Transcript and recordings go to the blob store, not the record; reads get links to them
+        with timed(STAGE_LATENCY, stage="archive"):
+            try:
+                await asyncio.to_thread(archive_transcript, call_id, session.turns, message)
+                for artifact, url in artifact_urls(message).items():
+                    await recording_archiver.submit(f"{call_id}/{artifact}", url)
+            except Exception as e:
+                logger.warning(f"Archiving artifacts for {call_id} failed: {str(e)}")
+        
+        # Index the call for full-text search, transcript included
+        with timed(STAGE_LATENCY, stage="search_index"):
+            try:
+                await asyncio.to_thread(search_index.sync)
+            except Exception as e:
+                logger.warning(f"Search index update failed: {str(e)}")
         
         logger.info(f"Call {call_id} processed successfully")
-        logger.info(f"Caller: {caller_info.name} ({caller_info.email})")
+        logger.info(f"Caller: {caller_info.name} ({caller_info.email}), caller {caller_id} with {prior_calls} prior call(s)")
         logger.info(f"Property: {property_details.asset_type} in {property_details.location}")
         
         return WebhookResponse(
@@ -111,26 +341,384 @@ async def handle_end_of_call(message: dict) -> WebhookResponse:
         )
     
     except Exception as e:
+        if not committed:
+            await asyncio.to_thread(call_dedup.release, call_id)
         logger.error(f"Error processing call: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def artifact_urls(message: dict) -> dict:
+    """Artifact name -> download URL for the recordings in an end-of-call report"""
+    artifact = message.get("artifact") or {}
+    urls = {}
+    for name, field in ARTIFACTS.items():
+        url = field and (message.get(field) or artifact.get(field))
+        if not url:
+            continue
+        if recording_archiver.url_allowed(url):
+            urls[name] = url
+        else:
+            logger.warning(f"Not archiving {name}: {url} is not on ARCHIVE_ALLOWED_HOSTS")
+    return urls
+
+def archive_transcript(call_id: str, turns: list, message: dict) -> Optional[str]:
+    """Store the call's turns, transcript text and raw messages as one blob"""
+    artifact = message.get("artifact") or {}
+    document = {
+        "call_id": call_id,
+        "turns": turns,
+        "text": message.get("transcript") or artifact.get("transcript"),
+        "messages": message.get("messages") or artifact.get("messages") or []
+    }
+    if not (document["turns"] or document["text"] or document["messages"]):
+        return None
+    digest = blob_store.put(fastjson.dumps(document), "application/json")
+    blob_store.link(f"{call_id}/transcript", digest)
+    return digest
+
+def with_artifact_links(conversations: list) -> list:
+    """Copies of records with links to their archived artifacts in place of inline content"""
+    names = [f"{c.get('call_id')}/{artifact}" for c in conversations for artifact in ARTIFACTS]
+    refs = blob_store.refs(names)
+    linked = []
+    for conversation in conversations:
+        call_id = conversation.get("call_id")
+        record = {k: v for k, v in conversation.items() if k != "transcript"}
+        record["links"] = {
+            artifact: f"/api/conversations/{call_id}/{artifact}"
+            for artifact in ARTIFACTS
+            if f"{call_id}/{artifact}" in refs and "error" not in refs[f"{call_id}/{artifact}"]
+        }
+        linked.append(record)
+    return linked
+
+async def handle_status_update(message: dict) -> WebhookResponse:
+    """Track call status (ringing, in-progress, ended) for live views"""
+    call_sessions.status_update(message)
+    return WEBHOOK_RECEIVED
+
+async def handle_transcript(message: dict) -> WebhookResponse:
+    """Add a partial or final utterance to the call's live transcript"""
+    call_sessions.transcript(message)
+    return WEBHOOK_RECEIVED
+
+async def handle_conversation_update(message: dict) -> WebhookResponse:
+    """Pick up conversation turns not already seen as transcript events"""
+    call_sessions.conversation_update(message)
+    return WEBHOOK_RECEIVED
+
+# Tool name -> function answering it from the parsed arguments
+TOOLS = {
+    "search_inventory": inventory.search_tool,
+}
+
+def run_tool(name: Optional[str], arguments) -> str:
+    """Run one assistant tool call and return the text the assistant will speak from"""
+    tool = TOOLS.get(name)
+    if tool is None:
+        logger.warning(f"Unknown tool requested: {name}")
+        return f"Unknown tool: {name}"
+    if isinstance(arguments, (str, bytes)):
+        try:
+            arguments = fastjson.loads(arguments)
+        except ValueError:
+            arguments = {}
+    try:
+        with timed(STAGE_LATENCY, stage=f"tool_{name}"):
+            return tool(arguments or {})
+    except Exception as e:
+        logger.error(f"Tool {name} failed: {str(e)}")
+        return "That lookup isn't available right now. Offer to have a broker follow up."
+
+async def handle_tool_calls(message: dict) -> JSONResponse:
+    """Answer in-call tool calls; Vapi waits on this response mid-conversation"""
+    results = []
+    for tool_call in message.get("toolCallList") or message.get("toolCalls") or []:
+        function = tool_call.get("function") or {}
+        results.append({
+            "toolCallId": tool_call.get("id"),
+            "result": run_tool(function.get("name"), function.get("arguments"))
+        })
+    return JSONResponse({"results": results})
+
+async def handle_function_call(message: dict) -> JSONResponse:
+    """Answer the older single function-call message format"""
+    function_call = message.get("functionCall") or {}
+    return JSONResponse({"result": run_tool(function_call.get("name"), function_call.get("parameters"))})
+
+# Message type -> handler. Types not listed here are acknowledged and dropped.
+MESSAGE_HANDLERS = {
+    "end-of-call-report": handle_end_of_call,
+    "tool-calls": handle_tool_calls,
+    "function-call": handle_function_call,
+    "status-update": handle_status_update,
+    "transcript": handle_transcript,
+    "conversation-update": handle_conversation_update,
+}
+HANDLED_TYPE_MARKERS = tuple(f'"{t}"'.encode() for t in MESSAGE_HANDLERS)
+# Other Vapi event types, acknowledged without handling but still counted by name
+KNOWN_MESSAGE_TYPES = {
+    "speech-update", "model-output", "voice-input", "user-interrupted", "hang", "assistant-request",
+    "transfer-destination-request", "transfer-update", "phone-call-control", "language-change-detected",
+    "knowledge-base-request", "voice-request", "unknown",
+}
+
+def metric_type(message_type: Optional[str]) -> str:
+    """Metric label for a message type; the type comes from the request body, so unknown names share "other" """
+    if message_type in MESSAGE_HANDLERS or message_type in KNOWN_MESSAGE_TYPES:
+        return message_type
+    return "other"
+
 @router.get("/conversations")
-async def get_conversations():
-    """Retrieve all logged conversations"""
+async def get_conversations(
+    cursor: Optional[int] = Query(None, ge=0, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    inquiry_type: Optional[str] = None,
+    asset_type: Optional[str] = None,
+    urgency: Optional[str] = None,
+    location: Optional[str] = None,
+    market: Optional[str] = Query(None, description='Canonical market, e.g. "New York, NY"'),
+    caller_id: Optional[str] = None,
+    deal_size_min: Optional[float] = Query(None, ge=0, description="Dollars"),
+    deal_size_max: Optional[float] = Query(None, ge=0, description="Dollars"),
+    square_feet_min: Optional[float] = Query(None, ge=0),
+    square_feet_max: Optional[float] = Query(None, ge=0),
+    order: str = Query("asc", pattern="^(asc|desc)$")
+):
+    """Retrieve logged conversations, one page at a time"""
     try:
-        import json
-        with open("data/conversations.json", 'r') as f:
-            conversations = json.load(f)
-        return {"conversations": conversations, "count": len(conversations)}
-    except FileNotFoundError:
-        return {"conversations": [], "count": 0}
+        conversations, next_cursor = await asyncio.to_thread(
+            conversation_store.query,
+            cursor=cursor,
+            limit=limit,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            filters={
+                "inquiry_type": inquiry_type,
+                "asset_type": asset_type,
+                "urgency": urgency,
+                "location": location,
+                "market": market,
+                "caller_id": caller_id
+            },
+            ranges={
+                "deal_size": (deal_size_min, deal_size_max),
+                "square_feet": (square_feet_min, square_feet_max)
+            },
+            descending=order == "desc"
+        )
+        linked = await asyncio.to_thread(with_artifact_links, conversations)
+        return {
+            "conversations": linked,
+            "count": len(conversations),
+            "total": await asyncio.to_thread(conversation_store.count),
+            "next_cursor": next_cursor
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/search")
+async def search_conversations(
+    q: str = Query(..., min_length=1, description='Words, "exact phrases", prefix*, OR, -exclude, summary:/details:/transcript:'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    inquiry_type: Optional[str] = None,
+    asset_type: Optional[str] = None,
+    urgency: Optional[str] = None,
+    location: Optional[str] = None,
+    market: Optional[str] = None,
+    caller_id: Optional[str] = None
+):
+    """Full-text search over call summaries, property details and transcripts, best match first"""
+    try:
+        hits, next_offset = await asyncio.to_thread(
+            search_index.search,
+            q,
+            limit=limit,
+            offset=offset,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            filters={
+                "inquiry_type": inquiry_type,
+                "asset_type": asset_type,
+                "urgency": urgency,
+                "location": location,
+                "market": market,
+                "caller_id": caller_id
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    linked = await asyncio.to_thread(with_artifact_links, [hit["conversation"] or {} for hit in hits])
+    for hit, conversation in zip(hits, linked):
+        hit["conversation"] = conversation if hit["conversation"] else None
+    return {"query": q, "results": hits, "count": len(hits), "next_offset": next_offset}
+
+@router.get("/conversations/{call_id}/{artifact}")
+async def get_conversation_artifact(call_id: str, artifact: str):
+    """Stream an archived transcript or recording"""
+    if artifact not in ARTIFACTS:
+        raise HTTPException(status_code=404, detail="Unknown artifact")
+    # Both take the store's file lock; the content itself is streamed from a thread by Starlette
+    ref = await asyncio.to_thread(blob_store.ref, f"{call_id}/{artifact}")
+    if ref is None:
+        raise HTTPException(status_code=404, detail="Not archived")
+    entry = await asyncio.to_thread(blob_store.entry, ref["digest"]) if "digest" in ref else None
+    if entry is not None:
+        return StreamingResponse(
+            blob_store.iter_chunks(ref["digest"]),
+            media_type=entry.media_type,
+            headers={
+                "Content-Length": str(entry.size),
+                "ETag": f'"{ref["digest"]}"',
+                "Cache-Control": "private, max-age=31536000, immutable"
+            }
+        )
+    if "url" in ref and "error" not in ref:
+        raise HTTPException(status_code=404, detail="Not archived yet")
+    raise HTTPException(status_code=404, detail=f"Archiving failed: {ref.get('error', 'content missing')}")
+
+@router.get("/callers/{caller_id}")
+async def get_caller(caller_id: str):
+    """Get a repeat caller's identity and call count; use /conversations?caller_id= for their calls"""
+    profile = await asyncio.to_thread(caller_index.profile, caller_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown caller")
+    return profile
+
+@router.get("/calls/live")
+async def get_live_calls():
+    """Calls in progress on this worker, most recently active first"""
+    return {"calls": call_sessions.live(), **call_sessions.stats()}
+
+async def stream_call_events(call_id: Optional[str], initial: Optional[dict] = None):
+    """Server-sent events for one call, or for every call when call_id is None"""
+    queue = call_sessions.subscribe(call_id)
+    try:
+        if initial is not None:
+            yield b"event: snapshot\ndata: " + fastjson.dumps(initial) + b"\n\n"
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if item is None:
+                # Dropped for falling behind; the client reconnects and gets a fresh snapshot
+                return
+            event, data = item
+            yield f"event: {event}\ndata: ".encode() + fastjson.dumps(data) + b"\n\n"
+    finally:
+        call_sessions.unsubscribe(queue, call_id)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.get("/calls/live/events")
+async def stream_live_calls():
+    """Stream status changes and transcript turns for every live call (SSE)"""
+    return StreamingResponse(
+        stream_call_events(None, {"calls": call_sessions.live()}),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/calls/live/{call_id}")
+async def get_live_call(call_id: str):
+    """Current status and transcript of a call in progress"""
+    session = call_sessions.get(call_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="No live session for this call")
+    return session.snapshot()
+
+@router.get("/calls/live/{call_id}/events")
+async def stream_live_call(call_id: str):
+    """Stream one call's transcript as it happens (SSE); starts with the transcript so far"""
+    session = call_sessions.get(call_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="No live session for this call")
+    return StreamingResponse(
+        stream_call_events(call_id, session.snapshot()),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/analytics")
+async def get_analytics(
+    granularity: str = Query("hour", pattern="^(hour|day|week)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(24, ge=1, le=2000, description="Most recent buckets to return")
+):
+    """Call counts by inquiry type, asset type, urgency and location, bucketed by time"""
+    await asyncio.to_thread(analytics.sync)
+    return analytics.report(
+        granularity=granularity,
+        since=since.timestamp() if since else None,
+        until=until.timestamp() if until else None,
+        limit=limit
+    )
+
+@router.get("/conversations/export")
+async def export_conversations(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    cursor: int = Query(0, ge=0, description="Sequence number to resume from")
+):
+    """Stream the full call history as NDJSON or CSV"""
+    # Snapshot the end so the export is consistent and the client knows where to resume
+    end = await asyncio.to_thread(conversation_store.count)
+    headers = {
+        "X-Start-Cursor": str(cursor),
+        "X-Next-Cursor": str(max(cursor, end))
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_export(conversation_store, fmt=format, compress=gzip, start=cursor, stop=end),
+        media_type=media_type,
+        headers=headers
+    )
+
 @router.get("/sheets-url")
 async def get_sheets_url():
     """Get Google Sheets URL"""
     url = sheets_logger.get_spreadsheet_url()
     if url:
         return {"url": url, "status": "connected"}
+    if sheets_logger.configured:
+        return {"url": None, "status": "connecting", "circuit": sheets_logger.breaker.stats()}
     return {"url": None, "status": "not_configured"}
+
+@router.get("/logging-stats")
+async def get_logging_stats():
+    """Get counts of log records dropped by sampling or backpressure"""
+    return logging_stats()
+
+@router.get("/dedup-stats")
+async def get_dedup_stats():
+    """Get webhook retry deduplication counters"""
+    return call_dedup.stats()
+
+@router.get("/sheets-outbox")
+async def get_sheets_outbox():
+    """Get Google Sheets delivery queue status"""
+    return sheets_outbox.stats()
+
+@router.get("/archive-stats")
+async def get_archive_stats():
+    """Get recording download and blob store counters"""
+    return recording_archiver.stats()
+
+@router.get("/admission-stats")
+async def get_admission_stats():
+    """Get in-flight limits, queue waits and rejections per message type"""
+    return admission.stats()
+
+@router.get("/inventory-stats")
+async def get_inventory_stats():
+    """Get the loaded listings file and index size"""
+    return inventory.stats()
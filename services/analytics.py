@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from services.conversation_index import INDEXED_FIELDS, field_value, index_key, record_timestamp
+from services.conversation_store import ConversationStore
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("inquiry_type", "asset_type", "urgency", "location", "market")
+GRANULARITIES = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+# How many buckets of each granularity are kept in the snapshot
+RETENTION = {"hour": 24 * 90, "day": 366 * 3, "week": None}
+# 1970-01-01 was a Thursday; shift so weeks start on Monday
+WEEK_OFFSET = 3 * 86400
+
+
+def bucket_start(ts: float, granularity: str) -> int:
+    """Start of the UTC hour, day or Monday-based week containing ``ts``"""
+    size = GRANULARITIES[granularity]
+    if granularity == "week":
+        return int((ts + WEEK_OFFSET) // size * size - WEEK_OFFSET)
+    return int(ts // size * size)
+
+
+def _empty() -> Dict[str, Any]:
+    bucket: Dict[str, Any] = {"calls": 0, "duration_sum": 0, "duration_count": 0}
+    for dimension in DIMENSIONS:
+        bucket[dimension] = {}
+    return bucket
+
+
+def _add(bucket: Dict[str, Any], record: Dict[str, Any]):
+    bucket["calls"] += 1
+    duration = record.get("duration")
+    if isinstance(duration, (int, float)):
+        bucket["duration_sum"] += duration
+        bucket["duration_count"] += 1
+    for dimension in DIMENSIONS:
+        key = index_key(field_value(record, INDEXED_FIELDS[dimension])) or "unknown"
+        # Snapshots taken before a dimension existed lack its key
+        counts = bucket.setdefault(dimension, {})
+        counts[key] = counts.get(key, 0) + 1
+
+
+def _merge(into: Dict[str, Any], bucket: Dict[str, Any]):
+    for field in ("calls", "duration_sum", "duration_count"):
+        into[field] += bucket[field]
+    for dimension in DIMENSIONS:
+        counts = into[dimension]
+        for key, n in bucket.get(dimension, {}).items():
+            counts[key] = counts.get(key, 0) + n
+
+
+def _summary(bucket: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {
+        "calls": bucket["calls"],
+        "avg_duration": round(bucket["duration_sum"] / bucket["duration_count"], 1) if bucket["duration_count"] else None,
+    }
+    for dimension in DIMENSIONS:
+        summary[dimension] = dict(sorted(bucket.get(dimension, {}).items(), key=lambda kv: -kv[1]))
+    return summary
+
+
+class LeadAnalytics:
+    """Rollup counters for call dashboards, maintained incrementally.
+
+    Each stored call is folded once into an all-time bucket and into its
+    hour, day and week buckets, keyed by the normalized values the
+    conversation filters use. ``sync`` applies only records written
+    since the last call, reading them from the store by sequence number,
+    so every worker process converges on the same counts. Rollups are
+    snapshotted to ``path`` with the sequence number they cover and
+    replayed forward from there on startup.
+    """
+
+    def __init__(self, store: ConversationStore, path: Optional[str] = None, snapshot_every: Optional[int] = None):
+        self.store = store
+        self.path = Path(path or os.getenv("ANALYTICS_SNAPSHOT", "data/analytics.json"))
+        self.snapshot_every = int(snapshot_every or os.getenv("ANALYTICS_SNAPSHOT_EVERY", 100))
+        self.seq = 0
+        self.totals = _empty()
+        self.buckets: Dict[str, Dict[int, Dict[str, Any]]] = {g: {} for g in GRANULARITIES}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r") as f:
+                snapshot = json.load(f)
+            self.seq = snapshot["seq"]
+            self.totals = snapshot["totals"]
+            self.buckets = {
+                g: {int(start): bucket for start, bucket in snapshot["buckets"].get(g, {}).items()}
+                for g in GRANULARITIES
+            }
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable analytics snapshot {self.path}: {e}")
+            self.seq = 0
+            self.totals = _empty()
+            self.buckets = {g: {} for g in GRANULARITIES}
+
+    def _apply(self, record: Dict[str, Any]):
+        _add(self.totals, record)
+        ts = record_timestamp(record)
+        if not ts:
+            return
+        for granularity, buckets in self.buckets.items():
+            start = bucket_start(ts, granularity)
+            bucket = buckets.get(start)
+            if bucket is None:
+                bucket = buckets[start] = _empty()
+            _add(bucket, record)
+
+    def sync(self) -> int:
+        """Fold in records written since the last sync. Returns how many."""
+        with self._lock:
+            applied = 0
+            for seq, line in self.store.scan(self.seq):
+                self._apply(json.loads(line))
+                self.seq = seq + 1
+                applied += 1
+            self._unsaved += applied
+            if self._unsaved >= self.snapshot_every:
+                self._save()
+            return applied
+
+    def _save(self):
+        for granularity, keep in RETENTION.items():
+            buckets = self.buckets[granularity]
+            if keep is not None and len(buckets) > keep:
+                for start in sorted(buckets)[:-keep]:
+                    del buckets[start]
+        snapshot = {"seq": self.seq, "totals": self.totals, "buckets": self.buckets}
+        # Each worker keeps the full rollups; a per-process temp file keeps their saves from colliding
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._unsaved = 0
+
+    def save(self):
+        """Write the snapshot now"""
+        with self._lock:
+            self._save()
+
+    def report(
+        self,
+        granularity: str = "hour",
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 24,
+    ) -> Dict[str, Any]:
+        """Summaries of the most recent ``limit`` buckets in [since, until].
+
+        Cost depends on the number of buckets, not the number of calls.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        with self._lock:
+            buckets = self.buckets[granularity]
+            lo = bucket_start(since, granularity) if since is not None else None
+            starts = [
+                s for s in sorted(buckets)
+                if (lo is None or s >= lo) and (until is None or s <= until)
+            ][-limit:]
+
+            window = _empty()
+            series: List[Dict[str, Any]] = []
+            for start in starts:
+                bucket = buckets[start]
+                _merge(window, bucket)
+                series.append({
+                    "start": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start)),
+                    **_summary(bucket)
+                })
+
+            span_hours = (starts[-1] + GRANULARITIES[granularity] - starts[0]) / 3600 if starts else 0
+            return {
+                "granularity": granularity,
+                "buckets": series,
+                "window": {
+                    **_summary(window),
+                    "calls_per_hour": round(window["calls"] / span_hours, 3) if span_hours else 0.0
+                },
+                "all_time": _summary(self.totals),
+                "records_applied": self.seq
+            }
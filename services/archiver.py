@@ -0,0 +1,264 @@
+import asyncio
+import ipaddress
+import logging
+import os
+import random
+import socket
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.blob_store import BlobStore
+from services.vapi_service import RETRY_STATUS_CODES
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAX_REDIRECTS = 5
+
+
+class DownloadError(Exception):
+    """A recording that can't be fetched, and won't be on retry"""
+
+
+class RecordingArchiver:
+    """Copies call recordings into the blob store before their URLs expire.
+
+    ``submit`` records the URL as a pending ref and queues it; up to
+    ``ARCHIVE_CONCURRENCY`` downloads run at once on one shared
+    ``httpx.AsyncClient``, retrying 429/5xx and transport errors with
+    jittered backoff. Bodies larger than ``ARCHIVE_MAX_BYTES`` are
+    refused, and compression and the pack write run in a thread.
+    Pending refs survive a restart: on startup one worker (whichever
+    holds ``archive.lock``) requeues them.
+
+    Only https URLs on ``ARCHIVE_ALLOWED_HOSTS`` (Vapi's storage by
+    default; a leading dot allows subdomains) are fetched, and never
+    from private, loopback or link-local addresses. Redirects are
+    followed by hand so every hop gets the same check.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore,
+        concurrency: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        timeout: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        allowed_hosts: Optional[Iterable[str]] = None,
+        require_https: bool = True,
+        allow_private: bool = False
+    ):
+        self.store = store
+        self.concurrency = int(concurrency or os.getenv("ARCHIVE_CONCURRENCY", 4))
+        self.max_bytes = int(max_bytes or os.getenv("ARCHIVE_MAX_BYTES", 200 * 1024 * 1024))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("ARCHIVE_MAX_RETRIES", 4))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.transport = transport
+        if allowed_hosts is None:
+            allowed_hosts = os.getenv("ARCHIVE_ALLOWED_HOSTS", "storage.vapi.ai").split(",")
+        self.allowed_hosts = {h.strip().lower() for h in allowed_hosts if h.strip()}
+        self.require_https = require_https
+        self.allow_private = allow_private
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._replay_fd: Optional[int] = None
+        self.in_flight = 0
+        self.archived = 0
+        self.failed = 0
+        self.downloaded_bytes = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=False,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                transport=self.transport
+            )
+        return self._client
+
+    def _claim_replay(self) -> bool:
+        """Only one worker process replays pending downloads left by a previous run"""
+        if fcntl is None:
+            return True
+        self._replay_fd = os.open(self.store.directory / "archive.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._replay_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._replay_fd)
+            self._replay_fd = None
+            return False
+        return True
+
+    def start(self):
+        """Start the download workers on the running event loop and requeue unfinished downloads"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        if self._claim_replay():
+            pending = self.store.pending()
+            for name, url in pending.items():
+                self._queue.put_nowait((name, url))
+            if pending:
+                logger.info(f"Archiver: resuming {len(pending)} pending download(s)")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._replay_fd is not None:
+            os.close(self._replay_fd)
+            self._replay_fd = None
+
+    async def submit(self, name: str, url: str):
+        """Queue ``url`` for download into the ref ``name``; the pending ref is written in a thread"""
+        await asyncio.to_thread(self.store.mark_pending, name, url)
+        if self._queue is not None:
+            self._queue.put_nowait((name, url))
+
+    async def join(self):
+        """Wait until every queued download has finished"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def _retry_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def url_allowed(self, url: str) -> bool:
+        """Whether ``url`` has an allowed scheme and host; addresses are checked at download time"""
+        try:
+            parts = urlsplit(url)
+            host = (parts.hostname or "").lower()
+        except ValueError:
+            return False
+        if parts.scheme != "https" and (self.require_https or parts.scheme != "http"):
+            return False
+        return any(host == h or (h.startswith(".") and host.endswith(h)) for h in self.allowed_hosts)
+
+    async def check_url(self, url: str):
+        """Raise ``DownloadError`` unless ``url`` is allowed and resolves only to public addresses"""
+        if not self.url_allowed(url):
+            raise DownloadError(f"refusing to fetch {url}: host not allowed")
+        if self.allow_private:
+            return
+        parts = urlsplit(url)
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                parts.hostname, parts.port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM
+            )
+        except socket.gaierror as e:
+            raise httpx.ConnectError(f"cannot resolve {parts.hostname}: {e}")
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+            if not address.is_global or address.is_multicast:
+                raise DownloadError(f"refusing to fetch {url}: {address} is not a public address")
+
+    async def _fetch(self, url: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """One GET, following redirects hop by hop; None when the status is worth retrying"""
+        for _ in range(MAX_REDIRECTS + 1):
+            await self.check_url(url)
+            async with self.client.stream("GET", url) as response:
+                if response.is_redirect:
+                    url = str(response.url.join(response.headers["Location"]))
+                    continue
+                if response.status_code in RETRY_STATUS_CODES:
+                    return None
+                if response.is_error:
+                    # Expired and deleted recordings come back 403/404; retrying won't help
+                    raise DownloadError(f"HTTP {response.status_code}")
+                length = int(response.headers.get("Content-Length") or 0)
+                if length > self.max_bytes:
+                    raise DownloadError(f"{length} bytes exceeds ARCHIVE_MAX_BYTES")
+                chunks, received = [], 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise DownloadError(f"body exceeds ARCHIVE_MAX_BYTES ({self.max_bytes})")
+                    chunks.append(chunk)
+                return b"".join(chunks), response.headers.get("Content-Type")
+        raise DownloadError(f"more than {MAX_REDIRECTS} redirects")
+
+    async def download(self, url: str) -> Tuple[bytes, Optional[str]]:
+        """Fetch a URL, returning the body and its content type"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await self._fetch(url)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                result = None
+            if result is not None:
+                return result
+            if attempt < self.max_retries:
+                await asyncio.sleep(self._retry_delay(attempt))
+        raise DownloadError("retries exhausted")
+
+    async def archive(self, name: str, url: str) -> Optional[str]:
+        """Download one artifact into the store and link it; returns the digest, or None on failure"""
+        self.in_flight += 1
+        try:
+            data, media_type = await self.download(url)
+            digest = await asyncio.to_thread(self.store.put, data, media_type)
+            await asyncio.to_thread(self.store.link, name, digest)
+        except (DownloadError, httpx.HTTPError) as e:
+            self.failed += 1
+            self.last_error = f"{name}: {e}"
+            logger.warning(f"Archiving {name} failed: {e}")
+            await asyncio.to_thread(self.store.mark_failed, name, url, str(e))
+            return None
+        finally:
+            self.in_flight -= 1
+        self.archived += 1
+        self.downloaded_bytes += len(data)
+        return digest
+
+    async def _worker(self):
+        while True:
+            name, url = await self._queue.get()
+            try:
+                await self.archive(name, url)
+            except Exception as e:
+                # Left pending, so the next startup tries again
+                self.last_error = f"{name}: {e}"
+                logger.error(f"Archiving {name} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.depth(),
+            "in_flight": self.in_flight,
+            "archived": self.archived,
+            "failed": self.failed,
+            "downloaded_bytes": self.downloaded_bytes,
+            "last_error": self.last_error,
+            "running": bool(self._workers),
+            "store": self.store.stats(),
+        }
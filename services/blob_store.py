@@ -0,0 +1,363 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RAW, ZLIB, ZSTD = 0, 1, 2
+CODEC_NAMES = {RAW: "raw", ZLIB: "zlib", ZSTD: "zstd"}
+# Stored as an index into this tuple; unknown types are served as octet-stream
+MEDIA_TYPES = (
+    "application/octet-stream",
+    "application/json",
+    "text/plain",
+    "audio/wav",
+    "audio/mpeg",
+    "audio/ogg",
+    "audio/webm",
+)
+# Already compressed; stored as-is without spending CPU on another pass
+PRECOMPRESSED = {"audio/mpeg", "audio/ogg", "audio/webm"}
+# Keep the compressed form only when it saves at least this much
+MIN_SAVING = 0.05
+
+# digest, pack number, offset, stored length, raw size, codec, media type
+_ENTRY = struct.Struct("<32sIQQQBB2x")
+
+
+class BlobEntry(NamedTuple):
+    pack: int
+    offset: int
+    length: int
+    size: int
+    codec: int
+    media: int
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.media] if self.media < len(MEDIA_TYPES) else MEDIA_TYPES[0]
+
+
+def media_index(media_type: Optional[str]) -> int:
+    base = (media_type or "").split(";", 1)[0].strip().lower()
+    if base in ("audio/x-wav", "audio/wave"):
+        base = "audio/wav"
+    try:
+        return MEDIA_TYPES.index(base)
+    except ValueError:
+        return 0
+
+
+class BlobStore:
+    """Content-addressed, compressed storage for call artifacts.
+
+    Blobs are keyed by the SHA-256 of their content and appended to
+    pack files (``pack-000001.dat``...) of up to ``BLOB_PACK_BYTES``.
+    ``index.bin`` holds one fixed-size record per blob (pack, offset,
+    lengths, codec, media type) and is loaded into a dict, so a read is
+    a lookup plus a slice of the memory-mapped pack; nothing else in
+    the pack is touched. Content is compressed with zstd when the
+    ``zstandard`` package is installed and zlib otherwise, and kept raw
+    when that doesn't pay (recordings that are already MP3).
+
+    Named refs (``<call_id>/transcript``, ``<call_id>/recording``) map
+    to digests, or to a source URL while a download is pending, and are
+    appended to ``refs.log``. Appends to all three files happen under a
+    lock on ``blobs.lock`` and every process tails the index and refs,
+    so several workers can share one directory. Each write is fsynced
+    before anything that points at it (pack, then index, then ref), so
+    a crash never leaves an entry for content that isn't on disk.
+    """
+
+    def __init__(self, directory: Optional[str] = None, pack_bytes: Optional[int] = None, codec: Optional[str] = None):
+        self.directory = Path(directory or os.getenv("BLOB_STORE_DIR", "data/blobs"))
+        self.pack_bytes = int(pack_bytes or os.getenv("BLOB_PACK_BYTES", 256 * 1024 * 1024))
+        codec = (codec or os.getenv("BLOB_CODEC", "zstd" if zstandard is not None else "zlib")).lower()
+        if codec == "zstd" and zstandard is None:
+            codec = "zlib"
+        self.codec = {"raw": RAW, "zlib": ZLIB, "zstd": ZSTD}.get(codec, ZLIB)
+        self.index_path = self.directory / "index.bin"
+        self.refs_path = self.directory / "refs.log"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._entries: Dict[bytes, BlobEntry] = {}
+        self._refs: Dict[str, Dict[str, Any]] = {}
+        self._index_offset = 0
+        self._refs_offset = 0
+        self._pack = 1
+        self._maps: Dict[int, mmap.mmap] = {}
+        # Maps replaced while a reader still held a view of them; closed once it lets go
+        self._retired: List[mmap.mmap] = []
+        self.stored_bytes = 0
+        self.raw_bytes = 0
+        with self._lock, self._process_lock():
+            self._catch_up()
+
+    @contextmanager
+    def _process_lock(self):
+        """Serialize appends across worker processes sharing the directory"""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.directory / "blobs.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Load index records and refs appended since the last read, by this or another process"""
+        try:
+            size = os.stat(self.index_path).st_size
+        except FileNotFoundError:
+            size = 0
+        # Only whole records; a torn tail is overwritten by the next append
+        end = size - size % _ENTRY.size
+        if end > self._index_offset:
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read(end - self._index_offset)
+            for fields in _ENTRY.iter_unpack(data):
+                entry = BlobEntry(*fields[1:])
+                self._entries[fields[0]] = entry
+                self._pack = max(self._pack, entry.pack)
+                self.stored_bytes += entry.length
+                self.raw_bytes += entry.size
+            self._index_offset = end
+
+        try:
+            size = os.stat(self.refs_path).st_size
+        except FileNotFoundError:
+            size = 0
+        if size > self._refs_offset:
+            with open(self.refs_path, "rb") as f:
+                f.seek(self._refs_offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._refs_offset += len(line)
+                    try:
+                        ref = json.loads(line)
+                        self._refs[ref.pop("name")] = ref
+                    except (ValueError, KeyError):
+                        continue
+
+    def _pack_path(self, pack: int) -> Path:
+        return self.directory / f"pack-{pack:06d}.dat"
+
+    def _compress(self, data: bytes, media_type: str) -> tuple:
+        if self.codec == RAW or media_type in PRECOMPRESSED or not data:
+            return RAW, data
+        if self.codec == ZSTD:
+            packed = zstandard.ZstdCompressor(level=3).compress(data)
+        else:
+            packed = zlib.compress(data, 6)
+        if len(packed) > len(data) * (1 - MIN_SAVING):
+            return RAW, data
+        return self.codec, packed
+
+    def put(self, data: bytes, media_type: Optional[str] = None) -> str:
+        """Store content and return its hex digest; storing the same content again is free"""
+        key = hashlib.sha256(data).digest()
+        media = media_index(media_type)
+        with self._lock:
+            if key in self._entries:
+                return key.hex()
+        codec, packed = self._compress(data, MEDIA_TYPES[media])
+
+        with self._lock, self._process_lock():
+            self._catch_up()
+            if key in self._entries:
+                return key.hex()
+            pack = self._pack
+            path = self._pack_path(pack)
+            try:
+                offset = os.stat(path).st_size
+            except FileNotFoundError:
+                offset = 0
+            if offset and offset + len(packed) > self.pack_bytes:
+                pack += 1
+                path, offset = self._pack_path(pack), 0
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+            try:
+                os.pwrite(fd, packed, offset)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            entry = BlobEntry(pack, offset, len(packed), len(data), codec, media)
+            fd = os.open(self.index_path, os.O_WRONLY | os.O_CREAT, 0o644)
+            try:
+                os.pwrite(fd, _ENTRY.pack(key, *entry), self._index_offset)
+                # Before a ref can be linked to it
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._index_offset += _ENTRY.size
+            self._entries[key] = entry
+            self._pack = pack
+            self.stored_bytes += entry.length
+            self.raw_bytes += entry.size
+        return key.hex()
+
+    def entry(self, digest: str) -> Optional[BlobEntry]:
+        try:
+            key = bytes.fromhex(digest)
+        except ValueError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                with self._process_lock():
+                    self._catch_up()
+                entry = self._entries.get(key)
+        return entry
+
+    def _view(self, entry: BlobEntry) -> memoryview:
+        """The stored bytes of one blob, straight out of the mapped pack"""
+        if not entry.length:
+            return memoryview(b"")
+        with self._lock:
+            mapped = self._maps.get(entry.pack)
+            if mapped is None or len(mapped) < entry.offset + entry.length:
+                # Packs only grow, so a stale map is replaced rather than resized
+                with open(self._pack_path(entry.pack), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                old = self._maps.get(entry.pack)
+                self._maps[entry.pack] = mapped
+                if old is not None:
+                    self._retired.append(old)
+                self._release_retired()
+        return memoryview(mapped)[entry.offset:entry.offset + entry.length]
+
+    def _release_retired(self):
+        """Close replaced maps that no reader holds a view of any more, freeing their descriptors"""
+        held = []
+        for mapped in self._retired:
+            try:
+                mapped.close()
+            except BufferError:
+                held.append(mapped)
+        self._retired = held
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """The decompressed content of a blob, or None when it isn't stored"""
+        entry = self.entry(digest)
+        if entry is None:
+            return None
+        view = self._view(entry)
+        if entry.codec == ZLIB:
+            return zlib.decompress(view)
+        if entry.codec == ZSTD:
+            return zstandard.ZstdDecompressor().decompress(view, max_output_size=entry.size)
+        return bytes(view)
+
+    def iter_chunks(self, digest: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Stream a blob's content, decompressing one slice of the pack at a time"""
+        entry = self.entry(digest)
+        if entry is None:
+            raise KeyError(digest)
+        view = self._view(entry)
+        if entry.codec == RAW:
+            for start in range(0, len(view), chunk_size):
+                yield bytes(view[start:start + chunk_size])
+            return
+        if entry.codec == ZSTD:
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            decompressor = zlib.decompressobj()
+        for start in range(0, len(view), chunk_size):
+            out = decompressor.decompress(view[start:start + chunk_size])
+            if out:
+                yield out
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+    def _append_ref(self, name: str, ref: Dict[str, Any]):
+        line = (json.dumps({"name": name, **ref}, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock, self._process_lock():
+            self._catch_up()
+            fd = os.open(self.refs_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._refs_offset += len(line)
+            self._refs[name] = ref
+
+    def link(self, name: str, digest: str):
+        """Point a ref at stored content"""
+        self._append_ref(name, {"digest": digest, "ts": time.time()})
+
+    def mark_pending(self, name: str, url: str):
+        """Record a ref whose content is still to be fetched from ``url``"""
+        self._append_ref(name, {"url": url, "ts": time.time()})
+
+    def mark_failed(self, name: str, url: str, error: str):
+        self._append_ref(name, {"url": url, "error": error, "ts": time.time()})
+
+    def ref(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock, self._process_lock():
+            self._catch_up()
+            ref = self._refs.get(name)
+            return dict(ref) if ref else None
+
+    def refs(self, names) -> Dict[str, Dict[str, Any]]:
+        """Refs that exist among ``names``, catching up once for the whole batch"""
+        with self._lock, self._process_lock():
+            self._catch_up()
+            return {name: dict(self._refs[name]) for name in names if name in self._refs}
+
+    def pending(self) -> Dict[str, str]:
+        """Ref name -> source URL for downloads that never completed"""
+        with self._lock, self._process_lock():
+            self._catch_up()
+            return {
+                name: ref["url"] for name, ref in self._refs.items()
+                if "url" in ref and "digest" not in ref and "error" not in ref
+            }
+
+    def close(self):
+        with self._lock:
+            for mapped in [*self._maps.values(), *self._retired]:
+                try:
+                    mapped.close()
+                except BufferError:
+                    # Still referenced by a streaming response; released with it
+                    pass
+            self._maps.clear()
+            self._retired = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "codec": CODEC_NAMES[self.codec],
+            "blobs": len(self._entries),
+            "refs": len(self._refs),
+            "packs": self._pack if self._entries else 0,
+            "stored_bytes": self.stored_bytes,
+            "raw_bytes": self.raw_bytes,
+            "ratio": round(self.stored_bytes / self.raw_bytes, 3) if self.raw_bytes else None,
+        }
@@ -0,0 +1,224 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# claim() outcomes
+CLAIMED = "claimed"
+IN_PROGRESS = "in-progress"
+DUPLICATE = "duplicate"
+
+
+class CallDeduplicator:
+    """Idempotency guard for webhook retries, keyed on ``call.id``.
+
+    A call is claimed while its report is processed and committed once
+    it has been stored; only committed calls are duplicates. A retry
+    that arrives while another attempt holds the claim is told so, and
+    a claim left by a crashed worker lapses after ``DEDUP_CLAIM_TTL``
+    seconds. Committed IDs live in a bounded LRU with a TTL. Claims,
+    commits and releases are appended to ``seen_calls.log`` so the
+    state survives restarts; the log is compacted to the live entries
+    once it grows past twice the cache size. Everything happens under a
+    lock on ``seen_calls.lock`` after reading what other worker
+    processes appended, so a retry that lands on a different worker is
+    still recognised. ``seen`` answers from memory alone, so a retry
+    this worker already committed is turned away without any I/O; the
+    locked methods block and belong in a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        claim_ttl_seconds: Optional[float] = None,
+    ):
+        self.path = Path(path or os.getenv("DEDUP_LOG_FILE", "data/seen_calls.log"))
+        self.max_entries = int(max_entries or os.getenv("DEDUP_MAX_ENTRIES", 100_000))
+        self.ttl_seconds = float(ttl_seconds or os.getenv("DEDUP_TTL_SECONDS", 7 * 24 * 3600))
+        self.claim_ttl_seconds = float(claim_ttl_seconds or os.getenv("DEDUP_CLAIM_TTL", 120))
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        # call_id -> when an attempt still in progress claimed it
+        self._claims: Dict[str, float] = {}
+        self._log_lines = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        # flock is per open file, so threads of one process also need this
+        self._lock = threading.Lock()
+        self.duplicates = 0
+        self.conflicts = 0
+
+        with self._lock, self._process_lock():
+            self._catch_up()
+
+    @contextmanager
+    def _process_lock(self):
+        """Serialize claims across worker processes sharing the log"""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.path.with_suffix(".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Apply lines appended since the last read, by this or another process"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # First read, or another process compacted the log: start over from the new file
+            self._seen.clear()
+            self._claims.clear()
+            self._log_lines = 0
+            self._offset = 0
+            self._inode = st.st_ino
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        if st.st_size == self._offset:
+            return
+
+        now = time.time()
+        cutoff = now - self.ttl_seconds
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                self._offset += len(raw)
+                self._log_lines += 1
+                call_id, _, rest = raw.decode("utf-8", "replace").rstrip("\n").partition("\t")
+                seen_at, _, state = rest.partition("\t")
+                try:
+                    seen_at = float(seen_at)
+                except ValueError:
+                    continue
+                if not call_id:
+                    continue
+                if state == "claim":
+                    if now - seen_at < self.claim_ttl_seconds:
+                        self._claims[call_id] = seen_at
+                    continue
+                self._claims.pop(call_id, None)
+                if seen_at >= cutoff:
+                    self._seen[call_id] = seen_at
+                    self._seen.move_to_end(call_id)
+                else:
+                    # Expired, or released after a failed attempt
+                    self._seen.pop(call_id, None)
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+
+    def _append(self, call_id: str, seen_at: float, state: str = ""):
+        """Caller holds the process lock"""
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._inode = os.fstat(self._fd).st_ino
+        data = (f"{call_id}\t{seen_at}\t{state}\n" if state else f"{call_id}\t{seen_at}\n").encode("utf-8")
+        os.write(self._fd, data)
+        self._offset += len(data)
+        self._log_lines += 1
+        if self._log_lines > 2 * self.max_entries:
+            self._compact()
+
+    def _compact(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            for call_id, seen_at in self._seen.items():
+                f.write(f"{call_id}\t{seen_at}\n")
+            for call_id, claimed_at in self._claims.items():
+                f.write(f"{call_id}\t{claimed_at}\tclaim\n")
+        os.replace(tmp, self.path)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        st = os.stat(self.path)
+        self._inode, self._offset = st.st_ino, st.st_size
+        self._log_lines = len(self._seen) + len(self._claims)
+
+    def _evict(self, now: float):
+        cutoff = now - self.ttl_seconds
+        while self._seen:
+            oldest_id, oldest_at = next(iter(self._seen.items()))
+            if len(self._seen) <= self.max_entries and oldest_at >= cutoff:
+                break
+            self._seen.popitem(last=False)
+
+    def seen(self, call_id: str) -> bool:
+        """Whether this worker already knows the call was committed; reads no files"""
+        seen_at = self._seen.get(call_id) if call_id else None
+        if seen_at is not None and time.time() - seen_at < self.ttl_seconds:
+            self.duplicates += 1
+            return True
+        return False
+
+    def claim(self, call_id: str) -> str:
+        """Start processing a call: ``CLAIMED`` when this attempt should go ahead,
+        ``IN_PROGRESS`` while another attempt holds it, ``DUPLICATE`` once it was committed.
+        """
+        if not call_id:
+            return CLAIMED
+        with self._lock, self._process_lock():
+            self._catch_up()
+            now = time.time()
+            seen_at = self._seen.get(call_id)
+            if seen_at is not None and now - seen_at < self.ttl_seconds:
+                self.duplicates += 1
+                return DUPLICATE
+            claimed_at = self._claims.get(call_id)
+            if claimed_at is not None and now - claimed_at < self.claim_ttl_seconds:
+                self.conflicts += 1
+                return IN_PROGRESS
+
+            self._claims[call_id] = now
+            self._append(call_id, now, "claim")
+            return CLAIMED
+
+    def commit(self, call_id: str):
+        """Mark a claimed call as handled for good, once its record is stored"""
+        if not call_id:
+            return
+        with self._lock, self._process_lock():
+            self._catch_up()
+            now = time.time()
+            self._claims.pop(call_id, None)
+            self._seen[call_id] = now
+            self._seen.move_to_end(call_id)
+            self._evict(now)
+            self._append(call_id, now)
+
+    def release(self, call_id: str):
+        """Drop the claim of an attempt that failed before committing, so a retry can succeed"""
+        if not call_id:
+            return
+        with self._lock, self._process_lock():
+            self._catch_up()
+            if self._claims.pop(call_id, None) is not None and call_id not in self._seen:
+                self._append(call_id, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._seen),
+            "in_progress": len(self._claims),
+            "duplicates": self.duplicates,
+            "conflicts": self.conflicts,
+        }
@@ -0,0 +1,296 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Vapi roles -> the two speakers we keep
+ROLES = {"user": "user", "customer": "user", "assistant": "assistant", "bot": "assistant"}
+MAX_TURN_CHARS = 4000
+
+
+def spoken_messages(messages: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, str, Optional[float]]]:
+    """(role, text, secondsFromStart) for each user or assistant message with text; anything else is skipped"""
+    for m in messages:
+        if not isinstance(m, dict):
+            continue
+        role = ROLES.get(m.get("role"))
+        text = m.get("message") or m.get("content")
+        if role and isinstance(text, str) and text.strip():
+            yield role, text, m.get("secondsFromStart")
+
+
+class CallSession:
+    """Incremental state for one in-progress call"""
+
+    __slots__ = (
+        "call_id", "status", "started_at", "updated_at", "ended_at", "ended_reason",
+        "customer_number", "turns", "partials", "dropped_turns", "max_turns", "consumed", "unconfirmed", "unheard",
+    )
+
+    def __init__(self, call_id: str, max_turns: int):
+        now = time.time()
+        self.call_id = call_id
+        self.status = "in-progress"
+        self.started_at = now
+        self.updated_at = now
+        self.ended_at: Optional[float] = None
+        self.ended_reason: Optional[str] = None
+        self.customer_number: Optional[str] = None
+        self.turns: List[Dict[str, Any]] = []
+        # Latest partial (unfinalized) utterance per speaker
+        self.partials: Dict[str, str] = {}
+        self.dropped_turns = 0
+        self.max_turns = max_turns
+        # Spoken messages already taken from conversation-update lists
+        self.consumed = 0
+        # (role, text) of transcript-event turns no conversation-update has listed yet, and
+        # of listed turns whose transcript event hasn't arrived; matched up so neither repeats
+        self.unconfirmed: deque = deque(maxlen=max_turns)
+        self.unheard: deque = deque(maxlen=max_turns)
+
+    def add_turn(self, role: str, text: str, seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        text = (text or "").strip()[:MAX_TURN_CHARS]
+        if not text:
+            return None
+        if seconds is None and self.started_at:
+            seconds = round(time.time() - self.started_at, 2)
+        turn = {"role": role, "text": text, "seconds": seconds}
+        self.turns.append(turn)
+        self.partials.pop(role, None)
+        if len(self.turns) > self.max_turns:
+            # Keep the opening of the call and the most recent turns
+            del self.turns[self.max_turns // 2]
+            self.dropped_turns += 1
+        return turn
+
+    def add_live_turn(self, role: str, text: str) -> Optional[Dict[str, Any]]:
+        """Add a final transcript-event turn unless a conversation-update already listed it"""
+        key = (role, (text or "").strip()[:MAX_TURN_CHARS])
+        if key in self.unheard:
+            self.unheard.remove(key)
+            return None
+        turn = self.add_turn(role, text)
+        if turn:
+            self.unconfirmed.append(key)
+        return turn
+
+    def apply_messages(self, messages: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add turns from a conversation-update message list beyond those already recorded.
+
+        Vapi resends the whole conversation on every update, so only
+        messages past the last list are applied, and one already heard
+        as a transcript event is not added twice.
+        """
+        spoken = list(spoken_messages(messages))
+        added = []
+        for role, text, seconds in spoken[self.consumed:]:
+            key = (role, text.strip()[:MAX_TURN_CHARS])
+            if key in self.unconfirmed:
+                self.unconfirmed.remove(key)
+                continue
+            turn = self.add_turn(role, text, seconds)
+            if turn:
+                self.unheard.append(key)
+                added.append(turn)
+        self.consumed = max(self.consumed, len(spoken))
+        return added
+
+    def replace_turns(self, messages: Iterable[Dict[str, Any]]):
+        """Rebuild the turns from a complete message list, such as the end-of-call report's.
+
+        Entries that aren't message objects are skipped.
+        """
+        self.turns = []
+        self.partials = {}
+        self.dropped_turns = 0
+        self.consumed = 0
+        self.unconfirmed.clear()
+        self.apply_messages(messages)
+        self.unheard.clear()
+
+    @property
+    def duration(self) -> Optional[int]:
+        end = self.ended_at or self.updated_at
+        return int(end - self.started_at) if end > self.started_at else None
+
+    def transcript(self) -> str:
+        return "\n".join(f"{t['role'].upper()}: {t['text']}" for t in self.turns)
+
+    def snapshot(self, turns: bool = True) -> Dict[str, Any]:
+        data = {
+            "call_id": self.call_id,
+            "status": self.status,
+            "started_at": self.started_at,
+            "updated_at": self.updated_at,
+            "ended_at": self.ended_at,
+            "ended_reason": self.ended_reason,
+            "customer_number": self.customer_number,
+            "turn_count": len(self.turns) + self.dropped_turns,
+        }
+        if turns:
+            data["turns"] = list(self.turns)
+            data["partials"] = dict(self.partials)
+        return data
+
+
+class CallSessionTable:
+    """Live calls on this worker, built from streaming Vapi events.
+
+    Sessions sit in an LRU ordered by last activity, capped at
+    ``CALL_SESSION_MAX``; idle sessions expire after ``CALL_SESSION_TTL``
+    and ended ones after ``CALL_SESSION_ENDED_TTL``, so memory stays
+    bounded when end-of-call reports never arrive. Eviction only looks
+    at the oldest entries, keeping each event O(1). Subscribers get
+    events through bounded queues; one that falls behind is dropped
+    rather than slowing the webhook. Everything runs on the event loop,
+    so there is no locking.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        ended_ttl_seconds: Optional[float] = None,
+        max_turns: Optional[int] = None,
+        subscriber_queue: int = 256,
+    ):
+        self.max_sessions = int(max_sessions or os.getenv("CALL_SESSION_MAX", 10_000))
+        self.ttl_seconds = float(ttl_seconds or os.getenv("CALL_SESSION_TTL", 2 * 3600))
+        self.ended_ttl_seconds = float(ended_ttl_seconds or os.getenv("CALL_SESSION_ENDED_TTL", 600))
+        self.max_turns = int(max_turns or os.getenv("CALL_SESSION_MAX_TURNS", 500))
+        self.subscriber_queue = subscriber_queue
+
+        self._sessions: "OrderedDict[str, CallSession]" = OrderedDict()
+        # call_id -> subscriber queues; None subscribes to every call
+        self._subscribers: Dict[Optional[str], Set[asyncio.Queue]] = {}
+        self.evicted = 0
+        self.dropped_subscribers = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, now: float):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            ttl = self.ended_ttl_seconds if session.ended_at else self.ttl_seconds
+            if len(self._sessions) <= self.max_sessions and now - session.updated_at < ttl:
+                return
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def _touch(self, call_id: str) -> CallSession:
+        now = time.time()
+        session = self._sessions.get(call_id)
+        if session is None:
+            session = self._sessions[call_id] = CallSession(call_id, self.max_turns)
+        else:
+            self._sessions.move_to_end(call_id)
+        session.updated_at = now
+        self._evict(now)
+        return session
+
+    def get(self, call_id: str) -> Optional[CallSession]:
+        return self._sessions.get(call_id)
+
+    def live(self) -> List[Dict[str, Any]]:
+        """Calls that have not ended, most recently active first"""
+        return [s.snapshot(turns=False) for s in reversed(self._sessions.values()) if s.ended_at is None]
+
+    def status_update(self, message: Dict[str, Any]):
+        call = message.get("call") or {}
+        if not call.get("id"):
+            return
+        session = self._touch(call["id"])
+        session.status = message.get("status") or session.status
+        session.customer_number = (call.get("customer") or {}).get("number") or session.customer_number
+        if session.status == "ended":
+            session.ended_at = session.updated_at
+            session.ended_reason = message.get("endedReason") or session.ended_reason
+        self._publish(session.call_id, "status", {"status": session.status, "ended_reason": session.ended_reason})
+
+    def transcript(self, message: Dict[str, Any]):
+        call_id = (message.get("call") or {}).get("id")
+        role = ROLES.get(message.get("role"))
+        if not call_id or not role:
+            return
+        session = self._touch(call_id)
+        text = message.get("transcript") or ""
+        if message.get("transcriptType") == "partial":
+            session.partials[role] = text[:MAX_TURN_CHARS]
+            self._publish(call_id, "partial", {"role": role, "text": text})
+            return
+        turn = session.add_live_turn(role, text)
+        if turn:
+            self._publish(call_id, "turn", turn)
+
+    def conversation_update(self, message: Dict[str, Any]):
+        call_id = (message.get("call") or {}).get("id")
+        if not call_id:
+            return
+        session = self._touch(call_id)
+        for turn in session.apply_messages(message.get("messages") or []):
+            self._publish(call_id, "turn", turn)
+
+    def finish(self, call_id: str, messages: Optional[List[Dict[str, Any]]] = None) -> CallSession:
+        """Remove and return the call's session for its final report.
+
+        The report's ``messages`` hold the whole call, so whenever there
+        are any they replace the live turns: this worker may have missed
+        events that were shed or went to another worker, or never seen
+        the call at all. The live turns are only used without them.
+        """
+        session = self._sessions.pop(call_id, None)
+        if session is None:
+            session = CallSession(call_id, self.max_turns)
+            session.started_at = session.updated_at = 0.0
+        if messages and isinstance(messages, list):
+            session.replace_turns(messages)
+        session.status = "ended"
+        self._publish(call_id, "ended", {"turn_count": len(session.turns) + session.dropped_turns})
+        return session
+
+    def subscribe(self, call_id: Optional[str] = None) -> asyncio.Queue:
+        """Queue of (event, data) for one call, or every call when ``call_id`` is None"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue)
+        self._subscribers.setdefault(call_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, call_id: Optional[str] = None):
+        queues = self._subscribers.get(call_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[call_id]
+
+    def _publish(self, call_id: str, event: str, data: Dict[str, Any]):
+        if not self._subscribers:
+            return
+        payload = {"call_id": call_id, **data}
+        for key in (call_id, None):
+            for queue in list(self._subscribers.get(key, ())):
+                try:
+                    queue.put_nowait((event, payload))
+                except asyncio.QueueFull:
+                    # A slow consumer is cut off; its stream ends and it can reconnect
+                    self.unsubscribe(queue, key)
+                    self._close(queue)
+                    self.dropped_subscribers += 1
+
+    @staticmethod
+    def _close(queue: asyncio.Queue):
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "live": sum(1 for s in self._sessions.values() if s.ended_at is None),
+            "evicted": self.evicted,
+            "subscribers": self.subscriber_count(),
+            "dropped_subscribers": self.dropped_subscribers,
+        }
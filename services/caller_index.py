@@ -0,0 +1,306 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+NAME_MATCH_THRESHOLD = 0.85
+COMPANY_SUFFIXES = re.compile(
+    r"\b(inc|incorporated|llc|llp|lp|ltd|corp|corporation|co|company|group|holdings|partners|realty|properties)\b"
+)
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_phone(phone: Optional[str], country_code: str = "1") -> Optional[str]:
+    """E.164 form of a phone number; bare 10-digit numbers get ``country_code``"""
+    if not phone:
+        return None
+    phone = str(phone).strip()
+    digits = re.sub(r"\D", "", phone)
+    if phone.startswith("+"):
+        return f"+{digits}" if 8 <= len(digits) <= 15 else None
+    if phone.startswith("00") and len(digits) > 10:
+        return f"+{digits[2:]}"
+    if len(digits) == 10:
+        return f"+{country_code}{digits}"
+    if len(digits) == 11 and digits.startswith(country_code):
+        return f"+{digits}"
+    return None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email or "@" not in str(email):
+        return None
+    return str(email).strip().lower()
+
+
+def _name_key(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    key = _SPACES.sub(" ", _NON_WORD.sub(" ", str(name).lower())).strip()
+    return key or None
+
+
+def _company_key(company: Optional[str]) -> Optional[str]:
+    key = _name_key(company)
+    if not key:
+        return None
+    key = _SPACES.sub(" ", COMPANY_SUFFIXES.sub(" ", key)).strip()
+    return key or None
+
+
+def _name_block(company_key: str, name_key: str) -> Tuple[str, str, str]:
+    """Bucket for fuzzy name matching: company, first name, last initial.
+
+    "Dana Whitfeld" still meets "Dana Whitfield", and each lookup only
+    compares against the few callers sharing the bucket.
+    """
+    words = name_key.split()
+    return company_key, words[0], words[-1][0]
+
+
+class CallerIndex:
+    """Caller identities shared across calls, keyed on phone and email.
+
+    Phone numbers (E.164) and emails map straight to a caller ID. A
+    phone number belongs to whoever used it last, and a call from it
+    under a different name starts a new identity, so reassigned
+    numbers don't merge strangers. A caller with neither is matched
+    fuzzily on name, against callers at the same company with the same
+    first name and last initial (``_name_block``), so a lookup compares
+    a handful of names however many callers there are; callers who
+    gave no company are matched on full names only. Every observation
+    is appended to ``callers.log``; the index is rebuilt from it on
+    startup, and the log is tailed under a file lock so several worker
+    processes agree on the same caller IDs. A re-index replaces the
+    log, which the other processes notice by its inode. Observations carry the call ID, so a
+    retried report resolves to the same answer and is counted once.
+    """
+
+    def __init__(self, path: Optional[str] = None, name_threshold: float = NAME_MATCH_THRESHOLD):
+        self.path = Path(path or os.getenv("CALLER_INDEX_FILE", "data/callers.log"))
+        self.name_threshold = name_threshold
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._reset()
+        with self._lock, self._process_lock():
+            self._catch_up()
+
+    def _reset(self):
+        self._by_phone: Dict[str, str] = {}
+        self._by_email: Dict[str, str] = {}
+        self._by_name: Dict[Tuple[str, str, str], List[str]] = {}
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        # call_id -> (caller_id, prior calls) as first resolved
+        self._calls: Dict[str, Tuple[str, int]] = {}
+        self._offset = 0
+
+    @contextmanager
+    def _process_lock(self):
+        """Serialize matching across worker processes sharing the log"""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.path.with_suffix(".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Apply observations appended since the last read, by this or another process"""
+        try:
+            st = os.stat(self.path)
+            inode, size = st.st_ino, st.st_size
+        except FileNotFoundError:
+            inode, size = None, 0
+        if inode != self._inode:
+            # The log was replaced by a re-index (or this is the first read)
+            self._inode = inode
+            self._reset()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError):
+                    continue
+
+    def _apply(self, observation: Dict[str, Any]):
+        caller_id, call_id = observation["id"], observation.get("call")
+        if call_id and call_id in self._calls:
+            return
+        profile = self._profiles.get(caller_id)
+        if profile is None:
+            profile = self._profiles[caller_id] = {
+                "caller_id": caller_id,
+                "calls": 0,
+                "first_seen": observation.get("ts"),
+                "last_seen": None,
+                "names": [],
+                "companies": [],
+                "phones": [],
+                "emails": [],
+            }
+        if call_id:
+            self._calls[call_id] = (caller_id, profile["calls"])
+        profile["calls"] += 1
+        profile["last_seen"] = observation.get("ts")
+
+        phone, email = observation.get("phone"), observation.get("email")
+        if phone:
+            self._by_phone[phone] = caller_id
+            if phone not in profile["phones"]:
+                profile["phones"].append(phone)
+        if email:
+            self._by_email.setdefault(email, caller_id)
+            if email not in profile["emails"]:
+                profile["emails"].append(email)
+        name, company = observation.get("name"), observation.get("company")
+        if name and name not in profile["names"]:
+            profile["names"].append(name)
+        if company and company not in profile["companies"]:
+            profile["companies"].append(company)
+        name_key = _name_key(name)
+        if name_key:
+            members = self._by_name.setdefault(_name_block(_company_key(company) or "", name_key), [])
+            if caller_id not in members:
+                members.append(caller_id)
+
+    def _same_person(self, caller_id: str, name_key: str) -> bool:
+        """Whether a name plausibly belongs to a caller: "Dana" for Dana Whitfield, a misspelling"""
+        names = self._profiles[caller_id]["names"]
+        if not names:
+            return True
+        words = set(name_key.split())
+        for known in names:
+            known_key = _name_key(known) or ""
+            if words & set(known_key.split()) or SequenceMatcher(None, name_key, known_key).ratio() >= self.name_threshold:
+                return True
+        return False
+
+    def _match(self, phone: Optional[str], email: Optional[str], name: Optional[str], company: Optional[str]) -> Optional[str]:
+        name_key = _name_key(name)
+        if email and email in self._by_email:
+            return self._by_email[email]
+        if phone and phone in self._by_phone:
+            owner = self._by_phone[phone]
+            # Someone else on a known number: it was reassigned
+            if not name_key or self._same_person(owner, name_key):
+                return owner
+
+        company_key = _company_key(company)
+        if not name_key or (not company_key and len(name_key.split()) < 2):
+            # A first name alone, with no company to narrow it, matches too many people
+            return None
+        best, best_score = None, self.name_threshold
+        for caller_id in self._by_name.get(_name_block(company_key or "", name_key), ()):
+            for known in self._profiles[caller_id]["names"]:
+                score = SequenceMatcher(None, name_key, _name_key(known)).ratio()
+                if score >= best_score:
+                    best, best_score = caller_id, score
+        return best
+
+    def _append(self, observations: List[Dict[str, Any]]):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._inode = os.fstat(self._fd).st_ino
+        data = "".join(json.dumps(o, separators=(",", ":")) + "\n" for o in observations).encode("utf-8")
+        os.write(self._fd, data)
+        self._offset += len(data)
+
+    def resolve_many(
+        self, callers: Iterable[Tuple[Dict[str, Any], float, Optional[str]]]
+    ) -> List[Tuple[Optional[str], int]]:
+        """Assign caller IDs to (CallerInfo dict, timestamp, call ID) triples in order.
+
+        Returns (caller_id, prior call count) for each; callers with no
+        phone, email or name get (None, 0). A call ID already resolved
+        gets its first answer again and isn't counted twice.
+        """
+        results: List[Tuple[Optional[str], int]] = []
+        observations: List[Dict[str, Any]] = []
+        with self._lock, self._process_lock():
+            self._catch_up()
+            for caller_info, ts, call_id in callers:
+                if call_id and call_id in self._calls:
+                    results.append(self._calls[call_id])
+                    continue
+                phone = normalize_phone(caller_info.get("phone"))
+                email = normalize_email(caller_info.get("email"))
+                name = caller_info.get("name") or None
+                company = caller_info.get("company") or None
+                if not (phone or email or name):
+                    results.append((None, 0))
+                    continue
+
+                caller_id = self._match(phone, email, name, company) or uuid.uuid4().hex[:16]
+                profile = self._profiles.get(caller_id)
+                results.append((caller_id, profile["calls"] if profile else 0))
+
+                observation = {"id": caller_id, "ts": ts, "phone": phone, "email": email, "name": name, "company": company}
+                if call_id:
+                    observation["call"] = call_id
+                self._apply(observation)
+                observations.append(observation)
+            if observations:
+                self._append(observations)
+        return results
+
+    def resolve(
+        self, caller_info: Dict[str, Any], ts: Optional[float] = None, call_id: Optional[str] = None
+    ) -> Tuple[Optional[str], int]:
+        """Caller ID and prior call count for one call, recording the call"""
+        return self.resolve_many([(caller_info, ts if ts is not None else time.time(), call_id)])[0]
+
+    def profile(self, caller_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock, self._process_lock():
+            self._catch_up()
+            profile = self._profiles.get(caller_id)
+            return dict(profile) if profile else None
+
+    def reset(self):
+        """Drop every identity, for a full re-index"""
+        with self._lock, self._process_lock():
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            # A new file, so other processes see a new inode and start over
+            tmp = self.path.with_suffix(".new")
+            tmp.write_bytes(b"")
+            os.replace(tmp, self.path)
+            self._inode = os.stat(self.path).st_ino
+            self._reset()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "callers": len(self._profiles),
+            "phones": len(self._by_phone),
+            "emails": len(self._by_email),
+        }
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import zlib
+from typing import Dict, Any, Iterator, List, Optional
+
+from services.conversation_store import ConversationStore
+
+CSV_COLUMNS = [
+    ("call_id", ("call_id",)),
+    ("timestamp", ("timestamp",)),
+    ("caller_name", ("caller_info", "name")),
+    ("caller_phone", ("caller_info", "phone")),
+    ("caller_email", ("caller_info", "email")),
+    ("caller_role", ("caller_info", "role")),
+    ("company", ("caller_info", "company")),
+    ("inquiry_type", ("inquiry_type",)),
+    ("asset_type", ("property_details", "asset_type")),
+    ("location", ("property_details", "location")),
+    ("deal_size", ("property_details", "deal_size")),
+    ("square_footage", ("property_details", "square_footage")),
+    ("urgency", ("property_details", "urgency")),
+    ("additional_details", ("property_details", "additional_details")),
+    ("conversation_summary", ("conversation_summary",)),
+    ("duration", ("duration",)),
+    ("recording_url", ("recording_url",)),
+]
+
+FLUSH_BYTES = 64 * 1024
+
+
+def _csv_line(values: List[Any]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(["" if v is None else v for v in values])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _csv_values(record: Dict[str, Any]) -> List[Any]:
+    values = []
+    for _, path in CSV_COLUMNS:
+        value: Any = record
+        for part in path:
+            value = value.get(part) if isinstance(value, dict) else None
+        values.append(value)
+    return values
+
+
+def iter_export(
+    store: ConversationStore,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Stream the call history as NDJSON or CSV, optionally gzip-encoded.
+
+    NDJSON lines are passed through from the store without being
+    decoded. Output is buffered into ~64 KB chunks so peak memory stays
+    constant regardless of history size.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    pending: List[bytes] = []
+    pending_size = 0
+
+    def lines() -> Iterator[bytes]:
+        if fmt == "csv":
+            yield _csv_line([name for name, _ in CSV_COLUMNS])
+            for _, raw in store.scan(start, stop):
+                yield _csv_line(_csv_values(json.loads(raw)))
+        else:
+            for _, raw in store.scan(start, stop):
+                yield raw
+
+    for line in lines():
+        pending.append(line)
+        pending_size += len(line)
+        if pending_size >= FLUSH_BYTES:
+            chunk = b"".join(pending)
+            pending, pending_size = [], 0
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
@@ -0,0 +1,289 @@
+import os
+import re
+import struct
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+# timestamp, segment number, byte offset, byte length
+POSITION = struct.Struct("<dIQI")
+POSTING = struct.Struct("<Q")
+CHUNK = 512
+
+# Query parameter -> path into the stored record
+INDEXED_FIELDS = {
+    "inquiry_type": ("inquiry_type",),
+    "asset_type": ("property_details", "asset_type"),
+    "urgency": ("property_details", "urgency"),
+    "location": ("property_details", "location"),
+    "market": ("normalized", "market"),
+    "caller_id": ("caller_id",),
+}
+
+# Range query parameter -> normalized (min, max) paths; a missing max means open-ended
+RANGE_FIELDS = {
+    "deal_size": (("normalized", "deal_size_min"), ("normalized", "deal_size_max")),
+    "square_feet": (("normalized", "square_feet_min"), ("normalized", "square_feet_max")),
+}
+
+
+def index_key(value: Any) -> Optional[str]:
+    """Normalize a field value into a posting-list key"""
+    if value is None:
+        return None
+    key = re.sub(r"[^a-z0-9]+", "-", str(value).lower()).strip("-")
+    return key[:100] or None
+
+
+def record_timestamp(record: Dict[str, Any]) -> float:
+    """Epoch seconds for a record's timestamp, 0.0 if missing or unparseable"""
+    value = record.get("timestamp")
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def field_value(record: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = record
+    for part in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def in_range(record: Dict[str, Any], field: str, low: Optional[float], high: Optional[float]) -> bool:
+    """Whether the record's normalized range for ``field`` overlaps [low, high]"""
+    min_path, max_path = RANGE_FIELDS[field]
+    value_min = field_value(record, min_path)
+    if value_min is None:
+        return False
+    value_max = field_value(record, max_path)
+    if low is not None and value_max is not None and value_max < low:
+        return False
+    return high is None or value_min <= high
+
+
+class ConversationIndex:
+    """On-disk indexes for the JSONL conversation store.
+
+    ``positions.idx`` holds one fixed-width entry per record, so a
+    record's sequence number is its entry number and its bytes can be
+    read with a single pread. Each value of an indexed field gets a
+    sorted posting list of sequence numbers under ``<field>/<key>.ids``.
+    Both are append-only and written by the store under its locks.
+
+    Positions carry the record's timestamp raised to at least the one
+    before it, so they stay sorted for ``time_bounds`` even when a
+    record is late, backfilled, or has no timestamp (it is filed under
+    the time it was stored). Indexes written before that was enforced
+    are fixed up once by ``ensure_monotonic``.
+    """
+
+    def __init__(self, directory: Path, max_open_postings: int = 128):
+        self.directory = Path(directory)
+        self.positions_path = self.directory / "positions.idx"
+        self.monotonic_marker = self.directory / ".monotonic"
+        self.max_open_postings = max_open_postings
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._positions_fd: Optional[int] = None
+        self._postings_fds: "OrderedDict[Path, int]" = OrderedDict()
+        self._dirty: set = set()
+
+    def _posting_path(self, field: str, key: str) -> Path:
+        return self.directory / field / f"{key}.ids"
+
+    def _append_fd(self, path: Path) -> int:
+        fd = self._postings_fds.pop(path, None)
+        if fd is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if len(self._postings_fds) >= self.max_open_postings:
+                _, oldest = self._postings_fds.popitem(last=False)
+                if oldest in self._dirty:
+                    os.fsync(oldest)
+                    self._dirty.discard(oldest)
+                os.close(oldest)
+        self._postings_fds[path] = fd
+        return fd
+
+    def _positions(self) -> int:
+        if self._positions_fd is None:
+            self._positions_fd = os.open(
+                self.positions_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644
+            )
+        return self._positions_fd
+
+    def count(self) -> int:
+        """Number of indexed records"""
+        try:
+            return os.stat(self.positions_path).st_size // POSITION.size
+        except FileNotFoundError:
+            return 0
+
+    def add(self, record: Dict[str, Any], segment: int, offset: int, length: int) -> int:
+        """Index a record that was just written. Returns its sequence number."""
+        positions_fd = self._positions()
+        seq = os.fstat(positions_fd).st_size // POSITION.size
+
+        # Postings first; the positions entry is the commit point
+        for field, path in INDEXED_FIELDS.items():
+            key = index_key(field_value(record, path))
+            if key:
+                fd = self._append_fd(self._posting_path(field, key))
+                os.write(fd, POSTING.pack(seq))
+                self._dirty.add(fd)
+
+        ts = record_timestamp(record)
+        if seq:
+            ts = max(ts, self.position(seq - 1, positions_fd)[0])
+        os.write(positions_fd, POSITION.pack(ts, segment, offset, length))
+        self._dirty.add(positions_fd)
+        return seq
+
+    def ensure_monotonic(self) -> int:
+        """Raise out-of-order timestamps in an older index in place. Returns entries changed.
+
+        Runs once per index (``.monotonic`` marks it done); the store
+        calls it under its locks before appending.
+        """
+        if self.monotonic_marker.exists():
+            return 0
+        changed = 0
+        if self.positions_path.exists():
+            # Not the append fd: pwrite on an O_APPEND fd appends on Linux
+            with open(self.positions_path, "r+b") as f:
+                fd = f.fileno()
+                count = os.fstat(fd).st_size // POSITION.size
+                last = float("-inf")
+                for start in range(0, count, CHUNK):
+                    chunk = os.pread(fd, min(CHUNK, count - start) * POSITION.size, start * POSITION.size)
+                    for i, (ts, segment, offset, length) in enumerate(POSITION.iter_unpack(chunk)):
+                        if ts < last:
+                            os.pwrite(fd, POSITION.pack(last, segment, offset, length), (start + i) * POSITION.size)
+                            changed += 1
+                        else:
+                            last = ts
+                if changed:
+                    os.fsync(fd)
+        self.monotonic_marker.touch()
+        return changed
+
+    def sync(self):
+        for fd in self._dirty:
+            os.fsync(fd)
+        self._dirty.clear()
+
+    def close(self):
+        self.sync()
+        for fd in self._postings_fds.values():
+            os.close(fd)
+        self._postings_fds.clear()
+        if self._positions_fd is not None:
+            os.close(self._positions_fd)
+            self._positions_fd = None
+
+    def position(self, seq: int, fd: Optional[int] = None) -> Tuple[float, int, int, int]:
+        """(timestamp, segment, offset, length) for a sequence number"""
+        if fd is None:
+            with open(self.positions_path, "rb") as f:
+                return self.position(seq, f.fileno())
+        return POSITION.unpack(os.pread(fd, POSITION.size, seq * POSITION.size))
+
+    def last_position(self) -> Optional[Tuple[float, int, int, int]]:
+        count = self.count()
+        if not count:
+            return None
+        return self.position(count - 1)
+
+    def time_bounds(self, fd: int, count: int, since: Optional[float], until: Optional[float]) -> Tuple[int, int]:
+        """Sequence range [lo, hi) whose timestamps fall within since/until.
+
+        Indexed timestamps never decrease (see ``add``), so a binary
+        search over positions is enough.
+        """
+        def first_at_least(value: float, strict: bool) -> int:
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                ts = self.position(mid, fd)[0]
+                if ts < value or (strict and ts == value):
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        lo = first_at_least(since, False) if since is not None else 0
+        hi = first_at_least(until, True) if until is not None else count
+        return lo, hi
+
+    def postings(self, field: str, value: Any, lo: int, hi: int, descending: bool = False) -> Iterator[int]:
+        """Yield sequence numbers for ``field == value`` within [lo, hi)"""
+        key = index_key(value)
+        path = self._posting_path(field, key) if key else None
+        if path is None or not path.exists():
+            return
+
+        with open(path, "rb") as f:
+            fd = f.fileno()
+            n = os.fstat(fd).st_size // POSTING.size
+
+            def seq_at(i: int) -> int:
+                return POSTING.unpack(os.pread(fd, POSTING.size, i * POSTING.size))[0]
+
+            def first_at_least(target: int) -> int:
+                a, b = 0, n
+                while a < b:
+                    mid = (a + b) // 2
+                    if seq_at(mid) < target:
+                        a = mid + 1
+                    else:
+                        b = mid
+                return a
+
+            start, stop = first_at_least(lo), first_at_least(hi)
+            if descending:
+                i = stop
+                while i > start:
+                    begin = max(start, i - CHUNK)
+                    chunk = os.pread(fd, (i - begin) * POSTING.size, begin * POSTING.size)
+                    yield from reversed([s for (s,) in POSTING.iter_unpack(chunk)])
+                    i = begin
+            else:
+                i = start
+                while i < stop:
+                    end = min(stop, i + CHUNK)
+                    chunk = os.pread(fd, (end - i) * POSTING.size, i * POSTING.size)
+                    yield from (s for (s,) in POSTING.iter_unpack(chunk))
+                    i = end
+
+
+def intersect(streams: List[Iterable[int]], descending: bool = False) -> Iterator[int]:
+    """Intersect sorted sequence streams, dropping duplicates"""
+    iterators = [iter(s) for s in streams]
+    try:
+        heads = [next(it) for it in iterators]
+    except StopIteration:
+        return
+
+    last = None
+    while True:
+        target = min(heads) if descending else max(heads)
+        try:
+            for i, it in enumerate(iterators):
+                while (heads[i] > target) if descending else (heads[i] < target):
+                    heads[i] = next(it)
+            if all(h == target for h in heads):
+                if target != last:
+                    yield target
+                    last = target
+                heads = [next(it) for it in iterators]
+        except StopIteration:
+            return
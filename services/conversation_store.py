@@ -0,0 +1,467 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from services.conversation_index import ConversationIndex, INDEXED_FIELDS, POSITION, RANGE_FIELDS, in_range, intersect
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+LEGACY_FILE = "data/conversations.json"
+
+
+def load_legacy(path: Path) -> Optional[List[Dict[str, Any]]]:
+    """Records in the old single-array JSON file, or None if it can't be read as one"""
+    try:
+        with open(path, "r") as f:
+            conversations = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Not migrating {path}: {e}")
+        return None
+    if not isinstance(conversations, list):
+        logger.error(f"Not migrating {path}: expected a JSON array")
+        return None
+    return [c for c in conversations if isinstance(c, dict)]
+
+
+class ConversationStore(ABC):
+    """Interface shared by the conversation storage backends.
+
+    Records are addressed by a 0-based sequence number in write order;
+    ``scan`` yields raw JSON lines and ``query`` pages through records
+    using that number as the cursor.
+    """
+
+    directory: Path
+
+    def __init__(self):
+        # Records waiting for the next ``append_async`` write, and the lock
+        # that serializes those writes; created on first use, in the running loop
+        self._async_batch: Optional[Tuple[List[Dict[str, Any]], asyncio.Future]] = None
+        self._async_commit_lock: Optional[asyncio.Lock] = None
+
+    @abstractmethod
+    def append(self, record: Dict[str, Any]):
+        """Append a single record"""
+
+    @abstractmethod
+    def append_many(self, records: List[Dict[str, Any]], sync: bool = True):
+        """Append several records in one write"""
+
+    @abstractmethod
+    def flush(self):
+        """Force any batched writes to disk"""
+
+    @abstractmethod
+    def close(self):
+        """Flush and release files or connections"""
+
+    @abstractmethod
+    def scan(self, start: int = 0, stop: Optional[int] = None, chunk: int = 256) -> Iterator[Tuple[int, bytes]]:
+        """Yield (sequence number, raw JSON line) from ``start`` in write order"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored records"""
+
+    @abstractmethod
+    def query(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 50,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        descending: bool = False,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Return one page of records and the cursor for the next page"""
+
+    @abstractmethod
+    def migrate_legacy(self, legacy_file: str = LEGACY_FILE) -> int:
+        """Import older data once. Returns records imported."""
+
+    def iter_records(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield stored records in write order, starting at sequence ``start``"""
+        for _, line in self.scan(start):
+            yield json.loads(line)
+
+    async def append_async(self, record: Dict[str, Any]):
+        """Append from the event loop without blocking it.
+
+        The write runs in a worker thread. Records that arrive while a
+        write is in progress are collected and committed together by
+        the next one, so bursts cost one write per batch, not per call.
+        """
+        loop = asyncio.get_running_loop()
+        pending = self._async_batch
+        if pending is None:
+            if self._async_commit_lock is None:
+                self._async_commit_lock = asyncio.Lock()
+            pending = self._async_batch = ([], loop.create_future())
+            loop.create_task(self._commit_async_batch())
+        records, done = pending
+        records.append(record)
+        await asyncio.shield(done)
+
+    async def _commit_async_batch(self):
+        async with self._async_commit_lock:
+            records, done = self._async_batch
+            self._async_batch = None
+            try:
+                await asyncio.to_thread(self.append_many, records, False)
+            except Exception as e:
+                done.set_exception(e)
+            else:
+                done.set_result(None)
+
+
+class JsonlConversationStore(ConversationStore):
+    """Segmented, append-only JSONL store for call records.
+
+    Each record is one line in the active segment. Appends never read
+    existing data, so the cost of a write does not depend on how many
+    calls are already stored. Segments rotate once they reach
+    ``max_segment_bytes`` and fsyncs are batched by count and time;
+    a write is on disk within ``fsync_interval`` even if nothing follows.
+    Every append also updates the on-disk ``ConversationIndex`` so
+    queries only read the records they return.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_segment_bytes: Optional[int] = None,
+        fsync_every: Optional[int] = None,
+        fsync_interval: Optional[float] = None,
+    ):
+        super().__init__()
+        self.directory = Path(directory or os.getenv("CONVERSATION_STORE_DIR", "data/conversations"))
+        self.max_segment_bytes = int(max_segment_bytes or os.getenv("CONVERSATION_SEGMENT_BYTES", 64 * 1024 * 1024))
+        self.fsync_every = int(fsync_every or os.getenv("CONVERSATION_FSYNC_EVERY", 32))
+        self.fsync_interval = float(fsync_interval or os.getenv("CONVERSATION_FSYNC_INTERVAL", 1.0))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._segment = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._sync_timer: Optional[threading.Timer] = None
+
+        self.index = ConversationIndex(self.directory / "index")
+        self._recover_index()
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+    def segments(self) -> List[int]:
+        """Return segment numbers in write order"""
+        numbers = []
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            try:
+                numbers.append(int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def _open_segment(self, number: int):
+        if self._fd is not None:
+            os.close(self._fd)
+        self._segment = number
+        self._fd = os.open(
+            self._segment_path(number),
+            os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o644,
+        )
+
+    def _ensure_segment(self, incoming: int) -> int:
+        """Open the active segment, following rotations made by other processes.
+
+        Returns the offset the next write will land at.
+        """
+        if self._fd is None:
+            existing = self.segments()
+            self._open_segment(existing[-1] if existing else 1)
+
+        while self._segment_path(self._segment + 1).exists():
+            self._open_segment(self._segment + 1)
+
+        size = os.fstat(self._fd).st_size
+        if size and size + incoming > self.max_segment_bytes:
+            os.fsync(self._fd)
+            self._open_segment(self._segment + 1)
+            size = 0
+        return size
+
+    def _recover_index(self):
+        """Index any records written after the last index entry (e.g. after a crash)"""
+        with self._lock, self._process_lock():
+            self.index.ensure_monotonic()
+            last = self.index.last_position()
+            if last is not None:
+                _, start_segment, offset, length = last
+                start_offset = offset + length
+            else:
+                start_segment, start_offset = 0, 0
+
+            for number in self.segments():
+                if number < start_segment:
+                    continue
+                path = self._segment_path(number)
+                offset = start_offset if number == start_segment else 0
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            # Torn trailing write; drop it so the next append starts clean
+                            os.truncate(path, offset)
+                            break
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            record = None
+                        if isinstance(record, dict):
+                            self.index.add(record, number, offset, len(line))
+                        offset += len(line)
+            self.index.sync()
+
+    @contextmanager
+    def _process_lock(self):
+        """Serialize appends across worker processes sharing the directory"""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.directory / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _maybe_fsync(self, force: bool = False):
+        now = time.monotonic()
+        if force or self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+            if self._fd is not None and self._unsynced:
+                os.fsync(self._fd)
+                self.index.sync()
+            self._unsynced = 0
+            self._last_sync = now
+        elif self._unsynced and self._sync_timer is None:
+            # Sync what's pending within fsync_interval even if no more appends come
+            self._sync_timer = threading.Timer(self.fsync_interval, self._sync_due)
+            self._sync_timer.daemon = True
+            self._sync_timer.start()
+
+    def _sync_due(self):
+        with self._lock:
+            self._sync_timer = None
+            self._maybe_fsync(force=True)
+
+    def _write(self, records: List[Dict[str, Any]]):
+        """Write records to the active segment. Caller holds both locks."""
+        for record in records:
+            line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+            offset = self._ensure_segment(len(line))
+            os.write(self._fd, line)
+            self.index.add(record, self._segment, offset, len(line))
+            self._unsynced += 1
+
+    def append(self, record: Dict[str, Any]):
+        """Append a single record"""
+        with self._lock, self._process_lock():
+            self._write([record])
+            self._maybe_fsync()
+
+    def append_many(self, records: List[Dict[str, Any]], sync: bool = True):
+        """Append several records; with ``sync`` they are fsynced before returning"""
+        with self._lock, self._process_lock():
+            self._write(records)
+            self._maybe_fsync(force=sync)
+
+    def flush(self):
+        """Force any batched writes to disk"""
+        with self._lock:
+            self._maybe_fsync(force=True)
+
+    def close(self):
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self._maybe_fsync(force=True)
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self.index.close()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    def scan(self, start: int = 0, stop: Optional[int] = None, chunk: int = 256) -> Iterator[Tuple[int, bytes]]:
+        """Yield (sequence number, raw JSON line) from ``start`` in write order.
+
+        Reads positions in fixed-size chunks and one segment at a time,
+        so memory use does not grow with the size of the store.
+        """
+        if stop is None:
+            stop = self.count()
+        segment_file = None
+        segment_number = None
+        try:
+            with open(self.index.positions_path, "rb") as positions:
+                seq = start
+                while seq < stop:
+                    end = min(stop, seq + chunk)
+                    data = os.pread(positions.fileno(), (end - seq) * POSITION.size, seq * POSITION.size)
+                    for _, segment, offset, length in POSITION.iter_unpack(data):
+                        if segment != segment_number:
+                            if segment_file is not None:
+                                segment_file.close()
+                            segment_file = open(self._segment_path(segment), "rb")
+                            segment_number = segment
+                        yield seq, os.pread(segment_file.fileno(), length, offset)
+                        seq += 1
+        except FileNotFoundError:
+            return
+        finally:
+            if segment_file is not None:
+                segment_file.close()
+
+    def count(self) -> int:
+        """Number of stored records"""
+        return self.index.count()
+
+    def query(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 50,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        descending: bool = False,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Return one page of records and the cursor for the next page.
+
+        ``since``/``until`` are epoch seconds (inclusive). ``filters``
+        maps keys of ``INDEXED_FIELDS`` to values. ``ranges`` maps keys
+        of ``RANGE_FIELDS`` to (low, high) bounds that the record's
+        normalized range must overlap; they are checked after reading
+        the record. The cursor is the sequence number of the first
+        record of the next page.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        unknown = set(filters) - set(INDEXED_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported filter(s): {', '.join(sorted(unknown))}")
+        ranges = {k: v for k, v in (ranges or {}).items() if v != (None, None)}
+        unknown = set(ranges) - set(RANGE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported range(s): {', '.join(sorted(unknown))}")
+
+        records: List[Dict[str, Any]] = []
+        next_cursor = None
+        segment_files: Dict[int, Any] = {}
+        try:
+            with open(self.index.positions_path, "rb") as positions:
+                pos_fd = positions.fileno()
+                count = os.fstat(pos_fd).st_size // POSITION.size
+                lo, hi = self.index.time_bounds(pos_fd, count, since, until)
+                if cursor is not None:
+                    if descending:
+                        hi = min(hi, cursor + 1)
+                    else:
+                        lo = max(lo, cursor)
+
+                if filters:
+                    candidates = intersect(
+                        [self.index.postings(f, v, lo, hi, descending) for f, v in filters.items()],
+                        descending,
+                    )
+                else:
+                    candidates = iter(range(hi - 1, lo - 1, -1) if descending else range(lo, hi))
+
+                for seq in candidates:
+                    ts, segment, offset, length = self.index.position(seq, pos_fd)
+                    if (since is not None and ts < since) or (until is not None and ts > until):
+                        continue
+                    if len(records) == limit and not ranges:
+                        next_cursor = seq
+                        break
+                    if segment not in segment_files:
+                        segment_files[segment] = open(self._segment_path(segment), "rb")
+                    record = json.loads(os.pread(segment_files[segment].fileno(), length, offset))
+                    if ranges and not all(in_range(record, f, lo, hi) for f, (lo, hi) in ranges.items()):
+                        continue
+                    if len(records) == limit:
+                        next_cursor = seq
+                        break
+                    records.append(record)
+        except FileNotFoundError:
+            return [], None
+        finally:
+            for f in segment_files.values():
+                f.close()
+
+        return records, next_cursor
+
+    def migrate_legacy(self, legacy_file: str = LEGACY_FILE) -> int:
+        """Import the old single-array JSON file once. Returns records imported."""
+        marker = self.directory / ".migrated"
+        legacy_path = Path(legacy_file)
+        if marker.exists() or not legacy_path.exists():
+            return 0
+
+        with self._lock, self._process_lock():
+            if marker.exists():
+                return 0
+            conversations = load_legacy(legacy_path)
+            if conversations is None:
+                # Left unmarked, so a repaired file is imported on the next start
+                return 0
+
+            self._write(conversations)
+            self._maybe_fsync(force=True)
+            marker.write_text(f"{legacy_path}\n{len(conversations)}\n")
+        return len(conversations)
+
+
+_default_store: Optional[ConversationStore] = None
+_default_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Return the process-wide store, migrating older data on first use.
+
+    ``CONVERSATION_STORE`` selects the backend: ``sqlite`` (default) or
+    ``jsonl``.
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            backend = os.getenv("CONVERSATION_STORE", "sqlite").lower()
+            if backend == "sqlite":
+                from services.sqlite_store import SqliteConversationStore
+                _default_store = SqliteConversationStore()
+            elif backend == "jsonl":
+                _default_store = JsonlConversationStore()
+            else:
+                raise ValueError(f"Unknown CONVERSATION_STORE backend: {backend}")
+            _default_store.migrate_legacy()
+        return _default_store
@@ -1,9 +1,12 @@
 import gspread
 from google.oauth2.service_account import Credentials
+import logging
 import os
 from datetime import datetime
 from typing import Dict, Any
 
+logger = logging.getLogger(__name__)
+
 class GoogleSheetsService:
     def __init__(self):
         # Define the scope
@@ -35,12 +38,12 @@ class GoogleSheetsService:
                 self.sheet = self.client.open_by_key(self.spreadsheet_id).sheet1
             
         except Exception as e:
-            print(f" Error initializing Google Sheets: {e}")
+            logger.error(f"Error initializing Google Sheets: {e}")
     
     def log_call(self, conversation_data: Dict[str, Any]):
         """Log call data to Google Sheet"""
         if not self.sheet:
-            print(" Google Sheets not configured, skipping...")
+            logger.warning("Google Sheets not configured, skipping...")
             return
         
         try:
@@ -67,10 +70,10 @@ class GoogleSheetsService:
             
             # Append to sheet
             self.sheet.append_row(row)
-            print(f" Call logged to Google Sheets: {conversation_data.get('call_id')}")
+            logger.info(f"Call logged to Google Sheets: {conversation_data.get('call_id')}")
             
         except Exception as e:
-            print(f" Error logging to Google Sheets: {e}")
+            logger.error(f"Error logging to Google Sheets: {e}")
 
     def create_header_row(self):
         """Create header row in Google Sheet"""
@@ -108,6 +111,6 @@ class GoogleSheetsService:
                     "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}},
                     "horizontalAlignment": "CENTER"
                 })
-                print(" Header row created in Google Sheet")
+                logger.info("Header row created in Google Sheet")
         except Exception as e:
-            print(f"Error creating header: {e}")
\ No newline at end of file
+            logger.error(f"Error creating header: {e}")
\ No newline at end of file
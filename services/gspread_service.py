@@ -1,84 +1,183 @@
 import gspread
 from google.oauth2.service_account import Credentials
+import logging
 import os
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from utils.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+HEADERS = [
+    "Timestamp",
+    "Call ID",
+    "Caller Name",
+    "Phone",
+    "Email",
+    "Role",
+    "Company",
+    "Inquiry Type",
+    "Asset Type",
+    "Location",
+    "Deal Size",
+    "Square Footage",
+    "Urgency",
+    "Duration (sec)",
+    "Summary",
+    "Additional Details",
+    "Recording URL",
+    "Call Status"
+]
+# Repeat-caller linkage; appended only with SHEETS_CALLER_COLUMNS, since it changes the sheet's layout
+CALLER_HEADERS = ["Caller ID", "Prior Calls"]
+
+def header_range(headers: List[str]) -> str:
+    return f"A1:{chr(ord('A') + len(headers) - 1)}1"
+
+def build_row(conversation_data: Dict[str, Any], caller_columns: bool = False) -> List[Any]:
+    """Build the sheet row for a call, one value per ``HEADERS`` column (plus ``CALLER_HEADERS``)"""
+    caller_info = conversation_data.get("caller_info", {})
+    property_details = conversation_data.get("property_details", {})
+    
+    # Rows may be written well after the call when batched, so prefer the call's own timestamp
+    timestamp = conversation_data.get("timestamp")
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    elif isinstance(timestamp, str) and timestamp:
+        timestamp = timestamp[:19].replace("T", " ")
+    else:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
+    row = [
+        timestamp,
+        conversation_data.get("call_id", ""),
+        caller_info.get("name", ""),
+        caller_info.get("phone", ""),
+        caller_info.get("email", ""),
+        caller_info.get("role", ""),
+        caller_info.get("company", ""),
+        conversation_data.get("inquiry_type", ""),
+        property_details.get("asset_type", ""),
+        property_details.get("location", ""),
+        property_details.get("deal_size", ""),
+        property_details.get("square_footage", ""),
+        property_details.get("urgency", ""),
+        conversation_data.get("duration", 0),
+        conversation_data.get("conversation_summary", ""),
+        property_details.get("additional_details", ""),
+        conversation_data.get("recording_url", ""),
+        "Completed"
+    ]
+    if caller_columns:
+        row += [conversation_data.get("caller_id") or "", conversation_data.get("prior_calls", 0)]
+    return row
 
 class GoogleSheetsLogger:
+    """Google Sheets client that connects on first use, never at construction.
+
+    Authorizing and opening the spreadsheet takes several blocking round
+    trips, so they happen in ``connect()`` (run in a background thread at
+    startup) or lazily on the first append. Both go through a circuit
+    breaker, so an unreachable Google API fails fast instead of stalling
+    every delivery.
+    """
+
     def __init__(self):
         self.credentials_file = os.getenv("GOOGLE_CREDENTIALS_FILE", "google_credentials.json")
         self.spreadsheet_id = os.getenv("GOOGLE_SPREADSHEET_ID", "")  
         self.sheet_name = os.getenv("GOOGLE_SHEET_NAME", "Realflow Calls")
+        self.caller_columns = os.getenv("SHEETS_CALLER_COLUMNS", "false").lower() in ("1", "true", "yes")
         self.client = None
         self.sheet = None
-        
-        if os.path.exists(self.credentials_file):
-            self._initialize()
+        self.breaker = CircuitBreaker(
+            "Google Sheets",
+            failure_threshold=int(os.getenv("SHEETS_BREAKER_FAILURES", 5)),
+            reset_timeout=float(os.getenv("SHEETS_BREAKER_RESET", 60.0))
+        )
+        self._connect_lock = threading.Lock()
+    
+    @property
+    def headers(self) -> List[str]:
+        return HEADERS + CALLER_HEADERS if self.caller_columns else HEADERS
+    
+    def build_row(self, conversation_data: Dict[str, Any]) -> List[Any]:
+        return build_row(conversation_data, self.caller_columns)
+    
+    @property
+    def configured(self) -> bool:
+        """Whether rows should be queued for Sheets at all"""
+        return self.sheet is not None or os.path.exists(self.credentials_file)
+    
+    def connect(self) -> bool:
+        """Open the worksheet if it is not open yet. Never raises."""
+        if self.sheet is not None:
+            return True
+        if not self.configured:
+            return False
+        try:
+            self._ensure_sheet()
+            return True
+        except Exception as e:
+            logger.error(f"Google Sheets initialization error: {str(e)}")
+            return False
+    
+    def _ensure_sheet(self):
+        with self._connect_lock:
+            if self.sheet is None:
+                self.breaker.call(self._initialize)
+        return self.sheet
     
     def _initialize(self):
-        """Initialize Google Sheets connection"""
+        """Initialize Google Sheets connection. Raises on failure."""
+        scopes = [
+            'https://www.googleapis.com/auth/spreadsheets',
+            'https://www.googleapis.com/auth/drive'
+        ]
+        
+        creds = Credentials.from_service_account_file(
+            self.credentials_file,
+            scopes=scopes
+        )
+        
+        client = gspread.authorize(creds)
+        
+        # Open spreadsheet
+        if self.spreadsheet_id:
+            spreadsheet = client.open_by_key(self.spreadsheet_id)
+        else:
+            # Create new spreadsheet if ID not provided
+            spreadsheet = client.create("Realflow Call Logs")
+            self.spreadsheet_id = spreadsheet.id
+            logger.info(f"Created new spreadsheet: {spreadsheet.url}")
+        
+        # Get or create worksheet
         try:
-            scopes = [
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            creds = Credentials.from_service_account_file(
-                self.credentials_file,
-                scopes=scopes
+            sheet = spreadsheet.worksheet(self.sheet_name)
+            # With SHEETS_CALLER_COLUMNS on, an existing 18-column sheet gets the extra headers
+            header = sheet.row_values(1)
+            if header and header != self.headers and self.headers[:len(header)] == header:
+                self._setup_headers(sheet)
+        except gspread.exceptions.WorksheetNotFound:
+            sheet = spreadsheet.add_worksheet(
+                title=self.sheet_name,
+                rows=100,
+                cols=20
             )
-            
-            self.client = gspread.authorize(creds)
-            
-            # Open spreadsheet
-            if self.spreadsheet_id:
-                spreadsheet = self.client.open_by_key(self.spreadsheet_id)
-            else:
-                # Create new spreadsheet if ID not provided
-                spreadsheet = self.client.create("Realflow Call Logs")
-                self.spreadsheet_id = spreadsheet.id
-                print(f"📊 Created new spreadsheet: {spreadsheet.url}")
-            
-            # Get or create worksheet
-            try:
-                self.sheet = spreadsheet.worksheet(self.sheet_name)
-            except gspread.exceptions.WorksheetNotFound:
-                self.sheet = spreadsheet.add_worksheet(
-                    title=self.sheet_name,
-                    rows=100,
-                    cols=20
-                )
-                self._setup_headers()
-            
-        except Exception as e:
-            print(f"Google Sheets initialization error: {str(e)}")
+            self._setup_headers(sheet)
+        
+        self.client = client
+        self.sheet = sheet
+        logger.info(f"Connected to Google Sheets worksheet '{self.sheet_name}'")
     
-    def _setup_headers(self):
+    def _setup_headers(self, sheet):
         """Setup spreadsheet headers"""
-        headers = [
-            "Timestamp",
-            "Call ID",
-            "Caller Name",
-            "Phone",
-            "Email",
-            "Role",
-            "Company",
-            "Inquiry Type",
-            "Asset Type",
-            "Location",
-            "Deal Size",
-            "Square Footage",
-            "Urgency",
-            "Duration (sec)",
-            "Summary",
-            "Additional Details",
-            "Recording URL",
-            "Call Status"
-        ]
-        self.sheet.update('A1:R1', [headers])
+        headers = self.headers
+        sheet.update(header_range(headers), [headers])
         
         # Format header row
-        self.sheet.format('A1:R1', {
+        sheet.format(header_range(headers), {
             "backgroundColor": {"red": 0.2, "green": 0.6, "blue": 0.9},
             "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}},
             "horizontalAlignment": "CENTER"
@@ -86,43 +185,42 @@ class GoogleSheetsLogger:
     
     def log_call(self, conversation_data: Dict[str, Any]) -> bool:
         """Log call data to Google Sheets"""
-        if not self.sheet:
-            print("Google Sheets not initialized")
+        return self.log_calls([conversation_data])
+
+    def log_calls(self, conversations: List[Dict[str, Any]]) -> bool:
+        """Log several calls with a single append request"""
+        if not self.configured:
             return False
         
         try:
-            caller_info = conversation_data.get("caller_info", {})
-            property_details = conversation_data.get("property_details", {})
-            
-            row_data = [
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                conversation_data.get("call_id", ""),
-                caller_info.get("name", ""),
-                caller_info.get("phone", ""),
-                caller_info.get("email", ""),
-                caller_info.get("role", ""),
-                caller_info.get("company", ""),
-                conversation_data.get("inquiry_type", ""),
-                property_details.get("asset_type", ""),
-                property_details.get("location", ""),
-                property_details.get("deal_size", ""),
-                property_details.get("square_footage", ""),
-                property_details.get("urgency", ""),
-                conversation_data.get("duration", 0),
-                conversation_data.get("conversation_summary", ""),
-                property_details.get("additional_details", ""),
-                conversation_data.get("recording_url", ""),
-                "Completed"
-            ]
-            
-            self.sheet.append_row(row_data)
-            print(f"Logged to Google Sheets: {conversation_data.get('call_id')}")
+            self.append_rows([self.build_row(c) for c in conversations])
+            logger.info(f"Logged {len(conversations)} call(s) to Google Sheets")
             return True
             
         except Exception as e:
-            print(f"Error logging to Google Sheets: {str(e)}")
+            logger.error(f"Error logging to Google Sheets: {str(e)}")
             return False
     
+    def append_rows(self, rows: List[List[Any]]) -> int:
+        """Append rows in one values.append request. Raises on API errors.
+
+        Connects first if needed. Raises ``CircuitOpenError`` while the
+        breaker is open; quota (429) errors do not count as failures.
+        """
+        sheet = self._ensure_sheet()
+        self.breaker.before_call()
+        try:
+            sheet.append_rows(rows)
+        except Exception as e:
+            if getattr(getattr(e, "response", None), "status_code", None) == 429:
+                # Throttled, but reachable
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure(e)
+            raise
+        self.breaker.record_success()
+        return len(rows)
+    
     def get_spreadsheet_url(self) -> str:
         """Get the spreadsheet URL"""
         if self.client and self.spreadsheet_id:
@@ -0,0 +1,343 @@
+import csv
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from services.conversation_index import index_key
+from utils.normalize import canonical_location, parse_square_feet
+
+# Spoken asset types -> the asset_type keys used in listings
+ASSET_SYNONYMS = {
+    "warehouse": "industrial",
+    "distribution": "industrial",
+    "logistics": "industrial",
+    "flex": "industrial",
+    "manufacturing": "industrial",
+    "office-space": "office",
+    "storefront": "retail",
+    "shopping-center": "retail",
+    "apartment": "multifamily",
+    "apartments": "multifamily",
+    "apartment-building": "multifamily",
+    "multi-family": "multifamily",
+    "lot": "land",
+    "vacant-land": "land",
+}
+INACTIVE_STATUSES = {"sold", "leased", "withdrawn", "inactive", "off-market"}
+SIZE_TOLERANCE = 0.2
+MAX_RESULTS = 5
+
+
+# Listing files repeat the same few values in every row
+_key = lru_cache(maxsize=4096)(index_key)
+
+
+@lru_cache(maxsize=4096)
+def asset_key(asset_type: Any) -> Optional[str]:
+    key = _key(asset_type)
+    return ASSET_SYNONYMS.get(key, key) if key else None
+
+
+@lru_cache(maxsize=4096)
+def geo_keys(location: Any) -> Tuple[str, ...]:
+    """Posting keys for a location, most specific first: market, state, raw text"""
+    keys = []
+    canonical = canonical_location(location)
+    if canonical:
+        if canonical.get("market"):
+            keys.append(f"market:{canonical['market']}")
+        if canonical.get("state"):
+            keys.append(f"state:{canonical['state']}")
+    raw = _key(location)
+    if raw:
+        keys.append(f"text:{raw}")
+    return tuple(keys)
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        number = float(str(value).replace(",", "").replace("$", ""))
+    except ValueError:
+        return None
+    # "inf" and "nan" parse as floats but aren't sizes or counts
+    return number if math.isfinite(number) else None
+
+
+def _size(listing: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
+    low = _number(listing.get("square_feet_min") or listing.get("square_feet"))
+    high = _number(listing.get("square_feet_max")) or low
+    if low is None:
+        parsed = parse_square_feet(listing.get("square_feet") or listing.get("square_footage"))
+        if parsed:
+            low, high = parsed
+    return low, high if high is not None else low
+
+
+def describe(listing: Dict[str, Any]) -> str:
+    """One spoken-friendly line for a listing"""
+    parts = []
+    if listing["square_feet_min"] is not None:
+        if listing["square_feet_max"] != listing["square_feet_min"]:
+            parts.append(f"{listing['square_feet_min']:,.0f} to {listing['square_feet_max']:,.0f} square feet")
+        else:
+            parts.append(f"{listing['square_feet_min']:,.0f} square feet")
+    parts.append(f"{listing.get('asset_type') or 'property'}")
+    where = listing.get("address") or listing.get("location")
+    if where:
+        parts.append(f"at {where}")
+    if listing.get("listing_type"):
+        parts.append(f"for {listing['listing_type']}")
+    if listing.get("price"):
+        parts.append(f"asking {listing['price']}")
+    return " ".join(parts)
+
+
+class _Posting:
+    """Listing ids for one key, sorted by minimum square footage"""
+
+    __slots__ = ("sizes", "ids", "max_ratio")
+
+    def __init__(self, entries: List[Tuple[float, int]], max_ratio: float):
+        entries.sort()
+        self.sizes = [size for size, _ in entries]
+        self.ids = [listing_id for _, listing_id in entries]
+        # Largest max/min of any divisible listing, so a minimum-size bound stays a bisect
+        self.max_ratio = max_ratio
+
+    def bounds(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        """Slice of ids whose size range may overlap [low, high]; callers re-check the exact bounds"""
+        start = 0 if low is None else bisect_left(self.sizes, low / self.max_ratio)
+        end = len(self.sizes) if high is None else bisect_right(self.sizes, high)
+        return start, end
+
+
+class _Snapshot:
+    """Immutable in-memory indexes over one version of the listings file"""
+
+    def __init__(self, listings: List[Dict[str, Any]], version: Tuple[float, int]):
+        self.listings = listings
+        self.version = version
+        self.loaded_at = time.time()
+
+        groups: Dict[str, List[Tuple[float, int]]] = {}
+        ratios: Dict[str, float] = {}
+        for listing_id, listing in enumerate(listings):
+            low, high = listing["square_feet_min"], listing["square_feet_max"]
+            # Unsized listings sort last, so any size filter excludes them
+            size = low if low is not None else float("inf")
+            ratio = high / low if low else 1.0
+            asset, geo = listing["_asset"], listing["_geo"]
+            keys = ["*", *geo]
+            if asset:
+                keys.append(asset)
+                # Asset type within a geography is the common spoken query; give it its own list
+                keys.extend(f"{asset}|{g}" for g in geo)
+            for key in keys:
+                groups.setdefault(key, []).append((size, listing_id))
+                ratios[key] = max(ratios.get(key, 1.0), ratio)
+        self.postings = {key: _Posting(entries, ratios[key]) for key, entries in groups.items()}
+
+    def posting(self, key: Optional[str]) -> Optional[_Posting]:
+        return self.postings.get(key) if key else None
+
+
+def _read_listings(path: Path) -> List[Dict[str, Any]]:
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            rows: Iterable[Dict[str, Any]] = list(csv.DictReader(f))
+    else:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rows = data.get("listings", []) if isinstance(data, dict) else data
+
+    listings = []
+    for row in rows:
+        if _key(row.get("status")) in INACTIVE_STATUSES:
+            continue
+        listing = {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items() if v not in (None, "")}
+        listing["square_feet_min"], listing["square_feet_max"] = _size(listing)
+        listing["listing_type"] = _key(listing.get("listing_type"))
+        listing["_asset"] = asset_key(listing.get("asset_type"))
+        listing["_geo"] = geo_keys(listing.get("location"))
+        listings.append(listing)
+    return listings
+
+
+class InventoryIndex:
+    """Property listings held in memory for in-call lookups.
+
+    Listings are read from a CSV or JSON file (``INVENTORY_FILE``) into
+    posting lists keyed by asset type, market, state and "*", each kept
+    sorted by square footage, so a search is a dictionary lookup plus a
+    bisect on the most selective list. When the file's mtime or size
+    changes the indexes are rebuilt on a background thread and swapped
+    in whole; searches keep using the previous snapshot until then.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: Optional[float] = None):
+        self.path = Path(path or os.getenv("INVENTORY_FILE", "data/listings.csv"))
+        self.check_interval = float(check_interval if check_interval is not None else os.getenv("INVENTORY_CHECK_INTERVAL", 2))
+        self._snapshot: Optional[_Snapshot] = None
+        self._lock = threading.Lock()
+        self._reloading = False
+        self._last_check = 0.0
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def _version(self) -> Optional[Tuple[float, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime, st.st_size
+
+    def reload(self) -> bool:
+        """Rebuild the indexes if the file changed. Returns True when a new snapshot was loaded."""
+        version = self._version()
+        current = self._snapshot
+        if version is None or (current is not None and current.version == version):
+            return False
+        try:
+            snapshot = _Snapshot(_read_listings(self.path), version)
+        except (OSError, ValueError, csv.Error) as e:
+            self.last_error = str(e)
+            return False
+        self._snapshot = snapshot
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def _background_reload(self):
+        try:
+            self.reload()
+        finally:
+            self._reloading = False
+
+    def check(self):
+        """Start a background reload when the file changed; cheap enough to call per search"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        version = self._version()
+        current = self._snapshot
+        if version is None or (current is not None and current.version == version):
+            return
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._background_reload, name="inventory-reload", daemon=True).start()
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def search(
+        self,
+        asset_type: Optional[str] = None,
+        location: Optional[str] = None,
+        min_square_feet: Optional[float] = None,
+        max_square_feet: Optional[float] = None,
+        listing_type: Optional[str] = None,
+        limit: int = MAX_RESULTS,
+    ) -> List[Dict[str, Any]]:
+        """Available listings matching every given criterion, closest in size first"""
+        self.check()
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+
+        asset = asset_key(asset_type)
+        geo = None
+        if location:
+            geo = next((key for key in geo_keys(location) if key in snapshot.postings), None)
+            if geo is None:
+                return []
+        key = f"{asset}|{geo}" if asset and geo else asset or geo or "*"
+        posting = snapshot.posting(key)
+        if posting is None:
+            return []
+
+        low, high = min_square_feet, max_square_feet
+        if low is not None:
+            low *= 1 - SIZE_TOLERANCE
+        if high is not None:
+            high *= 1 + SIZE_TOLERANCE
+        sized = low is not None or high is not None
+        listing_type = index_key(listing_type)
+
+        matches = []
+        start, end = posting.bounds(low, high)
+        for listing_id in posting.ids[start:end]:
+            listing = snapshot.listings[listing_id]
+            if listing_type and listing["listing_type"] and listing["listing_type"] != listing_type:
+                continue
+            if low is not None and (listing["square_feet_max"] or 0) < low:
+                continue
+            if high is not None and (listing["square_feet_min"] is None or listing["square_feet_min"] > high):
+                continue
+            matches.append(listing_id)
+            if not sized and len(matches) == limit:
+                break
+
+        if sized:
+            if min_square_feet is None or max_square_feet is None:
+                target = min_square_feet if min_square_feet is not None else max_square_feet
+            else:
+                target = (min_square_feet + max_square_feet) / 2
+            matches = heapq.nsmallest(
+                limit, matches, key=lambda i: abs((snapshot.listings[i]["square_feet_min"] or 0) - target)
+            )
+        return [
+            {k: v for k, v in snapshot.listings[i].items() if not k.startswith("_")}
+            for i in matches[:limit]
+        ]
+
+    def search_tool(self, arguments: Dict[str, Any]) -> str:
+        """Answer a ``search_inventory`` tool call with text the assistant can read out"""
+        if not self.loaded:
+            self.check()
+            return "The listings database is not available right now. Offer to have a broker follow up with options."
+
+        low = _number(arguments.get("min_square_feet"))
+        high = _number(arguments.get("max_square_feet"))
+        if low is None and high is None and arguments.get("square_feet"):
+            parsed = parse_square_feet(arguments["square_feet"])
+            if parsed:
+                low, high = parsed
+        limit = int(_number(arguments.get("limit")) or MAX_RESULTS)
+
+        listings = self.search(
+            asset_type=arguments.get("asset_type"),
+            location=arguments.get("location"),
+            min_square_feet=low,
+            max_square_feet=high,
+            listing_type=arguments.get("listing_type"),
+            limit=max(1, min(limit, MAX_RESULTS)),
+        )
+        if not listings:
+            return "No available listings match that right now. Offer to have a broker follow up as new space comes up."
+        lines = [f"{i}. {describe(listing)}" for i, listing in enumerate(listings, 1)]
+        return f"Found {len(listings)} matching listing(s):\n" + "\n".join(lines)
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "file": str(self.path),
+            "loaded": snapshot is not None,
+            "listings": len(snapshot.listings) if snapshot else 0,
+            "keys": len(snapshot.postings) if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,396 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from services.conversation_index import INDEXED_FIELDS, field_value, index_key, record_timestamp
+from services.conversation_store import ConversationStore
+
+# Query field prefix -> FTS column
+FIELDS = {
+    "summary": "summary",
+    "details": "details",
+    "additional_details": "details",
+    "transcript": "transcript",
+}
+# Summary matches outrank details, which outrank a passing mention in the transcript
+WEIGHTS = {"summary": 3.0, "details": 2.0, "transcript": 1.0}
+KEY_COLUMNS = {field: f"{field}_key" for field in INDEXED_FIELDS}
+MAX_TEXT_CHARS = 200_000
+# Words in nearly every call carry no ranking weight, and BM25 would read their
+# whole posting list to find that out; dropped unless quoted or all that's left
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from had has have i in is it its me my of on or our so that "
+    "the their them they this to was we were what when where which who will with you your".split()
+)
+SNIPPET_CHARS = 160
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS calls (
+    seq INTEGER PRIMARY KEY,
+    call_id TEXT,
+    ts REAL,
+    {", ".join(f"{c} TEXT" for c in KEY_COLUMNS.values())}
+);
+{"".join(f"CREATE INDEX IF NOT EXISTS calls_{c} ON calls ({c});" for c in KEY_COLUMNS.values())}
+CREATE VIRTUAL TABLE IF NOT EXISTS call_text USING fts5(
+    {", ".join(WEIGHTS)},
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# -exclude, field:term, "a phrase", word, word* (prefix)
+_TOKEN = re.compile(r'(-)?(?:([a-z_]+):)?(?:"([^"]*)"?|(\S+))', re.IGNORECASE)
+_WORD = re.compile(r"\w+")
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _parse(query: str) -> Iterator[Tuple[bool, Optional[str], Optional[List[str]], bool, bool]]:
+    """(excluded, column, words, is prefix, is quoted) per query term; None words for an OR"""
+    for match in _TOKEN.finditer(query or ""):
+        negate, field, phrase, word = match.groups()
+        if word is not None and word == "OR" and not field and not negate:
+            yield False, None, None, False, False
+            continue
+        column = FIELDS.get(field.lower()) if field else None
+        text = phrase if phrase is not None else word
+        if field and column is None:
+            # Not a field we index; "field:" is just more text
+            text = f"{field} {text}"
+        words = _WORD.findall(text)
+        if words:
+            yield bool(negate), column, words, phrase is None and word.endswith("*"), phrase is not None
+
+
+def _is_stopword(words: List[str], prefix: bool, quoted: bool) -> bool:
+    return len(words) == 1 and not prefix and not quoted and words[0].lower() in STOPWORDS
+
+
+def compile_query(query: str) -> Optional[str]:
+    """Translate a search box query into an FTS5 expression.
+
+    Supports words (all must match), ``"exact phrases"``, ``word*``
+    prefixes, ``OR`` between terms, ``-word`` exclusions and
+    ``summary:``/``details:``/``transcript:`` field prefixes. Every
+    term is quoted, so punctuation in the input can't produce an FTS5
+    syntax error. Returns None when nothing searchable is left.
+    """
+    terms: List[str] = []
+    excluded: List[str] = []
+    pending_or = False
+    parsed = list(_parse(query))
+    # Bare stopwords only count when the query has nothing else
+    if any(ws and not negate and not _is_stopword(ws, prefix, quoted) for negate, _, ws, prefix, quoted in parsed):
+        parsed = [p for p in parsed if not (p[2] and _is_stopword(*p[2:]))]
+    for negate, column, words, prefix, _ in parsed:
+        if words is None:
+            pending_or = bool(terms)
+            continue
+        term = _quote(" ".join(words))
+        if prefix:
+            term += "*"
+        if column:
+            term = f"{column} : {term}"
+        if negate:
+            excluded.append(term)
+        elif pending_or:
+            terms[-1] = f"{terms[-1]} OR {term}"
+            pending_or = False
+        else:
+            terms.append(term)
+    if not terms:
+        return None
+    expression = " AND ".join(f"({t})" if " OR " in t else t for t in terms)
+    if excluded:
+        expression = f"({expression}) NOT ({' OR '.join(excluded)})"
+    return expression
+
+
+def highlighter(query: str) -> Optional["re.Pattern"]:
+    """Pattern for the words a query searched for, matching stemmed and prefixed forms"""
+    words = {w.lower() for negate, _, ws, _, _ in _parse(query) if ws and not negate for w in ws}
+    if not words:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)) + r")\w*", re.IGNORECASE)
+
+
+def make_snippet(texts: Dict[str, str], pattern: Optional["re.Pattern"]) -> Optional[str]:
+    """A short excerpt around the first match, from the highest-weighted field that has one"""
+    if pattern is None:
+        return None
+    for column in WEIGHTS:
+        text = texts.get(column) or ""
+        match = pattern.search(text)
+        if match is None:
+            continue
+        start = max(0, match.start() - SNIPPET_CHARS // 3)
+        if start:
+            start = text.find(" ", start, match.start()) + 1 or match.start()
+        end = min(len(text), start + SNIPPET_CHARS)
+        if end < len(text):
+            end = text.rfind(" ", match.end(), end) if text.rfind(" ", match.end(), end) > 0 else end
+        excerpt = pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", text[start:end])
+        return ("…" if start else "") + excerpt + ("…" if end < len(text) else "")
+    return None
+
+
+def _transcript_text(document: Dict[str, Any]) -> str:
+    turns = document.get("turns") or []
+    if turns:
+        return "\n".join(turn.get("text") or "" for turn in turns)
+    return document.get("text") or ""
+
+
+class SearchIndex:
+    """Full-text search over call summaries, details and transcripts.
+
+    Backed by an SQLite FTS5 table in its own database
+    (``SEARCH_DB_PATH``), ranked by BM25 with summary matches weighted
+    above details and transcripts; the most recent ``SEARCH_CANDIDATES``
+    matches are ranked. ``sync`` indexes records written to
+    the conversation store since the last call, by sequence number, the
+    same way analytics catches up; the webhook calls it after each
+    report, so new calls are searchable as soon as they are stored.
+    Transcripts are read from the blob store. The sequence number
+    indexed so far lives in the database, and each batch is written
+    under ``BEGIN IMMEDIATE``, so worker processes sharing the file
+    never index a call twice.
+    """
+
+    def __init__(
+        self,
+        store: ConversationStore,
+        blob_store=None,
+        path: Optional[str] = None,
+        candidates: Optional[int] = None,
+        timeout: float = 30.0,
+    ):
+        self.store = store
+        self.blob_store = blob_store
+        self.path = Path(path or os.getenv("SEARCH_DB_PATH", "data/search.db"))
+        self.candidates = int(candidates or os.getenv("SEARCH_CANDIDATES", 2000))
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conn = self._connect()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            # Persist the column weights as the table's default ranking; rewriting the
+            # setting while another worker has the table open invalidates its statements
+            rank = f"bm25({', '.join(str(w) for w in WEIGHTS.values())})"
+            self._conn.execute("BEGIN IMMEDIATE")
+            current = self._conn.execute("SELECT v FROM call_text_config WHERE k = 'rank'").fetchone()
+            if current is None or current[0] != rank:
+                self._conn.execute("INSERT INTO call_text (call_text, rank) VALUES ('rank', ?)", (rank,))
+            self._conn.execute("COMMIT")
+        self.indexed = self._indexed_seq(self._conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @staticmethod
+    def _indexed_seq(conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _transcripts(self, records: List[Dict[str, Any]]) -> Dict[str, str]:
+        """call_id -> transcript text, from the blob store or (older records) the record itself"""
+        texts: Dict[str, str] = {}
+        refs = {}
+        if self.blob_store is not None:
+            refs = self.blob_store.refs(f"{r.get('call_id')}/transcript" for r in records)
+        for record in records:
+            call_id = record.get("call_id")
+            ref = refs.get(f"{call_id}/transcript")
+            if ref and "digest" in ref:
+                content = self.blob_store.get(ref["digest"])
+                if content:
+                    texts[call_id] = _transcript_text(json.loads(content))
+            elif record.get("transcript"):
+                texts[call_id] = _transcript_text({"turns": record["transcript"]})
+        return texts
+
+    def _insert(self, batch: List[Tuple[int, bytes]]):
+        records = [(seq, json.loads(line)) for seq, line in batch]
+        transcripts = self._transcripts([r for _, r in records])
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO calls (seq, call_id, ts, {', '.join(KEY_COLUMNS.values())}) "
+            f"VALUES ({', '.join('?' * (len(KEY_COLUMNS) + 3))})",
+            [
+                (seq, r.get("call_id"), record_timestamp(r),
+                 *(index_key(field_value(r, INDEXED_FIELDS[f])) for f in KEY_COLUMNS))
+                for seq, r in records
+            ]
+        )
+        self._conn.executemany(
+            "INSERT INTO call_text (rowid, summary, details, transcript) VALUES (?, ?, ?, ?)",
+            [
+                (seq,
+                 (r.get("conversation_summary") or "")[:MAX_TEXT_CHARS],
+                 (field_value(r, ("property_details", "additional_details")) or "")[:MAX_TEXT_CHARS],
+                 transcripts.get(r.get("call_id"), "")[:MAX_TEXT_CHARS])
+                for seq, r in records
+            ]
+        )
+
+    def sync(self, batch_size: int = 500) -> int:
+        """Index records written since the last sync. Returns how many."""
+        if self.store.count() <= self.indexed:
+            return 0
+        applied = 0
+        with self._lock:
+            while True:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Another worker may have indexed some of these already
+                    seq = self._indexed_seq(self._conn)
+                    batch = list(islice(self.store.scan(seq), batch_size))
+                    if batch:
+                        self._insert(batch)
+                        seq = batch[-1][0] + 1
+                        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seq', ?)", (str(seq),))
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                self.indexed = seq
+                applied += len(batch)
+                if len(batch) < batch_size:
+                    return applied
+
+    def reindex(self, batch_size: int = 500) -> int:
+        """Index every already-indexed call again, after stored records were rewritten in place.
+
+        Rows are replaced a batch per transaction, so searches keep
+        working meanwhile. Returns how many calls were re-indexed.
+        """
+        done = 0
+        start = 0
+        with self._lock:
+            while True:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    batch = list(islice(self.store.scan(start, self._indexed_seq(self._conn)), batch_size))
+                    if batch:
+                        self._conn.execute(
+                            "DELETE FROM call_text WHERE rowid BETWEEN ? AND ?", (batch[0][0], batch[-1][0])
+                        )
+                        self._insert(batch)
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                done += len(batch)
+                if len(batch) < batch_size:
+                    return done
+                start = batch[-1][0] + 1
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Best matches first, with a highlighted snippet and the stored record.
+
+        Ranking covers the ``candidates`` most recent matching calls, so
+        a query that matches most of the history costs the same as one
+        that matches a few hundred calls; below that many matches the
+        ranking is exact. Returns the hits and the offset of the next
+        page (None on the last page, and once paging would go past the
+        candidates). Raises ValueError for a query with no searchable
+        terms, or an offset past the candidates.
+        """
+        expression = compile_query(query)
+        if expression is None:
+            raise ValueError("Query has no searchable terms")
+        if offset >= self.candidates:
+            raise ValueError(f"Only the {self.candidates} most recent matches are ranked; narrow the query instead of paging past them")
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        unknown = set(filters) - set(KEY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported filter(s): {', '.join(sorted(unknown))}")
+
+        clauses = ["call_text MATCH ?"]
+        params: List[Any] = [expression]
+        if since is not None:
+            clauses.append("calls.ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("calls.ts <= ?")
+            params.append(until)
+        for field, value in filters.items():
+            clauses.append(f"calls.{KEY_COLUMNS[field]} = ?")
+            params.append(index_key(value))
+        params += [self.candidates, limit + 1, offset]
+
+        # Matches come off the FTS index newest first, so the candidate cap stops the
+        # scan early; only those rows are scored. CROSS JOIN keeps the FTS table outermost.
+        conn = self._reader()
+        rows = conn.execute(
+            "SELECT seq, call_id, rank FROM ("
+            "SELECT calls.seq AS seq, calls.call_id AS call_id, call_text.rank AS rank "
+            "FROM call_text CROSS JOIN calls ON calls.seq = call_text.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY call_text.rowid DESC LIMIT ?"
+            ") ORDER BY rank LIMIT ? OFFSET ?",
+            params
+        ).fetchall()
+        next_offset = offset + limit if len(rows) > limit and offset + limit < self.candidates else None
+        rows = rows[:limit]
+
+        records = {}
+        for seq, _, _ in rows:
+            line = next(self.store.scan(seq, seq + 1), None)
+            if line is not None:
+                records[seq] = json.loads(line[1])
+        # FTS5's snippet() re-runs the match for every row it is asked about, which
+        # costs more than the search; excerpts are cut from the fetched records instead
+        transcripts = self._transcripts(list(records.values()))
+        pattern = highlighter(query)
+
+        hits = []
+        for seq, call_id, rank in rows:
+            record = records.get(seq)
+            texts = {
+                "summary": (record or {}).get("conversation_summary"),
+                "details": field_value(record or {}, ("property_details", "additional_details")),
+                "transcript": transcripts.get(call_id),
+            }
+            hits.append({
+                "call_id": call_id,
+                "seq": seq,
+                # bm25() is lower for better matches; flip it so higher is better
+                "score": round(-rank, 4),
+                "snippet": make_snippet(texts, pattern),
+                "conversation": record,
+            })
+        return hits, next_offset
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "indexed": self.indexed,
+            "stored": self.store.count(),
+        }
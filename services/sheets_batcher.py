@@ -0,0 +1,93 @@
+import logging
+import os
+from typing import Dict, Any, List, Optional
+
+from services.gspread_service import GoogleSheetsLogger
+
+logger = logging.getLogger(__name__)
+
+
+class SheetsQuotaExceeded(Exception):
+    """Raised when the Sheets API answers 429"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Google Sheets quota exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_after(error: Exception, default: float) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", default))
+    except (TypeError, ValueError):
+        return default
+
+
+class BatchingSheetsSink:
+    """Coalesces many calls into a single multi-row values.append request.
+
+    The outbox worker hands this sink up to ``max_rows`` records at a
+    time, waiting at most ``max_wait`` seconds for a batch to fill.
+    Quota errors are raised as ``SheetsQuotaExceeded`` so the worker can
+    back off instead of dropping rows.
+    """
+
+    def __init__(
+        self,
+        sheets_logger: GoogleSheetsLogger,
+        max_rows: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        quota_backoff: Optional[float] = None,
+    ):
+        self.sheets_logger = sheets_logger
+        self.max_rows = int(max_rows or os.getenv("SHEETS_BATCH_MAX_ROWS", 200))
+        self.max_wait = float(max_wait or os.getenv("SHEETS_BATCH_MAX_WAIT", 2.0))
+        self.quota_backoff = float(quota_backoff or os.getenv("SHEETS_QUOTA_BACKOFF", 30.0))
+
+        self.requests = 0
+        self.rows_sent = 0
+        self.last_batch_rows = 0
+        self.quota_errors = 0
+
+    @property
+    def sheet(self):
+        return self.sheets_logger.sheet
+
+    def log_calls(self, conversations: List[Dict[str, Any]]) -> bool:
+        """Write a batch of calls with one append request"""
+        if not self.sheets_logger.configured:
+            return False
+
+        rows = [self.sheets_logger.build_row(c) for c in conversations]
+        try:
+            self.sheets_logger.append_rows(rows)
+        except Exception as e:
+            if _status_code(e) == 429:
+                self.quota_errors += 1
+                raise SheetsQuotaExceeded(_retry_after(e, self.quota_backoff)) from e
+            raise
+
+        self.requests += 1
+        self.rows_sent += len(rows)
+        self.last_batch_rows = len(rows)
+        logger.info(f"Logged {len(rows)} call(s) to Google Sheets in one request")
+        return True
+
+    def log_call(self, conversation_data: Dict[str, Any]) -> bool:
+        return self.log_calls([conversation_data])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "rows_sent": self.rows_sent,
+            "rows_per_request": round(self.rows_sent / self.requests, 2) if self.requests else 0.0,
+            "last_batch_rows": self.last_batch_rows,
+            "quota_errors": self.quota_errors,
+            "circuit": self.sheets_logger.breaker.stats(),
+        }
@@ -0,0 +1,343 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import time
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class SheetsOutbox:
+    """Durable outbox that delivers call records to Google Sheets in the background.
+
+    The webhook only appends the record to ``queue.jsonl`` and returns.
+    A single asyncio worker drains the queue through the sink in a
+    thread, retrying with exponential backoff. Sinks with a ``log_calls``
+    method receive batches of up to ``sink.max_rows`` records, collected
+    for at most ``sink.max_wait`` seconds; others get one ``log_call``
+    per record. Delivered sequence numbers are recorded in
+    ``cursor`` so undelivered records are replayed after a restart.
+
+    Several worker processes can share one outbox directory. Appends
+    and acks happen under a lock on ``queue.lock``, and every process
+    tails the queue file so sequence numbers stay unique and
+    depth/lag are the same on every worker. Once everything is
+    delivered the file is replaced with an empty one, and once the
+    delivered head of the file passes ``SHEETS_OUTBOX_COMPACT_BYTES``
+    it is replaced with just the undelivered tail, so steady traffic
+    doesn't grow it forever; a new inode tells the other processes to
+    start reading from the top. Records enqueued with a ``key`` that is
+    still waiting are not queued twice. Only the process holding
+    ``leader.lock`` delivers; the others stand by and take over when
+    the leader exits.
+    """
+
+    def __init__(
+        self,
+        sink,
+        directory: Optional[str] = None,
+        base_backoff: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        compact_bytes: Optional[int] = None,
+    ):
+        self.sink = sink
+        self.directory = Path(directory or os.getenv("SHEETS_OUTBOX_DIR", "data/outbox"))
+        self.base_backoff = float(base_backoff or os.getenv("SHEETS_OUTBOX_BASE_BACKOFF", 1.0))
+        self.max_backoff = float(max_backoff or os.getenv("SHEETS_OUTBOX_MAX_BACKOFF", 300.0))
+        self.poll_interval = float(poll_interval or os.getenv("SHEETS_OUTBOX_POLL_INTERVAL", 0.5))
+        self.compact_bytes = int(compact_bytes or os.getenv("SHEETS_OUTBOX_COMPACT_BYTES", 1024 * 1024))
+        self.queue_path = self.directory / "queue.jsonl"
+        self.cursor_path = self.directory / "cursor"
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._pending: deque = deque()
+        self._next_seq = 1
+        self._acked_seq = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._lock_fd: Optional[int] = None
+        self._leader_fd: Optional[int] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.is_leader = False
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.last_error: Optional[str] = None
+
+        self._refresh()
+
+    @contextmanager
+    def _process_lock(self):
+        """Serialize appends and acks across worker processes sharing the directory"""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None:
+            self._lock_fd = os.open(self.directory / "queue.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _sync(self):
+        """Pick up entries appended and acks written by any process. Caller holds the process lock."""
+        if self.cursor_path.exists():
+            try:
+                self._acked_seq = max(self._acked_seq, int(self.cursor_path.read_text().strip() or 0))
+            except ValueError:
+                pass
+        self._next_seq = max(self._next_seq, self._acked_seq + 1)
+
+        try:
+            st = os.stat(self.queue_path)
+            inode, size = st.st_ino, st.st_size
+        except FileNotFoundError:
+            inode, size = None, 0
+        if inode != self._inode:
+            # The leader delivered everything and replaced the file; appends go to the new one
+            self._inode = inode
+            self._offset = 0
+            self._pending.clear()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+        if size > self._offset:
+            with open(self.queue_path, "rb") as f:
+                f.seek(self._offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn write from a crashed process; appends happen under the lock
+                        os.truncate(self.queue_path, self._offset)
+                        break
+                    start = self._offset
+                    self._offset += len(line)
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._next_seq = max(self._next_seq, entry["seq"] + 1)
+                    if entry["seq"] > self._acked_seq:
+                        # Where the line starts in the file, for compaction; never written out
+                        entry["_at"] = start
+                        self._pending.append(entry)
+
+        while self._pending and self._pending[0]["seq"] <= self._acked_seq:
+            self._pending.popleft()
+
+    def _refresh(self):
+        with self._process_lock():
+            self._sync()
+
+    def _open(self) -> int:
+        if self._fd is None:
+            self._fd = os.open(self.queue_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._inode = os.fstat(self._fd).st_ino
+        return self._fd
+
+    def enqueue(self, record: Dict[str, Any], key: Optional[str] = None) -> int:
+        """Persist a record for delivery and wake the worker. Returns its sequence number.
+
+        A ``key`` (the call ID) already waiting in the queue returns that
+        entry's number instead, so a retried request doesn't add a row twice.
+        """
+        with self._process_lock():
+            self._sync()
+            if key:
+                for waiting in self._pending:
+                    if waiting.get("key") == key:
+                        return waiting["seq"]
+            entry = {"seq": self._next_seq, "enqueued_at": time.time(), "record": record}
+            if key:
+                entry["key"] = key
+            self._next_seq += 1
+            data = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+            fd = self._open()
+            entry["_at"] = self._offset
+            os.write(fd, data)
+            self._offset += len(data)
+            self._pending.append(entry)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return entry["seq"]
+
+    def _ack(self, seq: int):
+        """Record delivery of everything up to ``seq``"""
+        with self._process_lock():
+            tmp = self.cursor_path.with_suffix(".tmp")
+            tmp.write_text(str(seq))
+            os.replace(tmp, self.cursor_path)
+            self._acked_seq = seq
+            self._sync()
+
+            # Everything on disk has been delivered, so the queue file can be reset. Replacing
+            # it rather than truncating means no process can mistake new entries for old ones.
+            if not self._pending and self._offset:
+                tmp = self.queue_path.with_suffix(".new")
+                open(tmp, "wb").close()
+                os.replace(tmp, self.queue_path)
+                self._sync()
+            elif self._pending and self._pending[0]["_at"] >= self.compact_bytes:
+                # Under steady traffic the queue is never empty: drop the delivered head instead
+                tmp = self.queue_path.with_suffix(".new")
+                with open(self.queue_path, "rb") as src, open(tmp, "wb") as dst:
+                    src.seek(self._pending[0]["_at"])
+                    shutil.copyfileobj(src, dst)
+                os.replace(tmp, self.queue_path)
+                self._sync()
+
+    def _try_lead(self) -> bool:
+        """Become the delivering process if no other process holds the leader lock"""
+        if self.is_leader:
+            return True
+        if fcntl is None:
+            self.is_leader = True
+            return True
+        if self._leader_fd is None:
+            self._leader_fd = os.open(self.directory / "leader.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._leader_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        self.is_leader = True
+        return True
+
+    def _resign(self):
+        if self._leader_fd is not None:
+            # Closing the descriptor releases the lock for a standby to take
+            os.close(self._leader_fd)
+            self._leader_fd = None
+        self.is_leader = False
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Wait for the batch to fill up to the sink's size or time limit"""
+        max_rows = getattr(self.sink, "max_rows", 1)
+        max_wait = getattr(self.sink, "max_wait", 0.0)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        while len(self._pending) < max_rows:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return list(islice(self._pending, max_rows))
+
+    async def _deliver(self, batch: List[Dict[str, Any]]) -> bool:
+        records = [entry["record"] for entry in batch]
+        if hasattr(self.sink, "log_calls"):
+            return await asyncio.to_thread(self.sink.log_calls, records)
+        return await asyncio.to_thread(self.sink.log_call, records[0])
+
+    async def run(self):
+        """Stand by until this process leads, then drain the queue forever"""
+        self._wakeup = asyncio.Event()
+        while not self._try_lead():
+            await asyncio.sleep(self.poll_interval)
+            self._refresh()
+        logger.info("Sheets outbox: this worker is delivering")
+
+        attempt = 0
+        while True:
+            if not self._pending:
+                # Other workers append without waking us, so poll as well
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._refresh()
+                continue
+
+            batch = await self._collect_batch()
+            delay = None
+            try:
+                ok = await self._deliver(batch)
+                if not ok:
+                    self.last_error = "sink rejected batch"
+            except Exception as e:
+                ok = False
+                self.last_error = str(e)
+                delay = getattr(e, "retry_after", None)
+
+            if ok:
+                for _ in batch:
+                    self._pending.popleft()
+                self.delivered += len(batch)
+                self._ack(batch[-1]["seq"])
+                attempt = 0
+                continue
+
+            self.failed_attempts += 1
+            wait = max(delay or 0.0, self._backoff(attempt))
+            logger.warning(f"Sheets delivery of {len(batch)} row(s) failed ({self.last_error}); retrying in {wait:.1f}s")
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    def start(self):
+        """Start the background worker on the running event loop.
+
+        Leadership is tried right away, so ``is_leader`` is meaningful
+        as soon as this returns.
+        """
+        if self._task is None or self._task.done():
+            self._try_lead()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._resign()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def lag_seconds(self) -> float:
+        """Age of the oldest undelivered record"""
+        if not self._pending:
+            return 0.0
+        return max(0.0, time.time() - self._pending[0]["enqueued_at"])
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "depth": self.depth(),
+            "lag_seconds": round(self.lag_seconds(), 3),
+            "delivered": self.delivered,
+            "failed_attempts": self.failed_attempts,
+            "last_error": self.last_error,
+            "running": self._task is not None and not self._task.done(),
+            "role": "leader" if self.is_leader else "standby",
+        }
+        if hasattr(self.sink, "stats"):
+            stats["sink"] = self.sink.stats()
+        return stats
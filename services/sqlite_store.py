@@ -0,0 +1,366 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from services.conversation_index import INDEXED_FIELDS, RANGE_FIELDS, field_value, index_key, record_timestamp
+from services.conversation_store import LEGACY_FILE, ConversationStore, JsonlConversationStore, load_legacy
+
+# Column -> path into the stored record; CallerInfo and PropertyDetails are flattened
+COLUMNS = {
+    "call_id": ("call_id",),
+    "caller_name": ("caller_info", "name"),
+    "caller_phone": ("caller_info", "phone"),
+    "caller_email": ("caller_info", "email"),
+    "caller_role": ("caller_info", "role"),
+    "caller_company": ("caller_info", "company"),
+    "inquiry_type": ("inquiry_type",),
+    "asset_type": ("property_details", "asset_type"),
+    "location": ("property_details", "location"),
+    "deal_size": ("property_details", "deal_size"),
+    "square_footage": ("property_details", "square_footage"),
+    "urgency": ("property_details", "urgency"),
+    "additional_details": ("property_details", "additional_details"),
+    "conversation_summary": ("conversation_summary",),
+    "duration": ("duration",),
+    "recording_url": ("recording_url",),
+    "deal_size_min": ("normalized", "deal_size_min"),
+    "deal_size_max": ("normalized", "deal_size_max"),
+    "square_feet_min": ("normalized", "square_feet_min"),
+    "square_feet_max": ("normalized", "square_feet_max"),
+    "city": ("normalized", "city"),
+    "state": ("normalized", "state"),
+    "prior_calls": ("prior_calls",),
+}
+COLUMN_TYPES = {
+    "duration": "INTEGER",
+    "prior_calls": "INTEGER",
+    "deal_size_min": "REAL",
+    "deal_size_max": "REAL",
+    "square_feet_min": "REAL",
+    "square_feet_max": "REAL",
+}
+
+# Filters match on the same normalized keys as the JSONL index
+KEY_COLUMNS = {field: f"{field}_key" for field in INDEXED_FIELDS}
+
+DATA_COLUMNS = {
+    **{c: COLUMN_TYPES.get(c, "TEXT") for c in COLUMNS},
+    **{c: "TEXT" for c in KEY_COLUMNS.values()},
+}
+
+TABLES = f"""
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    {", ".join(f"{c} {t}" for c, t in DATA_COLUMNS.items())},
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+INDEXES = f"""
+CREATE INDEX IF NOT EXISTS conversations_ts ON conversations (ts);
+CREATE INDEX IF NOT EXISTS conversations_call_id ON conversations (call_id);
+CREATE INDEX IF NOT EXISTS conversations_caller_phone ON conversations (caller_phone);
+CREATE INDEX IF NOT EXISTS conversations_caller_email ON conversations (caller_email);
+{"".join(f"CREATE INDEX IF NOT EXISTS conversations_{c} ON conversations ({c}, id);" for c in KEY_COLUMNS.values())}
+{"".join(f"CREATE INDEX IF NOT EXISTS conversations_{f}_min ON conversations ({f}_min);" for f in RANGE_FIELDS)}
+"""
+
+INSERT = (
+    f"INSERT INTO conversations (ts, {', '.join(DATA_COLUMNS)}, record) "
+    f"VALUES ({', '.join('?' * (len(DATA_COLUMNS) + 2))})"
+)
+UPDATE = f"UPDATE conversations SET {', '.join(f'{c} = ?' for c in DATA_COLUMNS)}, record = ? WHERE id = ?"
+
+
+def _values(record: Dict[str, Any]) -> List[Any]:
+    values: List[Any] = []
+    for column, path in COLUMNS.items():
+        value = field_value(record, path)
+        if value is not None and column not in COLUMN_TYPES:
+            value = str(value)
+        values.append(value)
+    for field in KEY_COLUMNS:
+        values.append(index_key(field_value(record, INDEXED_FIELDS[field])))
+    values.append(json.dumps(record, default=str))
+    return values
+
+
+def _row(record: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (record_timestamp(record), *_values(record))
+
+
+class SqliteConversationStore(ConversationStore):
+    """Conversation store backed by a single SQLite database in WAL mode.
+
+    Caller and property fields are flattened into indexed columns, and
+    the full record is kept as JSON so reads return exactly what was
+    written. A record's sequence number is its row id minus one, which
+    keeps cursors interchangeable with the JSONL backend. One connection
+    handles writes; each reading thread gets its own connection, which
+    WAL lets run alongside a write.
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30.0):
+        super().__init__()
+        self.path = Path(path or os.getenv("CONVERSATION_DB_PATH", "data/conversations.db"))
+        self.directory = self.path.parent
+        self.timeout = timeout
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conn = self._connect()
+        self._create_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self):
+        with self._lock:
+            self._conn.executescript(TABLES)
+            # Databases created before a column existed get it added in place; the write
+            # lock keeps worker processes starting together from adding it twice
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = {row[1] for row in self._conn.execute("PRAGMA table_info(conversations)")}
+                for column, column_type in DATA_COLUMNS.items():
+                    if column not in existing:
+                        self._conn.execute(f"ALTER TABLE conversations ADD COLUMN {column} {column_type}")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._conn.executescript(INDEXES)
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _insert(self, records: Iterable[Dict[str, Any]]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(INSERT, (_row(r) for r in records))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def append(self, record: Dict[str, Any]):
+        """Append a single record"""
+        self._insert([record])
+
+    def append_many(self, records: List[Dict[str, Any]], sync: bool = True):
+        """Append several records in one transaction"""
+        if records:
+            self._insert(records)
+
+    def flush(self):
+        """Checkpoint the WAL into the main database file"""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def count(self) -> int:
+        """Number of stored records"""
+        # Rows are never deleted, so the highest row id is the count
+        return self._reader().execute("SELECT COALESCE(MAX(id), 0) FROM conversations").fetchone()[0]
+
+    def scan(self, start: int = 0, stop: Optional[int] = None, chunk: int = 256) -> Iterator[Tuple[int, bytes]]:
+        """Yield (sequence number, raw JSON line) from ``start`` in write order.
+
+        Pages by row id so no read transaction is held between chunks.
+        """
+        if stop is None:
+            stop = self.count()
+        conn = self._reader()
+        seq = start
+        while seq < stop:
+            rows = conn.execute(
+                "SELECT id, record FROM conversations WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                (seq, stop, chunk)
+            ).fetchall()
+            if not rows:
+                return
+            for row_id, record in rows:
+                yield row_id - 1, record.encode("utf-8") + b"\n"
+            seq = rows[-1][0]
+
+    def query(
+        self,
+        cursor: Optional[int] = None,
+        limit: int = 50,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        descending: bool = False,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Return one page of records and the cursor for the next page.
+
+        Same contract as ``JsonlConversationStore.query``.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        unknown = set(filters) - set(KEY_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported filter(s): {', '.join(sorted(unknown))}")
+        ranges = {k: v for k, v in (ranges or {}).items() if v != (None, None)}
+        unknown = set(ranges) - set(RANGE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unsupported range(s): {', '.join(sorted(unknown))}")
+
+        clauses: List[str] = []
+        params: List[Any] = []
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts <= ?")
+            params.append(until)
+        for field, value in filters.items():
+            clauses.append(f"{KEY_COLUMNS[field]} = ?")
+            params.append(index_key(value))
+        for field, (low, high) in ranges.items():
+            # Ranges overlap; a NULL max is open-ended
+            clauses.append(f"{field}_min IS NOT NULL")
+            if high is not None:
+                clauses.append(f"{field}_min <= ?")
+                params.append(high)
+            if low is not None:
+                clauses.append(f"({field}_max IS NULL OR {field}_max >= ?)")
+                params.append(low)
+        if cursor is not None:
+            clauses.append("id <= ?" if descending else "id >= ?")
+            params.append(cursor + 1)
+
+        sql = "SELECT id, record FROM conversations"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY id {'DESC' if descending else 'ASC'} LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._reader().execute(sql, params).fetchall()
+        next_cursor = rows[limit][0] - 1 if len(rows) > limit else None
+        return [json.loads(record) for _, record in rows[:limit]], next_cursor
+
+    def rewrite(self, transform: Callable[[List[Dict[str, Any]]], List[bool]], batch_size: int = 1000) -> int:
+        """Update stored records in place, in write order. Returns records changed.
+
+        ``transform`` receives a batch of records, modifies them in place
+        and returns which ones changed; only those are written back.
+        The search index keeps its own copy of the filter fields, so run
+        ``SearchIndex.reindex`` afterwards.
+        """
+        updated = 0
+        last_id = 0
+        conn = self._reader()
+        while True:
+            rows = conn.execute(
+                "SELECT id, record FROM conversations WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return updated
+            last_id = rows[-1][0]
+            records = [json.loads(raw) for _, raw in rows]
+            changed = [
+                (row_id, record)
+                for (row_id, _), record, dirty in zip(rows, records, transform(records))
+                if dirty
+            ]
+            if not changed:
+                continue
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany(UPDATE, ((*_values(r), row_id) for row_id, r in changed))
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+            updated += len(changed)
+
+    def backfill_normalized(self, batch_size: int = 1000) -> int:
+        """Add ``normalized`` to records stored before it existed. Returns records updated."""
+        from utils.normalize import normalize_batch
+
+        def add_normalized(records: List[Dict[str, Any]]) -> List[bool]:
+            missing = [r for r in records if r.get("normalized") is None]
+            for record, values in zip(missing, normalize_batch(r.get("property_details") or {} for r in missing)):
+                record["normalized"] = values
+            missing_ids = {id(r) for r in missing}
+            return [id(r) in missing_ids for r in records]
+
+        return self.rewrite(add_normalized, batch_size)
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def migrate_legacy(self, legacy_file: str = LEGACY_FILE, jsonl_directory: Optional[str] = None) -> int:
+        """Import the JSONL store, or failing that the old JSON array file, once.
+
+        Returns records imported.
+        """
+        jsonl_directory = Path(jsonl_directory or os.getenv("CONVERSATION_STORE_DIR", "data/conversations"))
+        legacy_path = Path(legacy_file)
+        has_jsonl = any(jsonl_directory.glob("segment-*.jsonl"))
+        if not has_jsonl and not legacy_path.exists():
+            return 0
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._meta("migrated") is not None:
+                    self._conn.execute("ROLLBACK")
+                    return 0
+
+                if has_jsonl:
+                    source = JsonlConversationStore(str(jsonl_directory))
+                    source.migrate_legacy(legacy_file)
+                    imported = 0
+                    batch: List[Tuple[Any, ...]] = []
+                    for record in source.iter_records():
+                        batch.append(_row(record))
+                        if len(batch) == 1000:
+                            self._conn.executemany(INSERT, batch)
+                            imported += len(batch)
+                            batch = []
+                    self._conn.executemany(INSERT, batch)
+                    imported += len(batch)
+                    source.close()
+                    origin = str(jsonl_directory)
+                else:
+                    conversations = load_legacy(legacy_path)
+                    if conversations is None:
+                        # Left unmarked, so a repaired file is imported on the next start
+                        self._conn.execute("ROLLBACK")
+                        return 0
+                    self._conn.executemany(INSERT, (_row(r) for r in conversations))
+                    imported = len(conversations)
+                    origin = str(legacy_path)
+
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated', ?)", (f"{origin}\n{imported}",)
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return imported
@@ -1,55 +1,142 @@
+import asyncio
 import httpx
+import logging
 import os
-from typing import Dict, Any
+import random
+from typing import Dict, Any, Awaitable, Iterable, List, Optional
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Safe to send twice. PATCH counts: updates always send the assistant's whole config.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH"}
+# Failures that mean the request never reached Vapi, so even a POST can be resent
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+logger = logging.getLogger(__name__)
 
 class VapiService:
-    def __init__(self):
-        self.api_key = os.getenv("VAPI_API_KEY")
-        self.base_url = "https://api.vapi.ai"
+    """Vapi API client with a long-lived, pooled HTTP connection.
+
+    One ``httpx.AsyncClient`` is reused for every request, so TLS
+    handshakes happen once per connection rather than once per call.
+    Requests retry 429/5xx and transport errors with jittered
+    exponential backoff, and a semaphore bounds how many are in flight.
+    A POST could create a second assistant if resent after reaching
+    Vapi, so it is only retried on 429 and on errors raised before it
+    was sent.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = "https://api.vapi.ai",
+        max_connections: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_key = api_key or os.getenv("VAPI_API_KEY")
+        self.base_url = base_url
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-    
+        self.max_connections = int(max_connections or os.getenv("VAPI_MAX_CONNECTIONS", 20))
+        self.max_concurrency = int(max_concurrency or os.getenv("VAPI_MAX_CONCURRENCY", 10))
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("VAPI_MAX_RETRIES", 4))
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0
+                ),
+                http2=HTTP2_AVAILABLE and self.transport is None,
+                transport=self.transport
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "VapiService":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and "Retry-After" in response.headers:
+            try:
+                return min(self.max_backoff, max(0.0, float(response.headers["Retry-After"])))
+            except ValueError:
+                pass
+        # Full jitter keeps bulk retries from arriving in lockstep
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """Send a request, retrying on 429/5xx and connection errors"""
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            response = None
+            last = attempt == self.max_retries
+            # The slot is held for the request only, not while backing off
+            async with self._semaphore:
+                try:
+                    response = await self.client.request(method, path, **kwargs)
+                except httpx.TransportError as e:
+                    if last or not (idempotent or isinstance(e, UNSENT_ERRORS)):
+                        raise
+            if response is not None:
+                retryable = response.status_code in RETRY_STATUS_CODES and (idempotent or response.status_code == 429)
+                if last or not retryable:
+                    break
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+        if response.is_error:
+            logger.error(f"Vapi {method} {path} failed: {response.status_code} {response.text}")
+
+        response.raise_for_status()
+        return response.json()
+
     async def create_assistant(self, config: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new Vapi assistant"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}/assistant",
-                json=config,
-                headers=self.headers
-            )
-            
-            # Print response for debugging
-            if response.status_code != 200 and response.status_code != 201:
-                print(f"\n Response Status: {response.status_code}")
-                print(f" Response Body: {response.text}")
-            
-            response.raise_for_status()
-            return response.json()
-    
+        return await self._request("POST", "/assistant", json=config)
+
     async def update_assistant(self, assistant_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Update existing assistant"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.patch(
-                f"{self.base_url}/assistant/{assistant_id}",
-                json=config,
-                headers=self.headers
-            )
-            
-            if response.status_code != 200:
-                print(f"\n Response Status: {response.status_code}")
-                print(f" Response Body: {response.text}")
-            
-            response.raise_for_status()
-            return response.json()
-    
+        return await self._request("PATCH", f"/assistant/{assistant_id}", json=config)
+
     async def get_assistant(self, assistant_id: str) -> Dict[str, Any]:
         """Get assistant details"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{self.base_url}/assistant/{assistant_id}",
-                headers=self.headers
-            )
-            response.raise_for_status()
-            return response.json()
\ No newline at end of file
+        return await self._request("GET", f"/assistant/{assistant_id}")
+
+    async def bulk(self, requests: Iterable[Awaitable[Dict[str, Any]]]) -> List[Any]:
+        """Run many API calls concurrently, bounded by ``max_concurrency``.
+
+        Returns results in order; failed calls are returned as exceptions.
+        """
+        return await asyncio.gather(*requests, return_exceptions=True)
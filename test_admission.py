@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from utils.admission import CRITICAL, LOW, NORMAL, AdmissionController, Overloaded, Shed
+
+
+def test_critical_work_queues_and_noise_is_shed():
+    async def scenario():
+        admission = AdmissionController({
+            "report": (CRITICAL, 2, 0.2),
+            "status": (NORMAL, 10, 0.0),
+            "transcript": (LOW, 1, 0.0),
+        }, capacity=4)
+        release = asyncio.Event()
+
+        async def hold(name):
+            async with admission.admit(name) as waited:
+                await release.wait()
+                return waited
+
+        holders = [asyncio.create_task(hold("report")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert admission.in_flight == 2
+
+        # Half the worker is busy: low priority is shed at once, normal still gets in
+        with pytest.raises(Shed):
+            async with admission.admit("transcript"):
+                pass
+        async with admission.admit("status"):
+            pass
+
+        # A third report waits for a slot, then gives up
+        with pytest.raises(Overloaded):
+            async with admission.admit("report"):
+                pass
+
+        # One that arrives while slots are freed gets in after queueing
+        queued = asyncio.create_task(hold("report"))
+        await asyncio.sleep(0.05)
+        release.set()
+        waits = await asyncio.gather(*holders, queued)
+        assert waits[2] >= 0.04
+        return admission.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["in_flight"] == 0
+    report = stats["lanes"]["report"]
+    assert (report["admitted"], report["overloaded"], report["in_flight"]) == (3, 1, 0)
+    assert stats["lanes"]["transcript"]["shed"] == 1 and stats["lanes"]["status"]["admitted"] == 1
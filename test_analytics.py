@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+from services.analytics import LeadAnalytics, bucket_start
+from services.sqlite_store import SqliteConversationStore
+
+START = datetime(2025, 3, 3, 8, 0, 0, tzinfo=timezone.utc)  # a Monday
+
+
+def record(i):
+    return {
+        "call_id": f"call-{i}",
+        "timestamp": (START + timedelta(minutes=20 * i)).isoformat(),
+        "caller_info": {},
+        "property_details": {
+            "asset_type": "Office" if i % 2 else "Retail",
+            "urgency": "High" if i % 4 == 0 else None,
+            "location": "Austin, TX",
+        },
+        "inquiry_type": "leasing",
+        "duration": 100 + i,
+    }
+
+
+def test_rollups_match_a_full_recount(tmp_path):
+    store = SqliteConversationStore(str(tmp_path / "conversations.db"))
+    analytics = LeadAnalytics(store, path=str(tmp_path / "analytics.json"))
+    store.append_many([record(i) for i in range(30)])
+    assert analytics.sync() == 30
+    assert analytics.sync() == 0
+
+    report = analytics.report("hour", limit=24)
+    assert [b["calls"] for b in report["buckets"]] == [3] * 10
+    assert report["window"]["calls"] == 30
+    assert report["window"]["calls_per_hour"] == 3.0
+    assert report["all_time"]["asset_type"] == {"office": 15, "retail": 15}
+    assert report["all_time"]["urgency"] == {"unknown": 22, "high": 8}
+    assert report["all_time"]["avg_duration"] == 114.5
+
+    day = analytics.report("day")
+    assert day["buckets"][0]["start"] == "2025-03-03T00:00:00Z"
+    assert bucket_start(START.timestamp() + 3 * 86400, "week") == bucket_start(START.timestamp(), "week")
+    store.close()
+
+
+def test_snapshot_replays_only_new_calls(tmp_path):
+    store = SqliteConversationStore(str(tmp_path / "conversations.db"))
+    snapshot = str(tmp_path / "analytics.json")
+    first = LeadAnalytics(store, path=snapshot)
+    store.append_many([record(i) for i in range(10)])
+    first.sync()
+    first.save()
+
+    store.append_many([record(i) for i in range(10, 14)])
+    second = LeadAnalytics(store, path=snapshot)
+    assert second.seq == 10
+    assert second.sync() == 4
+    assert second.report("day")["all_time"]["calls"] == 14
+    store.close()
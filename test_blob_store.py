@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import random
+import threading
+
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.archiver import DownloadError, RecordingArchiver
+from services.blob_store import BlobStore
+
+
+def test_blobs_are_deduplicated_compressed_and_shared(tmp_path):
+    # Two instances on one directory stand in for two worker processes
+    first, second = BlobStore(str(tmp_path), pack_bytes=4096), BlobStore(str(tmp_path), pack_bytes=4096)
+    transcript = json.dumps({"turns": [{"role": "user", "text": "I need warehouse space."}] * 200}).encode()
+    digest = first.put(transcript, "application/json")
+    assert first.put(transcript, "application/json") == digest
+    assert first.stats()["blobs"] == 1 and first.stats()["stored_bytes"] < len(transcript) // 10
+
+    # Enough incompressible data to roll over into new packs
+    noise = [random.Random(i).randbytes(3000) for i in range(3)]
+    digests = [second.put(data, "audio/wav") for data in noise]
+    assert second.get(digest) == transcript
+    assert [first.get(d) for d in digests] == noise
+    assert b"".join(first.iter_chunks(digest, chunk_size=64)) == transcript
+    assert first.entry(digests[0]).media_type == "audio/wav"
+    assert first.stats()["packs"] == 3
+    assert first.get("00" * 32) is None
+
+    # Reads after the pack grew remap it; the old map is closed unless a stream still holds it
+    stream = first.iter_chunks(digests[2], chunk_size=64)
+    next(stream)
+    grown = first.put(b"more" * 500, "text/plain")
+    assert first.get(grown) == b"more" * 500
+    assert len(first._retired) == 1
+    stream.close()
+    first.get(second.put(b"last" * 500, "text/plain"))
+    assert first._retired == []
+
+    second.link("call-1/transcript", digest)
+    assert first.ref("call-1/transcript")["digest"] == digest
+    first.close()
+    second.close()
+    assert BlobStore(str(tmp_path)).get(digests[2]) == noise[2]
+
+
+class Recordings(BaseHTTPRequestHandler):
+    """Local stand-in for Vapi's recording storage"""
+    hits = {}
+
+    def do_GET(self):
+        hits = Recordings.hits[self.path] = Recordings.hits.get(self.path, 0) + 1
+        if self.path == "/expired.wav":
+            self.send_error(403)
+            return
+        if self.path in ("/moved.wav", "/escape.wav"):
+            self.send_response(302)
+            self.send_header("Location", "/ok.wav" if self.path == "/moved.wav" else "http://example.com/ok.wav")
+            self.end_headers()
+            return
+        if self.path == "/flaky.wav" and hits == 1:
+            self.send_error(503)
+            return
+        body = b"RIFF" + self.path.encode() * 1000
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+LOCAL = {"allowed_hosts": ["127.0.0.1"], "require_https": False, "allow_private": True}
+
+
+def test_content_is_synced_before_what_points_at_it(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path))
+    events = []
+    real_write, real_pwrite, real_fsync = os.write, os.pwrite, os.fsync
+
+    def name(fd):
+        return os.path.basename(os.readlink(f"/proc/self/fd/{fd}")).split("-")[0]
+
+    monkeypatch.setattr(os, "pwrite", lambda fd, data, offset: (events.append(("write", name(fd))), real_pwrite(fd, data, offset))[1])
+    monkeypatch.setattr(os, "write", lambda fd, data: (events.append(("write", name(fd))), real_write(fd, data))[1])
+    monkeypatch.setattr(os, "fsync", lambda fd: (events.append(("fsync", name(fd))), real_fsync(fd))[1])
+    store.link("call-1/transcript", store.put(b"hello" * 100, "text/plain"))
+    assert events == [
+        ("write", "pack"), ("fsync", "pack"),
+        ("write", "index.bin"), ("fsync", "index.bin"),
+        ("write", "refs.log"), ("fsync", "refs.log"),
+    ]
+
+
+def test_archiver_downloads_with_retries_and_resumes(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Recordings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    store = BlobStore(str(tmp_path))
+
+    async def scenario():
+        archiver = RecordingArchiver(store, concurrency=2, backoff=0.01, **LOCAL)
+        archiver.start()
+        await archiver.submit("call-1/recording", f"{base}/ok.wav")
+        await archiver.submit("call-2/recording", f"{base}/flaky.wav")
+        await archiver.submit("call-3/recording", f"{base}/expired.wav")
+        await archiver.submit("call-5/recording", f"{base}/moved.wav")
+        await archiver.submit("call-6/recording", f"{base}/escape.wav")
+        await archiver.join()
+        await archiver.stop()
+        return archiver.stats()
+
+    try:
+        stats = asyncio.run(scenario())
+        assert stats["archived"] == 3 and stats["failed"] == 2
+        assert Recordings.hits["/flaky.wav"] == 2
+        assert store.get(store.ref("call-1/recording")["digest"]).startswith(b"RIFF/ok.wav")
+        assert "403" in store.ref("call-3/recording")["error"]
+        assert store.ref("call-5/recording")["digest"] == store.ref("call-1/recording")["digest"]
+        assert "not allowed" in store.ref("call-6/recording")["error"]
+
+        # A download left pending by a stopped worker is picked up on the next start
+        store.mark_pending("call-4/recording", f"{base}/late.wav")
+
+        async def restart():
+            archiver = RecordingArchiver(BlobStore(str(tmp_path)), backoff=0.01, **LOCAL)
+            archiver.start()
+            await archiver.join()
+            await archiver.stop()
+
+        asyncio.run(restart())
+        assert "digest" in store.ref("call-4/recording") and store.pending() == {}
+    finally:
+        server.shutdown()
+
+
+def test_archiver_only_fetches_allowlisted_public_hosts(tmp_path):
+    archiver = RecordingArchiver(BlobStore(str(tmp_path)), allowed_hosts=["storage.vapi.ai", ".example.org", "10.0.0.1"])
+    assert archiver.url_allowed("https://storage.vapi.ai/call.wav")
+    assert archiver.url_allowed("https://eu.example.org/call.wav")
+    assert not archiver.url_allowed("http://storage.vapi.ai/call.wav")
+    assert not archiver.url_allowed("https://storage.vapi.ai.evil.com/call.wav")
+    assert not archiver.url_allowed("https://169.254.169.254/latest/meta-data")
+    assert not archiver.url_allowed("https://[::1/call.wav")
+
+    # An allowlisted name is still refused when it points inside the network
+    with pytest.raises(DownloadError, match="not a public address"):
+        asyncio.run(archiver.check_url("https://10.0.0.1/call.wav"))
@@ -0,0 +1,56 @@
+import time
+
+from services.call_dedup import CLAIMED, DUPLICATE, IN_PROGRESS, CallDeduplicator
+
+
+def test_retry_on_another_worker_is_a_duplicate(tmp_path):
+    path = str(tmp_path / "seen_calls.log")
+    # Two instances on one log stand in for two worker processes
+    first, second = CallDeduplicator(path, max_entries=3), CallDeduplicator(path, max_entries=3)
+    assert first.claim("call-1") == CLAIMED
+    assert second.claim("call-1") == IN_PROGRESS
+
+    # A failed attempt lets a retry through; a committed one makes it a duplicate
+    first.release("call-1")
+    assert second.claim("call-1") == CLAIMED
+    second.commit("call-1")
+    assert first.claim("call-1") == DUPLICATE
+    first.release("call-1")
+    assert second.claim("call-1") == DUPLICATE
+
+    # Compaction by one worker is picked up by the other, claims included
+    first.claim("call-open")
+    for i in range(10):
+        worker = first if i % 2 else second
+        worker.claim(f"call-{i + 2}")
+        worker.commit(f"call-{i + 2}")
+    assert first.claim("call-10") == DUPLICATE and second.claim("call-11") == DUPLICATE
+    assert second.claim("call-open") == IN_PROGRESS
+    assert second.stats()["tracked"] == 3
+
+
+def test_claim_of_a_crashed_worker_lapses(tmp_path):
+    path = str(tmp_path / "seen_calls.log")
+    CallDeduplicator(path, claim_ttl_seconds=0.05).claim("call-1")
+    restarted = CallDeduplicator(path, claim_ttl_seconds=0.05)
+    assert restarted.claim("call-1") == IN_PROGRESS
+    time.sleep(0.06)
+    assert restarted.claim("call-1") == CLAIMED
+
+
+def test_known_duplicates_need_no_io(tmp_path, monkeypatch):
+    path = str(tmp_path / "seen_calls.log")
+    first, second = CallDeduplicator(path), CallDeduplicator(path)
+    first.claim("call-1")
+    first.commit("call-1")
+    # Committed elsewhere: only the locked claim, which reads the log, finds out
+    assert not second.seen("call-1") and second.claim("call-1") == DUPLICATE
+
+    def no_io(*args):
+        raise AssertionError("touched the log")
+
+    monkeypatch.setattr(CallDeduplicator, "_catch_up", no_io)
+    monkeypatch.setattr(CallDeduplicator, "_process_lock", no_io)
+    assert first.seen("call-1") and second.seen("call-1")
+    assert not first.seen("call-2") and not first.seen("")
+    assert first.stats()["duplicates"] == 1
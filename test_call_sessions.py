@@ -0,0 +1,102 @@
+import asyncio
+
+from services.call_sessions import CallSessionTable
+
+
+def event(call_id, **fields):
+    return {"call": {"id": call_id, "customer": {"number": "+15125550100"}}, **fields}
+
+
+def test_transcript_builds_the_final_report():
+    table = CallSessionTable()
+    table.status_update(event("c1", status="in-progress"))
+    table.transcript(event("c1", role="assistant", transcriptType="final", transcript="Hi, this is Realflow."))
+    table.transcript(event("c1", role="user", transcriptType="partial", transcript="I need ware"))
+    assert table.get("c1").partials == {"user": "I need ware"}
+    table.transcript(event("c1", role="user", transcriptType="final", transcript="I need warehouse space."))
+
+    # conversation-update resends everything; only turns we haven't seen are added
+    table.conversation_update(event("c1", messages=[
+        {"role": "system", "message": "prompt"},
+        {"role": "bot", "message": "Hi, this is Realflow.", "secondsFromStart": 0.5},
+        {"role": "user", "message": "I need warehouse space.", "secondsFromStart": 3.0},
+        {"role": "bot", "message": "How large?", "secondsFromStart": 5.0},
+    ]))
+    table.status_update(event("c1", status="ended", endedReason="customer-ended-call"))
+    assert table.live() == []
+
+    session = table.finish("c1")
+    assert [t["text"] for t in session.turns] == ["Hi, this is Realflow.", "I need warehouse space.", "How large?"]
+    assert session.ended_reason == "customer-ended-call"
+    assert session.customer_number == "+15125550100"
+    assert table.get("c1") is None
+
+    # A report for a call this worker never saw falls back to its own messages
+    fallback = table.finish("c2", [{"role": "user", "message": "Hello"}])
+    assert [t["text"] for t in fallback.turns] == ["Hello"] and fallback.duration is None
+
+    # Entries that aren't message objects are skipped
+    assert [t["text"] for t in table.finish("c3", ["hello", 3, {"role": "user", "message": "Hi"}]).turns] == ["Hi"]
+
+
+def test_live_events_and_updates_are_merged_by_content():
+    table = CallSessionTable()
+    say = lambda role, text: table.transcript(event("c1", role=role, transcriptType="final", transcript=text))
+    msg = lambda role, text: {"role": role, "message": text}
+
+    # Updates that skip a turn heard live, list a blank message, or arrive before the event
+    say("user", "A")
+    say("user", "C")
+    table.conversation_update(event("c1", messages=[msg("user", "A"), msg("bot", "  "), msg("bot", "B")]))
+    table.conversation_update(event("c1", messages=[msg("user", "A"), msg("bot", "  "), msg("bot", "B"), msg("user", "C")]))
+    say("bot", "B")
+    say("bot", "D")
+    assert [t["text"] for t in table.get("c1").turns] == ["A", "C", "B", "D"]
+
+    # The report's messages are the whole call and replace whatever this worker heard
+    session = table.finish("c1", [msg("user", "A"), msg("bot", "B"), msg("user", "C"), msg("bot", "D")])
+    assert [t["text"] for t in session.turns] == ["A", "B", "C", "D"]
+
+    # Without them, the live turns stand
+    say("user", "only live")
+    assert [t["text"] for t in table.finish("c1").turns] == ["only live"]
+
+
+def test_sessions_are_bounded():
+    table = CallSessionTable(max_sessions=100, ttl_seconds=3600, max_turns=10)
+    for i in range(1000):
+        table.status_update(event(f"c{i}", status="in-progress"))
+    assert len(table) == 100 and table.evicted == 900
+    assert table.get("c999") is not None and table.get("c0") is None
+
+    for i in range(50):
+        table.transcript(event("c999", role="user", transcriptType="final", transcript=f"turn {i}"))
+    session = table.get("c999")
+    assert len(session.turns) == 10 and session.dropped_turns == 40
+    assert session.turns[0]["text"] == "turn 0" and session.turns[-1]["text"] == "turn 49"
+
+    expiring = CallSessionTable(ttl_seconds=0.001)
+    expiring.status_update(event("old", status="in-progress"))
+    expiring.get("old").updated_at -= 1
+    expiring.status_update(event("new", status="in-progress"))
+    assert expiring.get("old") is None and len(expiring) == 1
+
+
+def test_subscribers_get_events_and_slow_ones_are_dropped():
+    async def scenario():
+        table = CallSessionTable(subscriber_queue=4)
+        one = table.subscribe("c1")
+        everything = table.subscribe()
+        table.transcript(event("c1", role="user", transcriptType="final", transcript="Hello"))
+        table.transcript(event("c2", role="user", transcriptType="final", transcript="Other call"))
+        name, data = await one.get()
+        assert name == "turn" and data["call_id"] == "c1" and data["text"] == "Hello"
+        assert one.empty()
+        assert [(await everything.get())[1]["call_id"] for _ in range(2)] == ["c1", "c2"]
+
+        for i in range(10):
+            table.transcript(event("c1", role="user", transcriptType="partial", transcript=f"p{i}"))
+        assert await one.get() is None  # stream closed
+        assert table.dropped_subscribers == 2 and table.subscriber_count() == 0
+
+    asyncio.run(scenario())
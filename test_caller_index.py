@@ -0,0 +1,68 @@
+from services.caller_index import CallerIndex, normalize_phone
+
+
+def test_normalize_phone():
+    assert normalize_phone("(512) 555-0100") == "+15125550100"
+    assert normalize_phone("1-512-555-0100") == "+15125550100"
+    assert normalize_phone("+44 20 7946 0958") == "+442079460958"
+    assert normalize_phone("555-0100") is None
+
+
+def test_repeat_callers_share_an_id(tmp_path):
+    index = CallerIndex(str(tmp_path / "callers.log"))
+    first, prior = index.resolve({"name": "Dana Whitfield", "phone": "512-555-0100", "company": "Acme Realty LLC"})
+    assert prior == 0
+
+    # Same phone in another format
+    assert index.resolve({"phone": "+1 (512) 555-0100", "email": "dana@acme.com"}) == (first, 1)
+    # Email learned from the second call
+    assert index.resolve({"email": "DANA@acme.com"}) == (first, 2)
+    # No contact details, but a close name at the same company
+    assert index.resolve({"name": "Dana Whitfeld", "company": "Acme Realty"}) == (first, 3)
+
+    other, prior = index.resolve({"name": "Dana Whitfield", "company": "Globex"})
+    assert other != first and prior == 0
+    assert index.resolve({}) == (None, 0)
+
+    # A second process sees the same identities from the log
+    reloaded = CallerIndex(str(tmp_path / "callers.log"))
+    assert reloaded.resolve({"phone": "5125550100"}) == (first, 4)
+    assert index.profile(first)["calls"] == 5
+
+
+def test_retries_reassigned_numbers_and_no_company(tmp_path):
+    index = CallerIndex(str(tmp_path / "callers.log"))
+    dana, _ = index.resolve({"name": "Dana Whitfield", "phone": "512-555-0100"}, call_id="call-1")
+    # A retried report is answered the same way and counted once
+    assert index.resolve({"name": "Dana Whitfield", "phone": "512-555-0100"}, call_id="call-1") == (dana, 0)
+    assert index.resolve({"name": "Dana", "phone": "512-555-0100"}, call_id="call-2") == (dana, 1)
+
+    # The number now belongs to someone else
+    sam, prior = index.resolve({"name": "Sam Ortiz", "phone": "512-555-0100"}, call_id="call-3")
+    assert sam != dana and prior == 0
+    assert index.resolve({"phone": "512-555-0100"}, call_id="call-4") == (sam, 1)
+
+    # No company and no contact details: matched on the full name only
+    assert index.resolve({"name": "Dana Whitfeld"}, call_id="call-5") == (dana, 2)
+    assert index.resolve({"name": "Dana"}, call_id="call-6")[0] != dana
+
+    reloaded = CallerIndex(str(tmp_path / "callers.log"))
+    assert reloaded.resolve({}, call_id="call-1") == (dana, 0)
+    assert reloaded.profile(dana)["calls"] == 3 and reloaded.profile(sam)["calls"] == 2
+
+
+def test_name_lookups_stay_in_their_bucket_and_reindex_is_seen(tmp_path):
+    index = CallerIndex(str(tmp_path / "callers.log"))
+    index.resolve_many(({"name": f"Caller{i} Smith{i}"}, 0.0, f"bulk-{i}") for i in range(2000))
+    dana, _ = index.resolve({"name": "Dana Whitfield"})
+    # Only same-first-name, same-initial callers are compared
+    assert index._by_name[("", "dana", "w")] == [dana]
+    assert index.resolve({"name": "Dana Whitfeld"}) == (dana, 1)
+
+    other = CallerIndex(str(tmp_path / "callers.log"))
+    assert other.resolve({"name": "Dana Whitfield"}) == (dana, 2)
+    index.reset()
+    fresh, _ = index.resolve({"name": "Dana Whitfield"})
+    # The other process notices the replaced log by its inode
+    assert other.resolve({"name": "Dana Whitfield"}) == (fresh, 1) and fresh != dana
+    assert other.stats()["callers"] == 1
@@ -0,0 +1,32 @@
+import pytest
+
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def test_one_trial_call_while_half_open():
+    breaker = CircuitBreaker("sheets", failure_threshold=2, reset_timeout=0.05)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure(RuntimeError("down"))
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker._opened_at -= 0.05
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    # The trial is in flight: everyone else still fails fast
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure(RuntimeError("still down"))
+    assert breaker.state == OPEN and breaker.opened == 2
+
+    # A trial that never reports back frees its slot after reset_timeout
+    breaker._opened_at -= 0.05
+    breaker.before_call()
+    breaker._probe_started -= 0.05
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    breaker.before_call()
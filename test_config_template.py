@@ -0,0 +1,45 @@
+import pytest
+
+from utils.config_template import CompiledTemplate, TemplateError
+
+TEMPLATE = {
+    "name": "[BROKERAGE_NAME] Assistant",
+    "serverUrl": "[WEBHOOK_URL]",
+    "model": {"model": "[MODEL]", "temperature": 0.3, "messages": [{"role": "system", "content": "You work for [BROKERAGE_NAME]."}]},
+    "voice": {"provider": "cartesia", "speed": [1, 2]},
+    "maxDurationSeconds": "[MAX_SECONDS]",
+}
+VARIABLES = {"BROKERAGE_NAME": "Acme", "WEBHOOK_URL": "https://acme.example/webhook", "MODEL": "gpt-4o", "MAX_SECONDS": 600}
+
+
+def test_render_substitutes_and_shares_constant_subtrees():
+    template = CompiledTemplate(TEMPLATE)
+    assert template.placeholders == {"BROKERAGE_NAME", "WEBHOOK_URL", "MODEL", "MAX_SECONDS"}
+
+    config = template.render(VARIABLES)
+    assert config["name"] == "Acme Assistant"
+    assert config["model"] == {"model": "gpt-4o", "temperature": 0.3, "messages": [{"role": "system", "content": "You work for Acme."}]}
+    # A whole-string placeholder keeps the value's type
+    assert config["maxDurationSeconds"] == 600
+    assert config["voice"] is TEMPLATE["voice"]
+    assert TEMPLATE["name"] == "[BROKERAGE_NAME] Assistant"
+
+
+def test_fingerprint_tracks_values_and_template():
+    template = CompiledTemplate(TEMPLATE)
+    assert template.fingerprint(VARIABLES) == CompiledTemplate(dict(TEMPLATE)).fingerprint(dict(VARIABLES))
+    assert template.fingerprint(VARIABLES) != template.fingerprint({**VARIABLES, "MODEL": "gpt-4o-mini"})
+    # Values for names the template doesn't use don't change it
+    assert template.fingerprint(VARIABLES) == template.fingerprint({**VARIABLES, "UNUSED": "x"})
+    assert template.fingerprint(VARIABLES) != CompiledTemplate({**TEMPLATE, "firstMessage": "Hi"}).fingerprint(VARIABLES)
+
+
+@pytest.mark.parametrize("value", [None, "", "   "])
+def test_missing_and_empty_values_are_rejected(value):
+    template = CompiledTemplate(TEMPLATE)
+    with pytest.raises(TemplateError, match="WEBHOOK_URL"):
+        template.render({**VARIABLES, "WEBHOOK_URL": value})
+    with pytest.raises(TemplateError, match="MODEL"):
+        template.render({k: v for k, v in VARIABLES.items() if k != "MODEL"})
+    # Falsy but real values are fine
+    assert template.render({**VARIABLES, "MAX_SECONDS": 0})["maxDurationSeconds"] == 0
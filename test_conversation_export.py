@@ -0,0 +1,71 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from services import conversation_export
+from services.conversation_export import CSV_COLUMNS, iter_export
+from services.conversation_store import JsonlConversationStore
+from services.sqlite_store import SqliteConversationStore
+
+
+def record(i):
+    return {
+        "call_id": f"call-{i}",
+        "timestamp": f"2025-01-01T09:{i % 60:02d}:00",
+        "caller_info": {"name": f'Caller "{i}", Jr.', "phone": None, "email": f"caller{i}@example.com"},
+        "property_details": {"asset_type": "Office", "additional_details": "line one\nline two"},
+        "conversation_summary": "Ünïcode summary",
+        "duration": 60 + i,
+    }
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "jsonl":
+        store = JsonlConversationStore(str(tmp_path / "conversations"))
+    else:
+        store = SqliteConversationStore(str(tmp_path / "conversations.db"))
+    store.append_many([record(i) for i in range(200)])
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_ndjson_round_trip(store, compress, monkeypatch):
+    # Small flushes so the export spans many chunks
+    monkeypatch.setattr(conversation_export, "FLUSH_BYTES", 1024)
+    chunks = list(iter_export(store, fmt="ndjson", compress=compress))
+    assert len(chunks) > 1
+    body = b"".join(chunks)
+    if compress:
+        body = gzip.decompress(body)
+    assert [json.loads(line) for line in body.splitlines()] == [record(i) for i in range(200)]
+
+    window = b"".join(iter_export(store, fmt="ndjson", start=50, stop=60))
+    assert [json.loads(line)["call_id"] for line in window.splitlines()] == [f"call-{i}" for i in range(50, 60)]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_csv_round_trip(store, compress, monkeypatch):
+    monkeypatch.setattr(conversation_export, "FLUSH_BYTES", 1024)
+    body = b"".join(iter_export(store, fmt="csv", compress=compress))
+    if compress:
+        body = gzip.decompress(body)
+    rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+    assert list(rows[0]) == [name for name, _ in CSV_COLUMNS]
+    assert len(rows) == 200
+    assert rows[7]["call_id"] == "call-7" and rows[7]["caller_name"] == 'Caller "7", Jr.'
+    assert rows[7]["caller_phone"] == "" and rows[7]["additional_details"] == "line one\nline two"
+    assert rows[7]["conversation_summary"] == "Ünïcode summary" and rows[7]["duration"] == "67"
+    assert rows[7]["recording_url"] == ""
+
+
+def test_empty_export_is_still_valid(tmp_path):
+    store = JsonlConversationStore(str(tmp_path / "conversations"))
+    assert gzip.decompress(b"".join(iter_export(store, compress=True))) == b""
+    header = b"".join(iter_export(store, fmt="csv")).decode("utf-8")
+    assert header.strip() == ",".join(name for name, _ in CSV_COLUMNS)
+    store.close()
@@ -0,0 +1,55 @@
+import os
+
+from services.conversation_index import POSITION, ConversationIndex, intersect
+
+
+def test_postings_and_intersect(tmp_path):
+    index = ConversationIndex(tmp_path / "index")
+    for i in range(1200):
+        index.add({"timestamp": "", "inquiry_type": "buying" if i % 2 else "leasing",
+                   "property_details": {"asset_type": "Office" if i % 3 == 0 else "Retail"}}, 0, i, 1)
+    index.sync()
+
+    buying = list(index.postings("inquiry_type", "Buying", 0, 1200))
+    assert buying == list(range(1, 1200, 2))
+    # Bounds are [lo, hi), and descending reads cross chunk boundaries
+    assert list(index.postings("asset_type", "office", 600, 1200, descending=True)) == list(range(1197, 599, -3))
+    assert list(index.postings("asset_type", "warehouse", 0, 1200)) == []
+
+    office = index.postings("asset_type", "office", 0, 1200)
+    assert list(intersect([index.postings("inquiry_type", "buying", 0, 1200), office])) == list(range(3, 1200, 6))
+    assert list(intersect([[9, 7, 7, 3, 1], [8, 7, 3, 2]], descending=True)) == [7, 3]
+    assert list(intersect([[1, 2], []])) == []
+    index.close()
+
+
+def test_time_bounds_with_late_and_missing_timestamps(tmp_path):
+    index = ConversationIndex(tmp_path / "index")
+    timestamps = ["2025-01-01T09:00:00", "2025-01-01T09:05:00", None, "2025-01-01T08:00:00", "2025-01-01T09:10:00"]
+    for i, ts in enumerate(timestamps):
+        index.add({"timestamp": ts}, 0, i, 1)
+    index.sync()
+
+    stored = [index.position(i)[0] for i in range(5)]
+    assert stored == sorted(stored)
+    nine_oh_five = stored[1]
+    with open(index.positions_path, "rb") as f:
+        # The late and timestamp-less records are filed under 9:05, when they were stored
+        assert index.time_bounds(f.fileno(), 5, nine_oh_five, nine_oh_five) == (1, 4)
+        assert index.time_bounds(f.fileno(), 5, None, stored[0]) == (0, 1)
+        assert index.time_bounds(f.fileno(), 5, stored[4] + 1, None) == (5, 5)
+    index.close()
+
+
+def test_ensure_monotonic_fixes_older_indexes(tmp_path):
+    directory = tmp_path / "index"
+    directory.mkdir()
+    with open(directory / "positions.idx", "wb") as f:
+        for i, ts in enumerate([100.0, 0.0, 200.0, 150.0, 300.0]):
+            f.write(POSITION.pack(ts, 0, i, 1))
+
+    index = ConversationIndex(directory)
+    assert index.ensure_monotonic() == 2
+    assert [index.position(i)[0] for i in range(5)] == [100.0, 100.0, 200.0, 200.0, 300.0]
+    assert os.path.getsize(directory / "positions.idx") == 5 * POSITION.size
+    assert index.ensure_monotonic() == 0
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from services.conversation_store import JsonlConversationStore
+from services.sqlite_store import SqliteConversationStore
+
+START = datetime(2025, 1, 1, 9, 0, 0)
+
+
+def record(i):
+    return {
+        "call_id": f"call-{i}",
+        "timestamp": (START + timedelta(minutes=i)).isoformat(),
+        "caller_info": {"name": f"Caller {i}", "email": f"caller{i}@example.com"},
+        "property_details": {
+            "asset_type": ["Office", "Retail", "Industrial"][i % 3],
+            "location": "Austin, TX" if i % 2 else "Dallas, TX",
+            "urgency": "high" if i % 5 == 0 else "low",
+        },
+        "normalized": {"deal_size_min": 1e6 * i, "deal_size_max": 1e6 * i + 5e5 if i % 10 else None},
+        "inquiry_type": "buying",
+        "duration": 60 + i,
+    }
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "jsonl":
+        store = JsonlConversationStore(str(tmp_path / "conversations"))
+    else:
+        store = SqliteConversationStore(str(tmp_path / "conversations.db"))
+    yield store
+    store.close()
+
+
+def test_query_pages_with_filters(store):
+    store.append_many([record(i) for i in range(100)])
+    expected = [f"call-{i}" for i in range(100) if i % 3 == 1 and i % 2 == 1]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.query(cursor=cursor, limit=7, filters={"asset_type": "retail", "location": "Austin, TX"})
+        seen.extend(r["call_id"] for r in page)
+        if cursor is None:
+            break
+    assert seen == expected
+
+    page, _ = store.query(limit=3, descending=True, since=(START + timedelta(minutes=10)).timestamp(),
+                          until=(START + timedelta(minutes=20)).timestamp())
+    assert [r["call_id"] for r in page] == ["call-20", "call-19", "call-18"]
+
+    page, _ = store.query(limit=100, ranges={"deal_size": (20.2e6, 30e6)})
+    # 0, 10 and 20 are open-ended ("over $XM")
+    assert [r["call_id"] for r in page] == ["call-0", "call-10"] + [f"call-{i}" for i in range(20, 31)]
+
+    with pytest.raises(ValueError):
+        store.query(filters={"caller_name": "x"})
+
+
+def test_scan_and_async_append(store):
+    async def scenario():
+        await asyncio.gather(*(store.append_async(record(i)) for i in range(50)))
+
+    asyncio.run(scenario())
+    assert store.count() == 50
+    scanned = list(store.scan(10, 20))
+    assert [seq for seq, _ in scanned] == list(range(10, 20))
+    assert sorted(json.loads(line)["call_id"] for _, line in store.scan()) == sorted(f"call-{i}" for i in range(50))
+
+
+def test_sqlite_imports_jsonl_store_once(tmp_path):
+    jsonl = JsonlConversationStore(str(tmp_path / "conversations"))
+    jsonl.append_many([record(i) for i in range(30)])
+    jsonl.close()
+
+    db = SqliteConversationStore(str(tmp_path / "conversations.db"))
+    legacy = str(tmp_path / "missing.json")
+    assert db.migrate_legacy(legacy, jsonl_directory=str(tmp_path / "conversations")) == 30
+    assert db.migrate_legacy(legacy, jsonl_directory=str(tmp_path / "conversations")) == 0
+    assert [r["call_id"] for r in db.iter_records(28)] == ["call-28", "call-29"]
+    db.close()
+
+
+@pytest.mark.parametrize("backend", ["jsonl", "sqlite"])
+def test_legacy_migration_waits_for_a_readable_file(tmp_path, backend):
+    legacy = tmp_path / "conversations.json"
+    legacy.write_text('[{"call_id": "old-1"}, {"call_id": "old-2"')
+    if backend == "jsonl":
+        store = JsonlConversationStore(str(tmp_path / "conversations"))
+        migrate = lambda: store.migrate_legacy(str(legacy))
+    else:
+        store = SqliteConversationStore(str(tmp_path / "conversations.db"))
+        migrate = lambda: store.migrate_legacy(str(legacy), jsonl_directory=str(tmp_path / "none"))
+
+    # A truncated file isn't marked done; once repaired it is imported, once
+    assert migrate() == 0
+    legacy.write_text('[{"call_id": "old-1"}, {"call_id": "old-2"}]')
+    assert migrate() == 2
+    assert migrate() == 0
+    assert [r["call_id"] for r in store.iter_records()] == ["old-1", "old-2"]
+    store.close()
+
+
+def test_batched_fsync_runs_without_further_appends(tmp_path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+    store = JsonlConversationStore(str(tmp_path / "conversations"), fsync_every=100, fsync_interval=0.05)
+    store._last_sync = time.monotonic()
+    store.append(record(1))
+    assert synced == [] and store._unsynced == 1
+
+    deadline = time.monotonic() + 5
+    while store._unsynced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store._unsynced == 0 and synced
+    store.close()
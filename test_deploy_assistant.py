@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+import httpx
+
+import deploy_assistant
+from services.vapi_service import VapiService
+
+
+def test_only_changed_tenants_are_deployed(tmp_path, monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path))
+        if request.url.path == "/assistant/asst-broken":
+            return httpx.Response(400, json={"message": "bad config"})
+        return httpx.Response(200, json={"id": f"asst-{len(requests)}"})
+
+    monkeypatch.setenv("WEBHOOK_SECRET", "test-secret")
+    monkeypatch.setattr(deploy_assistant, "VapiService", lambda: VapiService(api_key="test-key", transport=httpx.MockTransport(handler)))
+    manifest, state = tmp_path / "tenants.json", str(tmp_path / "deploy_state.json")
+    tenants = [{"id": "acme", "brokerage_name": "Acme"}, {"id": "globex", "brokerage_name": "Globex"}]
+    manifest.write_text(json.dumps(tenants))
+
+    summary = asyncio.run(deploy_assistant.deploy_tenants(str(manifest), state))
+    assert sorted(summary["created"]) == ["acme", "globex"] and len(requests) == 2
+
+    # Nothing changed: no API calls at all
+    requests.clear()
+    summary = asyncio.run(deploy_assistant.deploy_tenants(str(manifest), state))
+    assert sorted(summary["unchanged"]) == ["acme", "globex"] and requests == []
+
+    # One tenant changes and another fails: what succeeded is saved anyway
+    tenants[0]["brokerage_name"] = "Acme Realty"
+    tenants.append({"id": "initech", "brokerage_name": "Initech", "assistant_id": "asst-broken"})
+    manifest.write_text(json.dumps(tenants))
+    summary = asyncio.run(deploy_assistant.deploy_tenants(str(manifest), state))
+    assert summary["updated"] == ["acme"] and summary["failed"] == ["initech"]
+    saved = deploy_assistant.load_state(state)
+    assert sorted(saved) == ["acme", "globex"]
+    assert saved["acme"]["config_hash"] != saved["globex"]["config_hash"]
+
+    # A tenant without a webhook secret fails before any API call
+    requests.clear()
+    manifest.write_text(json.dumps([{"id": "hooli", "brokerage_name": "Hooli", "webhook_secret": ""}]))
+    summary = asyncio.run(deploy_assistant.deploy_tenants(str(manifest), state, dry_run=True))
+    assert summary["failed"] == ["hooli"] and requests == []
@@ -32,7 +32,7 @@ else:
 print("\n🔄 Initializing Google Sheets...")
 sheets_logger = GoogleSheetsLogger()
 
-if sheets_logger.sheet:
+if sheets_logger.connect():
     print("\n✅ SUCCESS! Connected to Google Sheets")
     print(f"📊 Sheet Name: {sheets_logger.sheet_name}")
     print(f"🔗 Spreadsheet URL: {sheets_logger.get_spreadsheet_url()}")
@@ -0,0 +1,50 @@
+import os
+import shutil
+import time
+
+from services.inventory import InventoryIndex
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), "config", "listings.example.csv")
+
+
+def test_search_by_asset_location_and_size(tmp_path):
+    path = tmp_path / "listings.csv"
+    shutil.copy(EXAMPLE, path)
+    index = InventoryIndex(str(path))
+    assert index.reload()
+
+    found = index.search(asset_type="warehouse", location="Newark", min_square_feet=10_000, max_square_feet=10_000)
+    # The divisible 8-15k listing overlaps; the closest size comes first
+    assert [l["id"] for l in found] == ["NWK-102", "NWK-101"]
+    assert [l["id"] for l in index.search(asset_type="industrial", location="New Jersey", min_square_feet=30_000)] == []
+    assert [l["id"] for l in index.search(location="New York")] == ["NYC-202", "NYC-201"]
+    # Leased listings are not offered
+    assert index.search(asset_type="office", location="Austin, TX") == []
+
+    answer = index.search_tool({"asset_type": "industrial", "location": "Newark, NJ", "square_feet": "about 12k sq ft"})
+    assert answer.startswith("Found 2 matching listing(s)")
+    assert "12,000 square feet Industrial at 200 Doremus Ave" in answer
+
+    # A zero bound is a bound, and non-finite numbers are ignored
+    assert [l["id"] for l in index.search(asset_type="warehouse", location="Newark", min_square_feet=0)]
+    assert index.search_tool({"asset_type": "warehouse", "location": "Newark", "limit": "inf", "min_square_feet": "nan"}).startswith("Found")
+
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / "listings.json"
+    path.write_text('[{"id": "a", "asset_type": "Retail", "location": "Miami", "square_feet": 3000}]')
+    index = InventoryIndex(str(path), check_interval=0)
+    index.search(asset_type="retail")  # the first search starts the load
+
+    deadline = time.time() + 5
+    while not index.loaded and time.time() < deadline:
+        time.sleep(0.01)
+    assert [l["id"] for l in index.search(asset_type="retail")] == ["a"]
+
+    path.write_text('{"listings": [{"id": "b", "asset_type": "Retail", "location": "Miami", "square_feet": 3000, "status": "available"}]}')
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    deadline = time.time() + 5
+    while index.reloads < 2 and time.time() < deadline:
+        index.search(asset_type="retail")
+        time.sleep(0.01)
+    assert [l["id"] for l in index.search(asset_type="retail")] == ["b"]
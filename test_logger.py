@@ -0,0 +1,61 @@
+import json
+import logging
+import queue
+
+from utils import logger as log_module
+from utils.logger import CallContextFilter, JsonFormatter, NonBlockingQueueHandler, SamplingFilter, call_id_var
+
+
+def make_logger(name, handler):
+    log = logging.getLogger(name)
+    log.handlers[:] = [handler]
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    return log
+
+
+def test_full_queue_drops_instead_of_blocking():
+    log_queue = queue.Queue(maxsize=3)
+    handler = NonBlockingQueueHandler(log_queue)
+    log = make_logger("test.queue", handler)
+
+    for i in range(10):
+        log.info("record %d", i)
+    assert log_queue.qsize() == 3 and handler.dropped == 7
+    assert [log_queue.get_nowait().getMessage() for _ in range(3)] == ["record 0", "record 1", "record 2"]
+
+    log.info("room again")
+    assert log_queue.get_nowait().getMessage() == "room again" and handler.dropped == 7
+
+
+def test_sampling_limits_noisy_types_per_second(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(log_module.time, "monotonic", lambda: now[0])
+    log_queue = queue.Queue()
+    handler = NonBlockingQueueHandler(log_queue)
+    sampler = SamplingFilter(["transcript", "status-update"], per_second=2)
+    handler.addFilter(CallContextFilter())
+    handler.addFilter(sampler)
+    log = make_logger("test.sampling", handler)
+
+    token = call_id_var.set("call-1")
+    try:
+        for _ in range(5):
+            log.info("partial transcript", extra={"webhook_type": "transcript"})
+            log.info("report", extra={"webhook_type": "end-of-call-report"})
+        # Warnings always get through, as do untyped records
+        log.warning("transcript gap", extra={"webhook_type": "transcript"})
+        log.info("no type")
+        now[0] += 1
+        log.info("next second", extra={"webhook_type": "transcript"})
+    finally:
+        call_id_var.reset(token)
+
+    records = [log_queue.get_nowait() for _ in range(log_queue.qsize())]
+    types = [getattr(r, "webhook_type", None) for r in records]
+    assert types.count("transcript") == 4 and types.count("end-of-call-report") == 5
+    assert sampler.dropped == {"transcript": 3}
+
+    entry = json.loads(JsonFormatter().format(records[0]))
+    assert entry["call_id"] == "call-1" and entry["webhook_type"] == "transcript"
+    assert entry["message"] == "partial transcript" and entry["level"] == "INFO"
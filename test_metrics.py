@@ -0,0 +1,57 @@
+import threading
+
+from utils.metrics import Registry, timed
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = registry.counter("app_requests_total", "Requests", ["type"])
+    latency = registry.histogram("app_seconds", "Latency", ["type"], buckets=(0.1, 1.0))
+    registry.gauge("app_depth", "Depth", lambda: 3)
+    registry.counter_func("app_done_total", "Done", lambda: 7)
+    assert registry.counter("app_requests_total", "Requests", ["type"]) is requests
+
+    requests.inc(type="report")
+    requests.inc(2, type='say "hi"\n')
+    latency.observe(0.05, type="report")
+    latency.observe(0.5, type="report")
+    latency.observe(5, type="report")
+    with timed(latency, type="tool"):
+        pass
+
+    lines = registry.render().splitlines()
+    assert "# TYPE app_requests_total counter" in lines
+    assert 'app_requests_total{type="report"} 1' in lines
+    assert 'app_requests_total{type="say \\"hi\\"\\n"} 2' in lines
+    assert 'app_seconds_bucket{type="report",le="0.1"} 1' in lines
+    assert 'app_seconds_bucket{type="report",le="1"} 2' in lines
+    assert 'app_seconds_bucket{type="report",le="+Inf"} 3' in lines
+    assert 'app_seconds_count{type="report"} 3' in lines and latency.count(type="tool") == 1
+    assert "app_depth 3" in lines and "app_done_total 7" in lines
+
+
+def test_scrapes_while_new_series_are_added():
+    registry = Registry()
+    requests = registry.counter("app_requests_total", "Requests", ["type"])
+    latency = registry.histogram("app_seconds", "Latency", ["type"])
+    errors = []
+
+    def write(worker):
+        for i in range(300):
+            requests.inc(type=f"{worker}-{i}")
+            latency.observe(0.01, type=f"{worker}-{i}")
+
+    def scrape():
+        try:
+            for _ in range(20):
+                registry.render()
+        except RuntimeError as e:  # dictionary changed size during iteration
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(2)] + [threading.Thread(target=scrape)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(requests.samples()) == 600
@@ -0,0 +1,71 @@
+import pytest
+
+from utils.normalize import canonical_location, normalize_batch, normalize_property, parse_money, parse_square_feet
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("$2-3M", (2e6, 3e6)),
+    ("between 1 and 2 million", (1e6, 2e6)),
+    ("under $5M", (0.0, 5e6)),
+    ("over 10M", (1e7, None)),
+    ("around $750,000", (7.5e5, 7.5e5)),
+    ("2 to 3", None),
+    ("budget 2M over 5 years", (2e6, 2e6)),
+    ("$5M+", (5e6, None)),
+    ("not sure", None),
+])
+def test_parse_money(text, expected):
+    assert parse_money(text) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("about 10k sq ft", (1e4, 1e4)),
+    ("10,000-15,000 SF", (1e4, 1.5e4)),
+    ("2 acres", (87120.0, 87120.0)),
+    ("at least 20,000 sf", (2e4, None)),
+    ("10-15k", (1e4, 1.5e4)),
+    ("5,000 square feet in 2 buildings", (5e3, 5e3)),
+    ("about 10,000 sf, 2 units", (1e4, 1e4)),
+    ("3 floors, 10k to 12k sf", (1e4, 1.2e4)),
+    ("20,000 sf or more", (2e4, None)),
+])
+def test_parse_square_feet(text, expected):
+    assert parse_square_feet(text) == expected
+
+
+def test_canonical_location():
+    assert canonical_location("Midtown NYC") == {
+        "city": "New York", "state": "NY", "neighborhood": "Midtown", "market": "New York, NY"
+    }
+    assert canonical_location("Newark, New Jersey")["market"] == "Newark, NJ"
+    assert canonical_location("Boise, Idaho")["market"] == "Boise, ID"
+    assert canonical_location("somewhere nice") is None
+
+
+@pytest.mark.parametrize("text,market", [
+    ("Portland, Maine", "Portland, ME"),
+    ("portland oregon", "Portland, OR"),
+    ("portland me", "Portland, ME"),
+    ("austin tx", "Austin, TX"),
+    ("Newark, Delaware", "Newark, DE"),
+    ("Columbus, Georgia", "Columbus, GA"),
+    ("Kansas City, Kansas", "Kansas City, KS"),
+    ("kansas city", "Kansas City, MO"),
+    ("La Jolla, CA", "La Jolla, CA"),
+    ("Midtown Manhattan, NY", "New York, NY"),
+    ("SoHo, New York", "New York, NY"),
+    ("Washington DC", "Washington, DC"),
+    ("West Virginia", "WV"),
+    ("in Texas", "TX"),
+])
+def test_named_state_wins_over_market(text, market):
+    assert canonical_location(text)["market"] == market
+
+
+def test_batch_matches_single():
+    details = [
+        {"deal_size": "$2-3M", "square_footage": "10-15k", "location": "Austin, TX"},
+        {"deal_size": "over 10M", "square_footage": None, "location": "Brooklyn"},
+        {"deal_size": "$2-3M", "location": "Austin, TX"},
+    ] * 5
+    assert normalize_batch(details) == [normalize_property(d) for d in details]
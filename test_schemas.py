@@ -0,0 +1,33 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from models.schemas import CallerInfo, ConversationData
+
+
+def test_structured_data_validates_in_one_pass_and_drops_bad_fields():
+    structured_data = {
+        "callerName": "Dana Whitfield",
+        "callerPhone": 5125550123,
+        "callerEmail": "dana at whitfield dot com",
+        "company": "Whitfield Capital",
+        "assetType": ["Office", "Retail"],
+        "location": "Austin, TX",
+        "dealSize": "$5-10M",
+    }
+    conversation = ConversationData.model_validate({
+        "call_id": "call-1",
+        "timestamp": datetime(2025, 6, 1, 10),
+        "caller_info": structured_data,
+        "property_details": structured_data,
+    })
+    assert conversation.caller_info == CallerInfo(name="Dana Whitfield", phone="5125550123", company="Whitfield Capital")
+    assert conversation.property_details.asset_type is None
+    assert conversation.property_details.deal_size == "$5-10M"
+    assert conversation.model_dump(mode="json")["timestamp"] == "2025-06-01T10:00:00"
+
+    assert CallerInfo(email=" Dana@Whitfield-Cap.COM ").email == "Dana@whitfield-cap.com"
+    # Required fields still reject the record
+    with pytest.raises(ValidationError):
+        ConversationData.model_validate({"caller_info": {}, "property_details": {}})
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from services.blob_store import BlobStore
+from services.search_index import SearchIndex, compile_query
+from services.sqlite_store import SqliteConversationStore
+
+
+def record(call_id, summary, details=None, asset_type="Industrial", location="Newark, NJ"):
+    return {
+        "call_id": call_id,
+        "timestamp": "2025-06-01T10:00:00",
+        "property_details": {"asset_type": asset_type, "location": location, "additional_details": details},
+        "normalized": {"market": location},
+        "conversation_summary": summary,
+    }
+
+
+def test_ranked_phrase_and_field_search(tmp_path):
+    store = SqliteConversationStore(str(tmp_path / "conversations.db"))
+    blobs = BlobStore(str(tmp_path / "blobs"))
+    index = SearchIndex(store, blobs, str(tmp_path / "search.db"))
+
+    store.append_many([
+        record("c1", "Caller wants a cold-storage warehouse near the port.", "Needs -10F freezer space"),
+        record("c2", "Office lease in Midtown.", asset_type="Office", location="New York, NY"),
+        record("c3", "Retail tenant, flexible on timing.", asset_type="Retail"),
+    ])
+    turns = [{"role": "user", "text": "Somewhere with storage close to the port, and loading docks."}]
+    blobs.link("c3/transcript", blobs.put(json.dumps({"turns": turns}).encode(), "application/json"))
+    assert index.sync() == 3 and index.sync() == 0
+
+    hits, next_offset = index.search("storage port")
+    # A summary match outranks the same words in a transcript
+    assert [h["call_id"] for h in hits] == ["c1", "c3"] and next_offset is None
+    assert "<mark>" in hits[0]["snippet"] and hits[0]["conversation"]["call_id"] == "c1"
+
+    assert [h["call_id"] for h in index.search('"cold storage" warehouses')[0]] == ["c1"]
+    assert [h["call_id"] for h in index.search('transcript:"loading docks"')[0]] == ["c3"]
+    assert [h["call_id"] for h in index.search("storage -freezer")[0]] == ["c3"]
+    assert [h["call_id"] for h in index.search("office OR retail", filters={"asset_type": "retail"})[0]] == ["c3"]
+    assert index.search("stor*", limit=1)[1] == 1
+
+    # A second worker on the same file sees the calls without indexing them again
+    store.append(record("c4", "Another cold storage request."))
+    other = SearchIndex(store, blobs, str(tmp_path / "search.db"))
+    assert other.sync() == 1 and index.sync() == 0
+    assert len(index.search("cold storage")[0]) == 2
+
+    with pytest.raises(ValueError):
+        index.search("-- !!")
+
+    # Filter columns follow records rewritten in place once re-indexed
+    def move(records):
+        for r in records:
+            r["normalized"]["market"] = "Jersey City, NJ"
+        return [True] * len(records)
+
+    store.rewrite(move)
+    assert index.search("storage", filters={"market": "Jersey City, NJ"})[0] == []
+    assert index.reindex(batch_size=3) == 4
+    assert len(index.search("storage", filters={"market": "Jersey City, NJ"})[0]) == 3
+    assert [h["call_id"] for h in index.search('transcript:"loading docks"')[0]] == ["c3"]
+    store.close()
+
+
+def test_paging_stops_at_the_candidate_cap(tmp_path):
+    store = SqliteConversationStore(str(tmp_path / "conversations.db"))
+    index = SearchIndex(store, None, str(tmp_path / "search.db"), candidates=5)
+    store.append_many([record(f"c{i}", "Cold storage warehouse.") for i in range(8)])
+    index.sync()
+    hits, next_offset = index.search("warehouse", limit=3)
+    assert len(hits) == 3 and next_offset == 3
+    hits, next_offset = index.search("warehouse", limit=3, offset=3)
+    assert len(hits) == 2 and next_offset is None
+    with pytest.raises(ValueError):
+        index.search("warehouse", offset=5)
+    store.close()
+
+
+def test_query_syntax_errors_are_impossible():
+    assert compile_query('summary:"cold storage" port* -office') == '(summary : "cold storage" AND "port"*) NOT ("office")'
+    assert compile_query('he said "don\'t') == '"he" AND "said" AND "don t"'
+    assert compile_query("AND NOT OR (") == '"NOT"'
+    # Stopwords are dropped unless quoted or nothing else is left
+    assert compile_query('a warehouse near "the" port') == '"warehouse" AND "near" AND "the" AND "port"'
+    assert compile_query("to be") == '"to" AND "be"'
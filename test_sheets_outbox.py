@@ -0,0 +1,254 @@
+import asyncio
+
+import pytest
+
+from services.gspread_service import CALLER_HEADERS, HEADERS, GoogleSheetsLogger
+from services.sheets_outbox import SheetsOutbox
+from services.sheets_batcher import BatchingSheetsSink
+from utils.circuit_breaker import CircuitOpenError
+
+
+class FakeWorksheet:
+    """Local stand-in for a gspread worksheet"""
+
+    def __init__(self, fail_times: int = 0):
+        self.rows = []
+        self.requests = 0
+        self.fail_times = fail_times
+
+    def append_rows(self, rows):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("simulated Sheets outage")
+        self.requests += 1
+        self.rows.extend(rows)
+
+
+def make_logger(worksheet, monkeypatch):
+    monkeypatch.setenv("GOOGLE_CREDENTIALS_FILE", "does-not-exist.json")
+    logger = GoogleSheetsLogger()
+    logger.sheet = worksheet
+    return logger
+
+
+def record(call_id):
+    return {"call_id": call_id, "caller_info": {}, "property_details": {}}
+
+
+async def drain(outbox, expected, timeout=5.0):
+    outbox.start()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while outbox.delivered < expected and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+    await outbox.stop()
+
+
+def test_delivers_in_order(tmp_path, monkeypatch):
+    sheet = FakeWorksheet()
+    outbox = SheetsOutbox(make_logger(sheet, monkeypatch), directory=tmp_path)
+
+    async def scenario():
+        for i in range(3):
+            outbox.enqueue(record(f"call-{i}"))
+        await drain(outbox, 3)
+
+    asyncio.run(scenario())
+    assert [row[1] for row in sheet.rows] == ["call-0", "call-1", "call-2"]
+    assert outbox.depth() == 0
+
+
+def test_retries_after_failure(tmp_path, monkeypatch):
+    sheet = FakeWorksheet(fail_times=2)
+    outbox = SheetsOutbox(make_logger(sheet, monkeypatch), directory=tmp_path, base_backoff=0.01)
+
+    async def scenario():
+        outbox.enqueue(record("call-1"))
+        await drain(outbox, 1)
+
+    asyncio.run(scenario())
+    assert [row[1] for row in sheet.rows] == ["call-1"]
+    assert outbox.failed_attempts == 2
+
+
+def test_replays_undelivered_after_restart(tmp_path, monkeypatch):
+    sheet = FakeWorksheet()
+    logger = make_logger(sheet, monkeypatch)
+
+    first = SheetsOutbox(logger, directory=tmp_path)
+    first.enqueue(record("call-1"))
+    first.enqueue(record("call-2"))
+    asyncio.run(first.stop())
+
+    second = SheetsOutbox(logger, directory=tmp_path)
+    assert second.depth() == 2
+
+    async def scenario():
+        await drain(second, 2)
+
+    asyncio.run(scenario())
+    assert [row[1] for row in sheet.rows] == ["call-1", "call-2"]
+
+    third = SheetsOutbox(logger, directory=tmp_path)
+    assert third.depth() == 0
+    assert third.enqueue(record("call-3")) == 3
+
+
+def test_workers_share_one_outbox(tmp_path, monkeypatch):
+    sheet = FakeWorksheet()
+    logger = make_logger(sheet, monkeypatch)
+    # Separate instances on one directory stand in for worker processes
+    first = SheetsOutbox(logger, directory=tmp_path, poll_interval=0.01)
+    second = SheetsOutbox(logger, directory=tmp_path, poll_interval=0.01)
+
+    async def scenario():
+        seqs = [outbox.enqueue(record(f"call-{i}")) for i, outbox in enumerate([first, second] * 3)]
+        assert seqs == [1, 2, 3, 4, 5, 6]
+        first.start()
+        second.start()
+        assert first.is_leader and not second.is_leader
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 5
+        while first.delivered < 6 and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        assert second.depth() == 0
+
+        # The standby takes over once the leader exits
+        await first.stop()
+        second.enqueue(record("call-6"))
+        while second.delivered < 1 and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+        assert second.is_leader
+        await second.stop()
+
+    asyncio.run(scenario())
+    assert [row[1] for row in sheet.rows] == [f"call-{i}" for i in range(7)]
+
+
+def test_standby_rereads_a_reset_queue(tmp_path, monkeypatch):
+    logger = make_logger(FakeWorksheet(), monkeypatch)
+    leader = SheetsOutbox(logger, directory=tmp_path)
+    standby = SheetsOutbox(logger, directory=tmp_path)
+    leader.enqueue(record("call-1"))
+    standby._refresh()
+    assert standby.depth() == 1
+
+    # The leader delivers and resets the file, then longer entries grow it past the standby's offset
+    leader._pending.popleft()
+    leader._ack(1)
+    big = {**record("call-2"), "notes": "x" * 500}
+    assert [leader.enqueue(big), standby.enqueue(big)] == [2, 3]
+    assert [e["seq"] for e in standby._pending] == [2, 3]
+    leader._refresh()
+    assert [e["seq"] for e in leader._pending] == [2, 3]
+
+
+
+def test_delivered_head_is_compacted_under_steady_traffic(tmp_path, monkeypatch):
+    logger = make_logger(FakeWorksheet(), monkeypatch)
+    leader = SheetsOutbox(logger, directory=tmp_path, compact_bytes=2000)
+    standby = SheetsOutbox(logger, directory=tmp_path)
+    big = {**record("call"), "notes": "x" * 500}
+    for i in range(10):
+        leader.enqueue(big, key=f"call-{i}")
+    # A retry of a call still waiting isn't queued again
+    assert leader.enqueue(big, key="call-3") == 4 and leader.depth() == 10
+
+    # Acking while there is always a backlog: the file only keeps the undelivered tail
+    for seq in range(1, 9):
+        leader._pending.popleft()
+        leader._ack(seq)
+    assert (tmp_path / "queue.jsonl").stat().st_size < 3 * 600
+    assert [e["seq"] for e in leader._pending] == [9, 10]
+    standby._refresh()
+    assert [e["seq"] for e in standby._pending] == [9, 10]
+    assert standby.enqueue(record("call-10")) == 11
+
+    restarted = SheetsOutbox(logger, directory=tmp_path)
+    assert [e["seq"] for e in restarted._pending] == [9, 10, 11]
+    assert all('"_at"' not in line for line in (tmp_path / "queue.jsonl").read_text().splitlines())
+
+
+class QuotaError(Exception):
+    """Mimics gspread.exceptions.APIError for a 429 response"""
+
+    class response:
+        status_code = 429
+        headers = {"Retry-After": "0"}
+
+
+def test_batches_rows_into_one_request(tmp_path, monkeypatch):
+    sheet = FakeWorksheet()
+    sink = BatchingSheetsSink(make_logger(sheet, monkeypatch), max_rows=50, max_wait=0.05)
+    outbox = SheetsOutbox(sink, directory=tmp_path)
+
+    async def scenario():
+        for i in range(120):
+            outbox.enqueue(record(f"call-{i}"))
+        await drain(outbox, 120)
+
+    asyncio.run(scenario())
+    assert len(sheet.rows) == 120
+    assert len(sheet.rows[0]) == len(HEADERS) == 18
+    assert sheet.requests == 3
+    assert sink.stats()["rows_per_request"] == 40.0
+
+
+def test_caller_columns_are_opt_in(monkeypatch):
+    linked = {**record("call-1"), "caller_id": "abc", "prior_calls": 2}
+    assert len(make_logger(FakeWorksheet(), monkeypatch).build_row(linked)) == len(HEADERS)
+    monkeypatch.setenv("SHEETS_CALLER_COLUMNS", "true")
+    logger = make_logger(FakeWorksheet(), monkeypatch)
+    assert logger.headers == HEADERS + CALLER_HEADERS
+    assert logger.build_row(linked)[-2:] == ["abc", 2]
+
+
+def test_quota_error_is_retried(tmp_path, monkeypatch):
+    sheet = FakeWorksheet()
+    calls = []
+
+    def append_rows(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise QuotaError()
+        sheet.rows.extend(rows)
+
+    sheet.append_rows = append_rows
+    sink = BatchingSheetsSink(make_logger(sheet, monkeypatch), max_rows=10, max_wait=0.01)
+    outbox = SheetsOutbox(sink, directory=tmp_path, base_backoff=0.01)
+
+    async def scenario():
+        outbox.enqueue(record("call-1"))
+        await drain(outbox, 1)
+
+    asyncio.run(scenario())
+    assert sink.quota_errors == 1
+    assert outbox.failed_attempts == 1
+    assert [row[1] for row in sheet.rows] == ["call-1"]
+
+
+def test_circuit_opens_after_repeated_failures(monkeypatch):
+    monkeypatch.setenv("SHEETS_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("SHEETS_BREAKER_RESET", "60")
+    sheet = FakeWorksheet(fail_times=5)
+    logger = make_logger(sheet, monkeypatch)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            logger.append_rows([["row"]])
+    with pytest.raises(CircuitOpenError) as excinfo:
+        logger.append_rows([["row"]])
+
+    assert excinfo.value.retry_after > 0
+    assert sheet.fail_times == 3
+    assert logger.breaker.state == "open"
+
+
+def test_unconfigured_logger_skips_connecting(monkeypatch):
+    monkeypatch.setenv("GOOGLE_CREDENTIALS_FILE", "does-not-exist.json")
+    logger = GoogleSheetsLogger()
+    assert not logger.configured
+    assert logger.connect() is False
+    assert logger.breaker.failures == 0
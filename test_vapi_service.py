@@ -0,0 +1,118 @@
+import asyncio
+
+import httpx
+
+from services.vapi_service import VapiService
+
+
+def make_service(handler, **kwargs):
+    kwargs.setdefault("backoff", 0.001)
+    return VapiService(api_key="test-key", transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_retries_rate_limited_requests():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.url.path)
+        if len(attempts) < 3:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"id": "asst-1", "name": "Realflow"})
+
+    async def scenario():
+        async with make_service(handler) as vapi:
+            return await vapi.get_assistant("asst-1")
+
+    result = asyncio.run(scenario())
+    assert result["id"] == "asst-1"
+    assert attempts == ["/assistant/asst-1"] * 3
+
+
+def test_gives_up_after_max_retries():
+    def handler(request):
+        return httpx.Response(503)
+
+    async def scenario():
+        async with make_service(handler, max_retries=2) as vapi:
+            await vapi.update_assistant("asst-1", {"name": "x"})
+
+    try:
+        asyncio.run(scenario())
+    except httpx.HTTPStatusError as e:
+        assert e.response.status_code == 503
+    else:
+        raise AssertionError("expected HTTPStatusError")
+
+
+def test_bulk_reuses_client_and_bounds_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json={"id": request.url.path.rsplit("/", 1)[-1]})
+
+    async def scenario():
+        async with make_service(handler, max_concurrency=4) as vapi:
+            client = vapi.client
+            results = await vapi.bulk(
+                vapi.update_assistant(f"asst-{i}", {"name": str(i)}) for i in range(20)
+            )
+            assert vapi.client is client
+            return results
+
+    results = asyncio.run(scenario())
+    assert [r["id"] for r in results] == [f"asst-{i}" for i in range(20)]
+    assert peak == 4
+
+
+def test_post_is_not_resent_once_it_may_have_reached_vapi():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.method)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        if len(attempts) == 2:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if len(attempts) == 3:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"id": "asst-2"})
+
+    async def scenario():
+        async with make_service(handler) as vapi:
+            await vapi.create_assistant({"name": "x"})
+
+    # Connect errors and 429s are retried; a 502 may follow a create that happened
+    try:
+        asyncio.run(scenario())
+    except httpx.HTTPStatusError as e:
+        assert e.response.status_code == 502
+    else:
+        raise AssertionError("expected HTTPStatusError")
+    assert attempts == ["POST"] * 3
+
+
+def test_backoff_frees_the_slot_and_caps_retry_after():
+    attempts = []
+
+    async def handler(request):
+        attempts.append(request.url.path)
+        if request.url.path == "/assistant/slow" and attempts.count("/assistant/slow") == 1:
+            return httpx.Response(503, headers={"Retry-After": "3600"})
+        return httpx.Response(200, json={"id": request.url.path.rsplit("/", 1)[-1]})
+
+    async def scenario():
+        async with make_service(handler, max_concurrency=1, max_backoff=0.2) as vapi:
+            slow = asyncio.create_task(vapi.get_assistant("slow"))
+            await asyncio.sleep(0.05)
+            # The only slot is free while the first request waits to retry
+            assert (await asyncio.wait_for(vapi.get_assistant("fast"), 0.1))["id"] == "fast"
+            return await asyncio.wait_for(slow, 1.0)
+
+    assert asyncio.run(scenario())["id"] == "slow"
+    assert attempts == ["/assistant/slow", "/assistant/fast", "/assistant/slow"]
@@ -0,0 +1,184 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    data = str(tmp_path_factory.mktemp("data"))
+    saved = dict(os.environ)
+    os.environ.update(
+        ENVIRONMENT="production",
+        CONVERSATION_DB_PATH=os.path.join(data, "conversations.db"),
+        CONVERSATION_STORE_DIR=os.path.join(data, "conversations"),
+        SHEETS_OUTBOX_DIR=os.path.join(data, "outbox"),
+        DEDUP_LOG_FILE=os.path.join(data, "seen_calls.log"),
+        CALLER_INDEX_FILE=os.path.join(data, "callers.log"),
+        BLOB_STORE_DIR=os.path.join(data, "blobs"),
+        SEARCH_DB_PATH=os.path.join(data, "search.db"),
+        ANALYTICS_SNAPSHOT=os.path.join(data, "analytics.json"),
+        INVENTORY_FILE=os.path.join(data, "listings.csv"),
+        LOG_FILE=os.path.join(data, "app.log"),
+        LOG_LEVEL="WARNING",
+        GOOGLE_CREDENTIALS_FILE=os.path.join(data, "missing.json"),
+        WEBHOOK_SECRET="",
+    )
+    import main
+    yield main.app
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+def call(app, requests):
+    """Send (method, path, json) requests in order and return the responses"""
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.request(method, path, json=body) for method, path, body in requests]
+
+    return asyncio.run(scenario())
+
+
+def test_metrics_label_unknown_types_as_other(app):
+    sent = [("POST", "/api/vapi/webhook", {"message": {"type": f"made-up-{i}"}}) for i in range(20)]
+    responses = call(app, sent + [("POST", "/api/vapi/webhook", {"message": {"type": "speech-update"}}), ("GET", "/metrics", None)])
+    assert all(r.status_code == 200 for r in responses)
+    text = responses[-1].text
+    assert "made-up" not in text
+    assert 'realflow_webhook_requests_total{type="other"} 20' in text
+    assert 'realflow_webhook_requests_total{type="speech-update"} 1' in text
+
+
+def report(call_id):
+    return {"message": {
+        "type": "end-of-call-report",
+        "call": {"id": call_id, "customer": {"number": "+15125550100"}},
+        "analysis": {"summary": "Wants warehouse space", "structuredData": {"callerName": "Dana Reyes", "assetType": "industrial"}},
+        "messages": [{"role": "user", "message": "I need warehouse space."}],
+    }}
+
+
+def test_concurrent_retry_waits_for_the_first_attempt(app, monkeypatch):
+    from routes import webhook
+    store_write = webhook.conversation_store.append_async
+
+    async def slow_write(record):
+        await asyncio.sleep(0.2)
+        await store_write(record)
+
+    monkeypatch.setattr(webhook.conversation_store, "append_async", slow_write)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/api/vapi/webhook", json=report("dedup-1")))
+            await asyncio.sleep(0.05)
+            retry = await client.post("/api/vapi/webhook", json=report("dedup-1"))
+            return await first, retry
+
+    first, retry = asyncio.run(scenario())
+    assert first.status_code == 200 and first.json()["message"] == "Call data processed and stored"
+    assert retry.status_code == 409 and retry.headers["Retry-After"]
+    assert call(app, [("POST", "/api/vapi/webhook", report("dedup-1"))])[0].json()["message"] == "Duplicate call ignored"
+
+
+def test_failed_write_is_retried_but_a_stored_call_is_not(app, monkeypatch):
+    from routes import webhook
+
+    async def broken_write(record):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(webhook.conversation_store, "append_async", broken_write)
+        assert call(app, [("POST", "/api/vapi/webhook", report("dedup-2"))])[0].status_code == 500
+    stored = call(app, [("POST", "/api/vapi/webhook", report("dedup-2"))])[0]
+    assert stored.json()["message"] == "Call data processed and stored"
+
+    # The Sheets outbox can't take it: not committed, so the retry queues the row instead of dropping it
+    def broken_enqueue(record, key=None):
+        raise OSError("outbox unavailable")
+
+    monkeypatch.setattr(webhook.sheets_logger, "sheet", object())
+    with monkeypatch.context() as patched:
+        patched.setattr(webhook.sheets_outbox, "enqueue", broken_enqueue)
+        assert call(app, [("POST", "/api/vapi/webhook", report("dedup-3"))])[0].status_code == 500
+    depth = webhook.sheets_outbox.depth()
+    assert call(app, [("POST", "/api/vapi/webhook", report("dedup-3"))])[0].json()["message"] == "Call data processed and stored"
+    assert webhook.sheets_outbox.depth() == depth + 1
+    # Once committed, a retry is a duplicate
+    assert call(app, [("POST", "/api/vapi/webhook", report("dedup-3"))])[0].json()["message"] == "Duplicate call ignored"
+
+
+def test_report_with_malformed_analysis_is_still_stored(app):
+    malformed = report("shape-1")
+    malformed["message"]["analysis"]["structuredData"] = ["not", "an", "object"]
+    no_analysis = report("shape-2")
+    no_analysis["message"]["analysis"] = "n/a"
+    responses = call(app, [("POST", "/api/vapi/webhook", malformed), ("POST", "/api/vapi/webhook", no_analysis)])
+    assert [r.status_code for r in responses] == [200, 200]
+    assert all(r.json()["message"] == "Call data processed and stored" for r in responses)
+
+
+def test_report_with_malformed_messages_releases_its_claim(app, monkeypatch):
+    from routes import webhook
+
+    odd = report("shape-3")
+    odd["message"]["messages"] = ["hello", 3, {"role": "user", "message": "Hi"}]
+    assert call(app, [("POST", "/api/vapi/webhook", odd)])[0].json()["message"] == "Call data processed and stored"
+
+    def broken_finish(call_id, messages=None):
+        raise AttributeError("'str' object has no attribute 'get'")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(webhook.call_sessions, "finish", broken_finish)
+        assert call(app, [("POST", "/api/vapi/webhook", report("shape-4"))])[0].status_code == 500
+    # The claim was released, so the retry goes through instead of getting 409
+    assert call(app, [("POST", "/api/vapi/webhook", report("shape-4"))])[0].json()["message"] == "Call data processed and stored"
+
+
+def test_sniffer_reads_the_type_regardless_of_layout(app):
+    from routes.webhook import is_ignorable, sniff_message_type
+
+    for body in (
+        b'{"message":{"type":"speech-update"}}',
+        b'{ "message" : {\n  "type"  :\t"speech-update" } }',
+        b'{"message": {"call": {"id": "c-1"}, "status": "x", "type": "speech-update"}}',
+    ):
+        assert sniff_message_type(body) == "speech-update"
+        assert is_ignorable(body, sniff_message_type(body))
+
+    assert sniff_message_type(b'{"message": {"type": "totally-new-event"}}') == "totally-new-event"
+    assert is_ignorable(b'{"message": {"type": "totally-new-event"}}', "totally-new-event")
+
+
+def test_sniffer_never_skips_a_body_that_may_be_handled(app):
+    from routes.webhook import is_ignorable, sniff_message_type
+
+    # The first "type" belongs to a nested object, but message.type is a handled one
+    nested = b'{"message": {"call": {"type": "webCall"}, "type": "end-of-call-report"}}'
+    assert sniff_message_type(nested) == "webCall"
+    assert not is_ignorable(nested, sniff_message_type(nested))
+    top_level = b'{"type": "speech-update", "message": {"type": "end-of-call-report"}}'
+    assert not is_ignorable(top_level, sniff_message_type(top_level))
+
+    # No plain string to read: the body is left to the full parse
+    for body in (b'{"message": {"type": 5}}', b'{"message": {"type": "end-of-call-rep\\u006frt"}}', b'{"message": {}}'):
+        assert sniff_message_type(body) is None
+        assert not is_ignorable(body, None)
+
+
+def test_unsniffable_report_is_stored_through_the_full_parse(app):
+    body = httpx.Request("POST", "/", json=report("sniff-1")).content
+    escaped = body.replace(b'"end-of-call-report"', b'"end-of-call-rep\\u006frt"')
+    assert escaped != body
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/vapi/webhook", content=escaped, headers={"content-type": "application/json"})
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.json()["message"] == "Call data processed and stored"
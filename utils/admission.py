@@ -0,0 +1,152 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+CRITICAL = 0
+NORMAL = 1
+LOW = 2
+
+# Share of the worker's capacity each priority may fill; the rest is kept for higher priorities
+SHARES = {CRITICAL: 1.0, NORMAL: 0.75, LOW: 0.5}
+PRIORITY_NAMES = {CRITICAL: "critical", NORMAL: "normal", LOW: "low"}
+
+
+class Shed(Exception):
+    """Low-priority work turned away at once because the worker is busy"""
+
+
+class Overloaded(Exception):
+    """Critical work that waited ``max_wait`` seconds without getting a slot"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name}: no capacity, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class Lane:
+    """In-flight limit and counters for one kind of work"""
+
+    def __init__(self, name: str, priority: int, limit: int, max_wait: float):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.overloaded = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seen = 0.0
+        self._slots = asyncio.Semaphore(limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "priority": PRIORITY_NAMES[self.priority],
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "overloaded": self.overloaded,
+            "avg_wait_ms": round(self.wait_seconds / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "max_wait_ms": round(self.max_wait_seen * 1000, 2),
+        }
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """``"end-of-call-report=16,transcript=32"`` -> {name: limit}"""
+    limits = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class AdmissionController:
+    """Bounded in-flight work per lane, with priorities, for one worker.
+
+    Each lane (a webhook message type) has its own in-flight limit.
+    Critical lanes are bounded by that limit alone: they queue for a
+    slot in arrival order when it is reached, and past ``max_wait`` they
+    get ``Overloaded``, so the caller can answer 429 and have the sender
+    retry later instead of timing out. ``ADMISSION_CAPACITY`` is the
+    worker-wide total that normal and low lanes are measured against,
+    critical work in flight included. They never wait: once over their
+    limit, or once that total is 75% / 50% full, they get ``Shed``.
+    Noisy events therefore can't take the capacity that reports and
+    tool calls need.
+
+    ``ADMISSION_LIMITS`` overrides per-lane limits, e.g.
+    ``end-of-call-report=16,transcript=32``.
+    """
+
+    def __init__(
+        self,
+        lanes: Dict[str, Tuple[int, int, float]],
+        capacity: Optional[int] = None,
+        default: Tuple[int, int, float] = (LOW, 32, 0.0),
+    ):
+        self.capacity = int(capacity or os.getenv("ADMISSION_CAPACITY", 128))
+        overrides = parse_limits(os.getenv("ADMISSION_LIMITS", ""))
+        self.default = default
+        self.lanes: Dict[str, Lane] = {}
+        for name, (priority, limit, max_wait) in lanes.items():
+            self.lanes[name] = Lane(name, priority, overrides.get(name, limit), max_wait)
+        self.in_flight = 0
+
+    def lane(self, name: str) -> Lane:
+        lane = self.lanes.get(name)
+        if lane is None:
+            priority, limit, max_wait = self.default
+            lane = self.lanes[name] = Lane(name, priority, limit, max_wait)
+        return lane
+
+    @asynccontextmanager
+    async def admit(self, name: str) -> AsyncIterator[float]:
+        """Hold a slot in lane ``name`` for the block; yields the seconds spent queued.
+
+        Raises ``Shed`` or ``Overloaded`` before the block runs.
+        """
+        lane = self.lane(name)
+        started = time.perf_counter()
+        if lane.priority == CRITICAL:
+            if lane._slots.locked():
+                lane.waiting += 1
+                try:
+                    await asyncio.wait_for(lane._slots.acquire(), lane.max_wait)
+                except asyncio.TimeoutError:
+                    lane.overloaded += 1
+                    raise Overloaded(name, max(1.0, lane.max_wait)) from None
+                finally:
+                    lane.waiting -= 1
+            else:
+                await lane._slots.acquire()
+        else:
+            if lane._slots.locked() or self.in_flight >= self.capacity * SHARES[lane.priority]:
+                lane.shed += 1
+                raise Shed(name)
+            await lane._slots.acquire()
+
+        waited = time.perf_counter() - started
+        lane.admitted += 1
+        lane.wait_seconds += waited
+        lane.max_wait_seen = max(lane.max_wait_seen, waited)
+        lane.in_flight += 1
+        self.in_flight += 1
+        try:
+            yield waited
+        finally:
+            lane.in_flight -= 1
+            self.in_flight -= 1
+            lane._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+        }
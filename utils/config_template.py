@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Set, Tuple
+
+PLACEHOLDER = re.compile(r"\[([A-Z][A-Z0-9_]*)\]")
+
+
+class TemplateError(ValueError):
+    """Raised when a template is rendered without all of its placeholders filled"""
+
+
+class CompiledTemplate:
+    """A JSON config template with its ``[PLACEHOLDER]`` strings parsed once.
+
+    Compilation walks the structure a single time and turns every node
+    into a render function. Strings are pre-split into literal and
+    placeholder parts, and subtrees without placeholders are returned
+    as-is, so rendering a tenant never re-serializes the config (or its
+    system prompt). Rendered configs share those constant subtrees and
+    should be treated as read-only.
+    """
+
+    def __init__(self, template: Any):
+        self.template = template
+        self.placeholders: Set[str] = set()
+        self.digest = hashlib.sha256(
+            json.dumps(template, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+        self._render, _ = self._compile(template)
+
+    def _compile(self, node: Any) -> Tuple[Callable[[Dict[str, Any]], Any], bool]:
+        """Return (render function, whether the node contains placeholders)"""
+        if isinstance(node, str):
+            parts = PLACEHOLDER.split(node)
+            if len(parts) == 1:
+                return (lambda variables: node), False
+            names = parts[1::2]
+            self.placeholders.update(names)
+            if len(parts) == 3 and not parts[0] and not parts[2]:
+                # Whole-string placeholder: substitute the value itself, whatever its type
+                name = names[0]
+                return (lambda variables: variables[name]), True
+            literals = parts[0::2]
+
+            def render_string(variables: Dict[str, Any]) -> str:
+                out = [literals[0]]
+                for name, literal in zip(names, literals[1:]):
+                    out.append(str(variables[name]))
+                    out.append(literal)
+                return "".join(out)
+
+            return render_string, True
+
+        if isinstance(node, dict):
+            compiled = [(key, *self._compile(value)) for key, value in node.items()]
+            dynamic = [(key, fn) for key, fn, has in compiled if has]
+            if not dynamic:
+                return (lambda variables: node), False
+
+            def render_dict(variables: Dict[str, Any]) -> Dict[str, Any]:
+                out = dict(node)
+                for key, fn in dynamic:
+                    out[key] = fn(variables)
+                return out
+
+            return render_dict, True
+
+        if isinstance(node, list):
+            compiled = [self._compile(item) for item in node]
+            if not any(has for _, has in compiled):
+                return (lambda variables: node), False
+            functions = [fn for fn, _ in compiled]
+            return (lambda variables: [fn(variables) for fn in functions]), True
+
+        return (lambda variables: node), False
+
+    def validate(self, variables: Dict[str, Any]):
+        """Every placeholder needs a value; None or a blank string would deploy "None" or ""."""
+        missing = {
+            name for name in self.placeholders
+            if variables.get(name) is None or (isinstance(variables[name], str) and not variables[name].strip())
+        }
+        if missing:
+            raise TemplateError(f"Missing template values: {', '.join(sorted(missing))}")
+
+    def render(self, variables: Dict[str, Any]) -> Any:
+        """Render the config, checking that every placeholder is filled"""
+        self.validate(variables)
+        return self._render(variables)
+
+    def fingerprint(self, variables: Dict[str, Any]) -> str:
+        """Hash identifying the rendered output, without rendering it.
+
+        Rendering is deterministic, so the template digest plus the
+        values of its placeholders identify the result.
+        """
+        values = {name: variables.get(name) for name in sorted(self.placeholders)}
+        payload = self.digest + json.dumps(values, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_compiled: Dict[str, Tuple[int, CompiledTemplate]] = {}
+
+
+def load_template(path: str) -> CompiledTemplate:
+    """Load and compile a template file, reusing the compiled form until the file changes"""
+    mtime = os.stat(path).st_mtime_ns
+    cached = _compiled.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, "r") as f:
+        compiled = CompiledTemplate(json.load(f))
+    _compiled[path] = (mtime, compiled)
+    return compiled
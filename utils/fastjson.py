@@ -0,0 +1,37 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+else:
+    BACKEND = "json"
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON bytes with the fastest available library"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode to JSON bytes with the fastest available library"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    if msgspec is not None:
+        return msgspec.json.encode(obj, enc_hook=str)
+    return json.dumps(obj, default=str).encode("utf-8")
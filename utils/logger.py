@@ -1,32 +1,202 @@
-import logging
+import atexit
 import json
-from datetime import datetime
+import logging
+import os
+import queue
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Call ID of the webhook being handled, attached to every log record
+call_id_var: ContextVar[Optional[str]] = ContextVar("call_id", default=None)
+
+DEFAULT_SAMPLED_TYPES = "status-update,speech-update,transcript,conversation-update,model-output,voice-input"
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+_setup_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("call_id", "webhook_type"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class CallContextFilter(logging.Filter):
+    """Copy the current call ID onto the record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "call_id", None) is None:
+            record.call_id = call_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Rate-limit records for high-volume webhook types.
+
+    Records logged with ``extra={"webhook_type": ...}`` for a sampled
+    type pass at most ``per_second`` times per second per type; the rest
+    are counted in ``dropped`` and never reach the queue.
+    """
+
+    def __init__(self, sampled_types, per_second: float):
+        super().__init__()
+        self.sampled_types = set(sampled_types)
+        self.per_second = per_second
+        self.dropped: Dict[str, int] = {}
+        self._windows: Dict[str, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        webhook_type = getattr(record, "webhook_type", None)
+        if webhook_type not in self.sampled_types or record.levelno > logging.INFO:
+            return True
+        now = int(time.monotonic())
+        window = self._windows.get(webhook_type)
+        if window is None or window[0] != now:
+            window = self._windows[webhook_type] = [now, 0]
+        window[1] += 1
+        if window[1] <= self.per_second:
+            return True
+        self.dropped[webhook_type] = self.dropped.get(webhook_type, 0) + 1
+        return False
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """Rotate when the file reaches ``maxBytes`` or every ``interval`` seconds.
+
+    Worker processes share the file: rotation happens under a lock on
+    ``<file>.lock``, and a worker whose file was already rotated by
+    another one just reopens the new file instead of rotating again.
+    """
+
+    def __init__(self, filename: str, maxBytes: int, backupCount: int, interval: float):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding="utf-8")
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+        self._lock_path = self.baseFilename + ".lock"
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def _rotated_elsewhere(self) -> bool:
+        """True when the open stream no longer is the file at ``baseFilename``"""
+        if self.stream is None:
+            return False
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def doRollover(self):
+        if fcntl is None:
+            super().doRollover()
+        else:
+            with open(self._lock_path, "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if self._rotated_elsewhere():
+                    self.stream.close()
+                    self.stream = self._open()
+                else:
+                    super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+def setup_logger(name: str = "realflow") -> logging.Logger:
+    """Route all logging through a queue so callers never wait on disk or stdout.
+
+    The root logger gets a non-blocking QueueHandler; a QueueListener
+    thread writes JSON lines to a size- and time-rotated file and to the
+    console. Safe to call more than once.
+    """
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            log_file = os.getenv("LOG_FILE", "logs/app.log")
+            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+
+            file_handler = SizeAndTimeRotatingFileHandler(
+                log_file,
+                maxBytes=int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+                backupCount=int(os.getenv("LOG_BACKUP_COUNT", 5)),
+                interval=float(os.getenv("LOG_ROTATE_INTERVAL", 24 * 3600)),
+            )
+            file_handler.setFormatter(JsonFormatter())
+
+            stream_handler = logging.StreamHandler()
+            if os.getenv("LOG_FORMAT", "text") == "json":
+                stream_handler.setFormatter(JsonFormatter())
+            else:
+                stream_handler.setFormatter(logging.Formatter(
+                    '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+                ))
+
+            log_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", 10000)))
+            _queue_handler = NonBlockingQueueHandler(log_queue)
+            _queue_handler.addFilter(CallContextFilter())
+            _queue_handler.addFilter(SamplingFilter(
+                [t for t in os.getenv("LOG_SAMPLED_TYPES", DEFAULT_SAMPLED_TYPES).split(",") if t],
+                float(os.getenv("LOG_SAMPLE_PER_SECOND", 5)),
+            ))
+
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(_queue_handler)
+            root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+            _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logger)
+    return logging.getLogger(name)
+
+def shutdown_logger():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
 
-def setup_logger():
-    # Ensure logs directory exists
-    Path("logs").mkdir(exist_ok=True)
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('logs/app.log'),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger(__name__)
-
-def log_conversation(data: dict, filename: str = "data/conversations.json"):
-    Path("data").mkdir(exist_ok=True)
-    
-    try:
-        with open(filename, 'r') as f:
-            conversations = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        conversations = []
-    
-    conversations.append(data)
-    
-    with open(filename, 'w') as f:
-        json.dump(conversations, f, indent=2, default=str)
\ No newline at end of file
+def logging_stats() -> Dict[str, object]:
+    """Counts of records dropped by sampling or a full queue"""
+    if _queue_handler is None:
+        return {"queue_dropped": 0, "sampled_out": {}}
+    sampler = next(f for f in _queue_handler.filters if isinstance(f, SamplingFilter))
+    return {"queue_dropped": _queue_handler.dropped, "sampled_out": dict(sampler.dropped)}
@@ -0,0 +1,303 @@
+import re
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+CACHE_SIZE = 4096
+
+Range = Tuple[Optional[float], Optional[float]]
+
+MONEY_UNITS = {
+    "k": 1e3, "thousand": 1e3,
+    "m": 1e6, "mm": 1e6, "mil": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9,
+}
+AREA_UNITS = {
+    "k": 1e3, "thousand": 1e3,
+    "m": 1e6, "million": 1e6,
+}
+SQ_FT_PER_ACRE = 43560.0
+SQ_FT_PER_SQ_M = 10.7639
+
+_MONEY = re.compile(r"(\d+(?:\.\d+)?)\s*(thousand|million|billion|mil|mm|bn|k|m|b)?(?![a-z])")
+_AREA = re.compile(r"(\d+(?:\.\d+)?)\s*(thousand|million|k|m)?(?![a-z0-9])")
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_SPACES = re.compile(r"\s+")
+_UPPER_BOUND = re.compile(r"\b(under|below|less than|up to|at most|max(?:imum)?|no more than)\b|<")
+_LOWER_BOUND = re.compile(r"\b(over|above|more than|at least|min(?:imum)?|north of|plus)\b|\+|>")
+# After the number: "20k sf or less", "$5M+"
+_UPPER_AFTER = re.compile(r"^\D*?\b(or less|or under|max(?:imum)?)\b")
+_LOWER_AFTER = re.compile(r"^\D*?(\+|\bplus\b|\bor more\b|\bor (?:above|over|larger|bigger)\b)")
+# Only these join two numbers into a range: "2-3M", "10k to 15k", "between 1 and 2 million"
+_CONNECTOR = re.compile(r"\s*\$?\s*(-|–|—|to|and|or)\s*\$?\s*")
+_UNIT_AFTER = re.compile(r"\s*(sq|sf|square|acres?|ft|feet|foot|m2|sqm|dollars?|bucks)\b")
+
+STATES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA",
+    "colorado": "CO", "connecticut": "CT", "delaware": "DE", "florida": "FL", "georgia": "GA",
+    "hawaii": "HI", "idaho": "ID", "illinois": "IL", "indiana": "IN", "iowa": "IA",
+    "kansas": "KS", "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN", "mississippi": "MS", "missouri": "MO",
+    "montana": "MT", "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ",
+    "new mexico": "NM", "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT",
+    "virginia": "VA", "washington": "WA", "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+    "district of columbia": "DC",
+}
+STATE_CODES = set(STATES.values())
+STATE_NAMES = {code: name for name, code in STATES.items()}
+
+# Spoken names for common markets -> (city, state)
+MARKETS = {
+    "new york": ("New York", "NY"), "new york city": ("New York", "NY"), "nyc": ("New York", "NY"),
+    "manhattan": ("New York", "NY"), "brooklyn": ("New York", "NY"), "queens": ("New York", "NY"),
+    "the bronx": ("New York", "NY"), "bronx": ("New York", "NY"), "ny": ("New York", "NY"),
+    "los angeles": ("Los Angeles", "CA"),
+    "san francisco": ("San Francisco", "CA"), "sf": ("San Francisco", "CA"),
+    "san diego": ("San Diego", "CA"), "san jose": ("San Jose", "CA"), "oakland": ("Oakland", "CA"),
+    "chicago": ("Chicago", "IL"),
+    "dallas": ("Dallas", "TX"), "dfw": ("Dallas", "TX"), "fort worth": ("Fort Worth", "TX"),
+    "houston": ("Houston", "TX"), "austin": ("Austin", "TX"), "san antonio": ("San Antonio", "TX"),
+    "miami": ("Miami", "FL"), "orlando": ("Orlando", "FL"), "tampa": ("Tampa", "FL"),
+    "atlanta": ("Atlanta", "GA"), "atl": ("Atlanta", "GA"),
+    "boston": ("Boston", "MA"), "philadelphia": ("Philadelphia", "PA"), "philly": ("Philadelphia", "PA"),
+    "pittsburgh": ("Pittsburgh", "PA"),
+    "washington dc": ("Washington", "DC"), "washington d c": ("Washington", "DC"), "dc": ("Washington", "DC"),
+    "seattle": ("Seattle", "WA"), "portland": ("Portland", "OR"), "denver": ("Denver", "CO"),
+    "phoenix": ("Phoenix", "AZ"), "las vegas": ("Las Vegas", "NV"), "vegas": ("Las Vegas", "NV"),
+    "detroit": ("Detroit", "MI"), "minneapolis": ("Minneapolis", "MN"), "nashville": ("Nashville", "TN"),
+    "charlotte": ("Charlotte", "NC"), "raleigh": ("Raleigh", "NC"), "newark": ("Newark", "NJ"),
+    "jersey city": ("Jersey City", "NJ"), "baltimore": ("Baltimore", "MD"), "salt lake city": ("Salt Lake City", "UT"),
+    "columbus": ("Columbus", "OH"), "cleveland": ("Cleveland", "OH"), "st louis": ("St. Louis", "MO"),
+    "kansas city": ("Kansas City", "MO"), "indianapolis": ("Indianapolis", "IN"), "new orleans": ("New Orleans", "LA"),
+}
+BOROUGHS = {"manhattan", "brooklyn", "queens", "bronx", "the bronx"}
+_MARKET_PATTERN = re.compile(r"\b(" + "|".join(sorted(map(re.escape, MARKETS), key=len, reverse=True)) + r")\b")
+_NEIGHBORHOOD_NOISE = re.compile(r"\b(in|the|area|near|around|downtown area|of|city)\b")
+_STATE_SUFFIX = re.compile(r"\s(" + "|".join(sorted(map(re.escape, STATES), key=len, reverse=True)) + r")$")
+
+
+def _clean(text: Any) -> Optional[str]:
+    if text is None:
+        return None
+    text = _SPACES.sub(" ", str(text).strip().lower())
+    return text or None
+
+
+def _has_unit(text: str, match: re.Match) -> bool:
+    return bool(match.group(2) or text[:match.start()].endswith("$") or _UNIT_AFTER.match(text, match.end()))
+
+
+def _parse_range(text: str, pattern: re.Pattern, units: Dict[str, float], scale: float = 1.0) -> Optional[Range]:
+    text = _THOUSANDS.sub("", text)
+    matches = list(pattern.finditer(text))
+    if not matches:
+        return None
+
+    # Numbers joined by a connector form one range; any other number is about something
+    # else ("5,000 sf in 2 buildings"), so the one carrying a unit is the amount
+    groups: List[List[re.Match]] = []
+    for match in matches:
+        if groups and len(groups[-1]) == 1 and _CONNECTOR.fullmatch(text, groups[-1][0].end(), match.start()):
+            groups[-1].append(match)
+        else:
+            groups.append([match])
+    index = next((i for i, g in enumerate(groups) if any(_has_unit(text, m) for m in g)), 0)
+    group = groups[index]
+
+    values = [float(m.group(1)) for m in group]
+    multipliers: List[Optional[float]] = [units[m.group(2)] if m.group(2) else None for m in group]
+    # "2-3M": a trailing unit applies to the bare number before it
+    if multipliers[0] is None and len(multipliers) == 2:
+        multipliers[0] = multipliers[1]
+    amounts = [v * (m or 1.0) * scale for v, m in zip(values, multipliers)]
+
+    if len(amounts) == 2:
+        low, high = sorted(amounts)
+        return low, high
+    amount = amounts[0]
+    before = text[groups[index - 1][-1].end() if index else 0:group[0].start()]
+    after = text[group[-1].end():groups[index + 1][0].start() if index + 1 < len(groups) else len(text)]
+    if _UPPER_BOUND.search(before) or _UPPER_AFTER.search(after):
+        return 0.0, amount
+    if _LOWER_BOUND.search(before) or _LOWER_AFTER.search(after):
+        return amount, None
+    return amount, amount
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _money(text: str) -> Optional[Range]:
+    parsed = _parse_range(text, _MONEY, MONEY_UNITS)
+    if parsed is None:
+        return None
+    # A bare "2 to 3" is too ambiguous to be a deal size
+    if not _MONEY.search(text).group(2) and not any(u in text for u in ("$", "dollar", ",")) and max(
+        v for v in parsed if v is not None
+    ) < 1000:
+        return None
+    return parsed
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_money(text: Any) -> Optional[Range]:
+    """Parse a spoken deal size into (min, max) dollars; max is None for open ranges.
+
+    "$2-3M" -> (2e6, 3e6), "under 500k" -> (0, 5e5), "over $10M" -> (1e7, None)
+    """
+    cleaned = _clean(text)
+    return _money(cleaned) if cleaned else None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _area(text: str) -> Optional[Range]:
+    if "acre" in text:
+        scale = SQ_FT_PER_ACRE
+    elif re.search(r"\b(sq ?m|m2|square met(er|re)s?)\b", text):
+        scale = SQ_FT_PER_SQ_M
+    else:
+        scale = 1.0
+    return _parse_range(text, _AREA, AREA_UNITS, scale)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_square_feet(text: Any) -> Optional[Range]:
+    """Parse a spoken size into (min, max) square feet.
+
+    "about 10k sq ft" -> (1e4, 1e4), "10,000-15,000 SF" -> (1e4, 1.5e4), "2 acres" -> (87120, 87120)
+    """
+    cleaned = _clean(text)
+    return _area(cleaned) if cleaned else None
+
+
+def _trailing_state(text: str) -> Optional[Tuple[str, str, str]]:
+    """(state code, what precedes it, the state as said) for "Portland, ME" or "portland maine" """
+    parts = [p.strip() for p in text.split(",") if p.strip()]
+    if len(parts) >= 2:
+        tail = parts[-1]
+        code = tail.upper() if tail.upper() in STATE_CODES else STATES.get(tail)
+        return (code, ", ".join(parts[:-1]), tail) if code else None
+    match = _STATE_SUFFIX.search(text)
+    if match and text not in STATES:
+        return STATES[match.group(1)], text[:match.start()].strip(), match.group(1)
+    # Without a comma a bare code only counts after a city name; "downtown la" is not Louisiana
+    head, _, code = text.rpartition(" ")
+    if code.upper() in STATE_CODES and _MARKET_PATTERN.search(head):
+        return code.upper(), head.strip(), code
+    return None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _location(text: str) -> Optional[Dict[str, Optional[str]]]:
+    text = text.replace(".", "")
+    city = state = match = None
+    rest = text
+
+    trailing = _trailing_state(text)
+    if trailing:
+        # The state the caller named wins: "Portland, Maine" is not the Portland market
+        state, head, said = trailing
+        match = next((m for m in _MARKET_PATTERN.finditer(head) if MARKETS[m.group(1)][1] == state), None)
+        if match:
+            city = MARKETS[match.group(1)][0]
+            rest = head[:match.start()] + " " + head[match.end():]
+        elif MARKETS.get(said, (None, None))[1] == state:
+            # "SoHo, New York": the state doubles as its main city
+            city, rest = MARKETS[said][0], head
+        else:
+            parts = [p.strip() for p in head.split(",") if p.strip()]
+            if _NEIGHBORHOOD_NOISE.sub("", parts[-1]).strip():
+                city = parts[-1].title()
+            rest = ", ".join(parts[:-1])
+    else:
+        match = _MARKET_PATTERN.search(text)
+        if match:
+            city, state = MARKETS[match.group(1)]
+            rest = text[:match.start()] + " " + text[match.end():]
+        elif text in STATES:
+            state = STATES[text]
+            rest = ""
+
+    if city is None and state is None:
+        return None
+
+    # Trailing state after a known market ("Austin, TX") is not a neighborhood
+    rest = rest.replace(",", " ")
+    rest = re.sub(rf"\b{STATE_NAMES[state]}\b", " ", rest)
+    rest = " ".join(w for w in rest.split() if w.upper() != state)
+    neighborhood = _SPACES.sub(" ", _NEIGHBORHOOD_NOISE.sub(" ", rest)).strip()
+    if not neighborhood and match and match.group(1) in BOROUGHS:
+        neighborhood = match.group(1).replace("the ", "")
+
+    return {
+        "city": city,
+        "state": state,
+        "neighborhood": neighborhood.title() or None,
+        "market": f"{city}, {state}" if city else state,
+    }
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _canonical_location(text: Any) -> Optional[Dict[str, Optional[str]]]:
+    cleaned = _clean(text)
+    return _location(cleaned) if cleaned else None
+
+
+def canonical_location(text: Any) -> Optional[Dict[str, Optional[str]]]:
+    """Resolve a spoken location to city, state, neighborhood and a market label.
+
+    "Midtown NYC" -> New York, NY / Midtown; "austin tx" -> Austin, TX.
+    Returns None when no city or state can be recognized.
+    """
+    result = _canonical_location(text)
+    return dict(result) if result else None
+
+
+def _normalized(deal: Optional[Range], area: Optional[Range], location: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    deal = deal or (None, None)
+    area = area or (None, None)
+    location = location or {}
+    return {
+        "deal_size_min": deal[0],
+        "deal_size_max": deal[1],
+        "square_feet_min": area[0],
+        "square_feet_max": area[1],
+        "city": location.get("city"),
+        "state": location.get("state"),
+        "neighborhood": location.get("neighborhood"),
+        "market": location.get("market"),
+    }
+
+
+def normalize_property(details: Dict[str, Any]) -> Dict[str, Any]:
+    """Numeric ranges and canonical location for one ``PropertyDetails`` dict"""
+    return _normalized(
+        parse_money(details.get("deal_size")),
+        parse_square_feet(details.get("square_footage")),
+        canonical_location(details.get("location")),
+    )
+
+
+def normalize_batch(details: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalize many ``PropertyDetails`` dicts for a backfill.
+
+    Each distinct phrase is parsed once, however often it repeats, and
+    the results are mapped back column by column.
+    """
+    details = list(details)
+    columns = []
+    for field, parse in (("deal_size", _money), ("square_footage", _area), ("location", _location)):
+        values = [d.get(field) for d in details]
+        parsed = {}
+        for value in set(values):
+            cleaned = _clean(value)
+            parsed[value] = parse(cleaned) if cleaned else None
+        columns.append([parsed[v] for v in values])
+    return [_normalized(*row) for row in zip(*columns)]
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    stats = {}
+    for name, func in (("deal_size", _money), ("square_footage", _area), ("location", _location)):
+        info = func.cache_info()
+        stats[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+    return stats